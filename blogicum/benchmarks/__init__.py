@@ -0,0 +1,9 @@
+"""Benchmark scripts for the blogicum project.
+
+Run them from the ``blogicum/`` directory, next to ``manage.py``::
+
+    python -m benchmarks.diagnostics
+    python -m benchmarks.load --posts 100000
+
+Every script works on a throwaway test database and prints a JSON report.
+"""
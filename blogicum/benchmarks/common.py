@@ -0,0 +1,117 @@
+"""Setup and measurement helpers shared by the benchmark scripts."""
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+    import django
+
+    django.setup()
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+
+
+def create_test_database(path=None):
+    """Create and migrate a throwaway test database; return its name.
+
+    With ``path`` the database is a file there that is kept between runs,
+    so a large seeded data set can be reused.
+    """
+    from django.core.cache import cache
+    from django.db import connection
+
+    if path:
+        connection.settings_dict['TEST']['NAME'] = path
+    # The cache outlives the process: pages of an earlier run's data set
+    # must not be served, as bulk inserts invalidate nothing.
+    cache.clear()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=bool(path)
+    )
+    _mirror_replicas(connection)
+    return old_name
+
+
+def _mirror_replicas(connection):
+    """Point the read replicas of `blog.routers` at the test database."""
+    from django.db import connections
+
+    from blog.routers import replicas
+
+    name = str(connection.settings_dict['NAME'])
+    for alias in replicas():
+        replica = connections[alias]
+        replica.close()
+        replica.creation.set_as_test_mirror(connection.settings_dict)
+        if not name.startswith('file:'):
+            # Still read-only, as in production.
+            replica.settings_dict['NAME'] = f'file:{name}?mode=ro'
+
+
+def destroy_test_database(old_name, keep=False):
+    from django.db import connection
+
+    connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keep)
+
+
+def seed_small_blog(n_posts=100, comments_per_post=5):
+    """Create one author, category and location with a few posts."""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from blog.excerpts import fill_text_stats
+    from blog.models import Category, Comment, Location, Post
+
+    author = get_user_model().objects.create_user('bench', password='bench')
+    category = Category.objects.create(
+        title='Бенчмарк', description='Категория бенчмарка', slug='bench'
+    )
+    location = Location.objects.create(name='Бенчмарк')
+    now = timezone.now()
+    Post.objects.bulk_create(
+        fill_text_stats(Post(
+            title=f'Пост {i}',
+            text='Текст публикации ' * 50,
+            pub_date=now - timezone.timedelta(minutes=i),
+            author=author,
+            category=category,
+            location=location,
+            comment_count=comments_per_post,
+        ))
+        for i in range(n_posts)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text='Комментарий')
+        for post in Post.objects.all()
+        for _ in range(comments_per_post)
+    )
+    return author, category, Post.objects.first()
+
+
+def time_calls(func, repeat):
+    """Call ``func`` ``repeat`` times; return per-call durations in seconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(samples):
+    """Summarize durations in milliseconds."""
+    return {
+        'mean_ms': round(statistics.mean(samples) * 1000, 3),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+    }
@@ -0,0 +1,248 @@
+"""Requests/sec of the public pages under concurrent load, WSGI against ASGI.
+
+Scales ``db.json`` like `benchmarks.load`, then keeps ``--concurrency``
+clients busy on each public page for ``--requests`` requests:
+
+* ``wsgi``: one thread per client calls the WSGI application, as a
+  threaded WSGI server would, and the sync views serve the page;
+* ``asgi``: one task per client calls `blogicum.asgi.application` on a
+  single event loop, as one ASGI server worker would, and the async views
+  serve the page with their queries on the ``ASYNC_DB_WORKERS`` pool.
+
+Both applications are called in-process, without an HTTP server in front,
+so the report compares the request handling alone::
+
+    python -m benchmarks.concurrency --posts 10000 --concurrency 32
+    python -m benchmarks.concurrency --no-page-cache --only blog:post_detail
+
+Pages are requested anonymously, so by default most of them come out of
+the page cache; ``--no-page-cache`` measures the database path.
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .common import (
+    create_test_database, destroy_test_database, percentile, setup_django)
+from .load import collect_urls, ensure_data, sample_objects
+
+PUBLIC_VIEWS = (
+    'blog:index', 'blog:post_detail', 'blog:category_posts', 'blog:profile',
+)
+HOST = 'testserver'
+
+
+def _wsgi_environ(path):
+    url = urlsplit(path)
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def _asgi_scope(path):
+    url = urlsplit(path)
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+
+
+def _summary(samples, statuses, elapsed):
+    return {
+        'requests_per_sec': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'statuses': statuses,
+    }
+
+
+def run_wsgi(application, path, requests, concurrency):
+    def fetch():
+        status = []
+        body = application(
+            _wsgi_environ(path), lambda s, headers, exc_info=None: status.append(s)
+        )
+        try:
+            for _ in body:
+                pass
+        finally:
+            getattr(body, 'close', lambda: None)()
+        return status[0].split()[0]
+
+    fetch()  # warm up template, URL and page caches
+    lock = threading.Lock()
+    remaining = [requests]
+    samples, statuses = [], {}
+
+    def client():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            status = fetch()
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    return _summary(samples, statuses, time.perf_counter() - started)
+
+
+async def _asgi_fetch(application, path):
+    status = []
+    received = asyncio.Event()
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(str(message['status']))
+        elif not message.get('more_body', False):
+            received.set()
+
+    await application(_asgi_scope(path), receive, send)
+    await received.wait()
+    return status[0]
+
+
+async def _run_asgi(application, path, requests, concurrency):
+    await _asgi_fetch(application, path)
+    remaining = [requests]
+    samples, statuses = [], {}
+
+    async def client():
+        while remaining[0]:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            status = await _asgi_fetch(application, path)
+            samples.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return _summary(samples, statuses, time.perf_counter() - started)
+
+
+def run_asgi(application, path, requests, concurrency):
+    return asyncio.run(_run_asgi(application, path, requests, concurrency))
+
+
+def _speedup(wsgi, asgi):
+    # Error pages are cheap to serve: comparing those says nothing.
+    if set(wsgi['statuses']) | set(asgi['statuses']) != {'200'}:
+        return None
+    return round(asgi['requests_per_sec'] / wsgi['requests_per_sec'], 2)
+
+
+def run(args):
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    from blogicum.asgi import application as asgi_application
+
+    if args.no_page_cache:
+        settings.PAGE_CACHE_TIMEOUT = 0
+    seeded = ensure_data(args)
+    urls = collect_urls(*sample_objects())
+    views = args.only or PUBLIC_VIEWS
+    wsgi_application = get_wsgi_application()
+    report = {}
+    for name in views:
+        wsgi = run_wsgi(wsgi_application, urls[name], args.requests, args.concurrency)
+        asgi = run_asgi(asgi_application, urls[name], args.requests, args.concurrency)
+        report[name] = {
+            'path': urls[name],
+            'wsgi': wsgi,
+            'asgi': asgi,
+            'asgi_speedup': _speedup(wsgi, asgi),
+        }
+    return {
+        'meta': {
+            'posts': args.posts,
+            'seed': seeded,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'async_db_workers': settings.ASYNC_DB_WORKERS,
+            'page_cache': not args.no_page_cache,
+        },
+        'views': report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--comments-per-post', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument(
+        '--no-page-cache', action='store_true',
+        help='render every page instead of serving it from the page cache',
+    )
+    parser.add_argument(
+        '--database', help='keep the seeded SQLite database in this file',
+    )
+    parser.add_argument(
+        '--only', nargs='+', metavar='VIEW', choices=PUBLIC_VIEWS,
+        help='benchmark only these views, e.g. blog:index',
+    )
+    parser.add_argument('--output', help='write the report to this file')
+    args = parser.parse_args()
+    setup_django()
+    logging.disable(logging.WARNING)
+    old_name = create_test_database(args.database)
+    try:
+        report = run(args)
+    finally:
+        destroy_test_database(old_name, keep=bool(args.database))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
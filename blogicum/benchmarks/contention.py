@@ -0,0 +1,187 @@
+"""Concurrent read/write throughput of SQLite, default against tuned PRAGMAs.
+
+Seeds a small blog in a throwaway SQLite file, then for ``--seconds`` runs
+``--readers`` threads reading feed pages and post comments next to
+``--writers`` threads adding comments, once per connection profile:
+
+* ``default``: SQLite's own settings, rollback journal included;
+* ``tuned``: the ``SQLITE_PRAGMAS`` setting (see `blog.sqlite`).
+
+Reports reads/s and writes/s, their p50/p95/p99 latency and the number of
+operations that failed with "database is locked", as JSON::
+
+    python -m benchmarks.contention --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from .common import (
+    create_test_database, destroy_test_database, percentile, seed_small_blog,
+    setup_django)
+
+# SQLite's defaults for the PRAGMAs of `blogicum.settings.SQLITE_PRAGMAS`.
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+    'cache_size': -2000,
+    'mmap_size': 0,
+    'temp_store': 'default',
+}
+
+
+def _read(post_ids, rng):
+    from blog.models import Comment
+    from blog.views import get_published_posts_queryset
+
+    list(get_published_posts_queryset()[:10])
+    list(Comment.objects.filter(post_id=rng.choice(post_ids))[:50])
+
+
+def _write(post_ids, rng, author_id):
+    from django.db import transaction
+
+    from blog.models import Comment
+
+    with transaction.atomic():
+        Comment.objects.create(
+            post_id=rng.choice(post_ids), author_id=author_id, text='Нагрузка'
+        )
+
+
+def _worker(operation, deadline, results, seed):
+    import random
+
+    from django.db import OperationalError, connection
+
+    rng = random.Random(seed)
+    samples, locked = [], 0
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                operation(rng)
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+                continue
+            samples.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+        results.append((samples, locked))
+
+
+def _summary(results, seconds):
+    samples = [sample for thread_samples, _ in results for sample in thread_samples]
+    summary = {
+        'per_sec': round(len(samples) / seconds, 1),
+        'locked': sum(locked for _, locked in results),
+    }
+    if samples:
+        summary.update({
+            'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        })
+    return summary
+
+
+def run_profile(pragmas, args, post_ids, author_id):
+    from django.conf import settings
+    from django.db import connection
+
+    settings.SQLITE_PRAGMAS = pragmas
+    # Reconnect so the profile, journal mode included, applies from here on.
+    connection.close()
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+
+    reads, writes = [], []
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=_worker, args=(
+            lambda rng: _read(post_ids, rng), deadline, reads, i,
+        ))
+        for i in range(args.readers)
+    ] + [
+        threading.Thread(target=_worker, args=(
+            lambda rng: _write(post_ids, rng, author_id), deadline, writes,
+            args.readers + i,
+        ))
+        for i in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'journal_mode': journal_mode,
+        'reads': _summary(reads, args.seconds),
+        'writes': _summary(writes, args.seconds),
+    }
+
+
+def run(args):
+    from django.conf import settings
+
+    from blog.models import Post
+
+    author, _, _ = seed_small_blog(args.posts, comments_per_post=3)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    profiles = {
+        'default': DEFAULT_PRAGMAS,
+        'tuned': dict(settings.SQLITE_PRAGMAS),
+    }
+    return {
+        'meta': {
+            'readers': args.readers,
+            'writers': args.writers,
+            'seconds': args.seconds,
+            'posts': args.posts,
+        },
+        'profiles': {
+            name: dict(
+                run_profile(pragmas, args, post_ids, author.pk),
+                pragmas=pragmas,
+            )
+            for name, pragmas in profiles.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--output', help='write the report to this file')
+    args = parser.parse_args()
+    setup_django()
+    # Query budget warnings of the writer threads would flood stderr.
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        # WAL needs a database file; in-memory databases ignore it.
+        old_name = create_test_database(os.path.join(directory, 'bench.sqlite3'))
+        try:
+            report = run(args)
+        finally:
+            destroy_test_database(old_name)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
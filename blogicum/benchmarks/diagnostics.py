@@ -0,0 +1,72 @@
+"""Per-view cost of the request diagnostics layer.
+
+Times the public blog views with diagnostics switched off (the production
+hot path) and switched on with DEBUG logging enabled, which matches the
+work the views used to do inline on every request: a second render, extra
+queries and introspection loops. Prints the mean/percentile timings and
+the per-view savings as JSON::
+
+    python -m benchmarks.diagnostics --repeat 200
+"""
+import argparse
+import json
+import logging
+import os
+
+from .common import (
+    create_test_database, destroy_test_database, seed_small_blog,
+    setup_django, summarize, time_calls)
+
+
+def run(repeat):
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    author, category, post = seed_small_blog()
+    client = Client()
+    client.force_login(author)
+    urls = {
+        'index': reverse('blog:index'),
+        'post_detail': reverse('blog:post_detail', args=(post.id,)),
+        'category_posts': reverse('blog:category_posts', args=(category.slug,)),
+        'profile': reverse('blog:profile', args=(author.username,)),
+    }
+    diagnostics_logger = logging.getLogger('blog.diagnostics')
+    # Format every record as a real handler would, but discard the output.
+    handler = logging.StreamHandler(open(os.devnull, 'w'))
+    report = {}
+    for name, url in urls.items():
+        client.get(url)  # warm up template and URL caches
+        off = time_calls(lambda: client.get(url), repeat)
+        diagnostics_logger.addHandler(handler)
+        diagnostics_logger.setLevel(logging.DEBUG)
+        with override_settings(BLOG_DIAGNOSTICS=True):
+            on = time_calls(lambda: client.get(url), repeat)
+        diagnostics_logger.removeHandler(handler)
+        diagnostics_logger.setLevel(logging.NOTSET)
+        off_summary, on_summary = summarize(off), summarize(on)
+        report[name] = {
+            'diagnostics_off': off_summary,
+            'diagnostics_on': on_summary,
+            'saved_ms_per_request': round(
+                on_summary['mean_ms'] - off_summary['mean_ms'], 3
+            ),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+    setup_django()
+    old_name = create_test_database()
+    try:
+        report = run(args.repeat)
+    finally:
+        destroy_test_database(old_name)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
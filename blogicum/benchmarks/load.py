@@ -0,0 +1,353 @@
+"""End-to-end load test of every URL in ``blog.urls`` and ``pages.urls``.
+
+Scales ``db.json`` to ``--posts`` posts (see `benchmarks.scale`), then
+requests each URL ``--repeat`` times, through the Django test client or,
+with ``--server``, over HTTP from a local threaded WSGI server. Reports per
+view requests/sec, p50/p95/p99 latency, queries per request (from
+`blog.middleware.view_query_stats`), the response statuses and the peak
+memory allocated while serving a request, as JSON::
+
+    python -m benchmarks.load --posts 10000
+    python -m benchmarks.load --posts 1000000 --database /tmp/bench-1m.sqlite3
+
+Seeding a million posts takes a while; with ``--database`` the seeded file
+is kept and reused by later runs with the same ``--posts``. Run it twice on
+the same machine, once per commit, and compare the reports.
+"""
+import argparse
+import http.client
+import json
+import logging
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from .common import (
+    create_test_database, destroy_test_database, percentile, setup_django)
+from .scale import scale_fixture
+
+# Views that redirect anonymous users to the login page; they are requested
+# as the author of the sample post instead.
+LOGIN_REQUIRED = {
+    'blog:create_post', 'blog:edit_post', 'blog:delete_post',
+    'blog:edit_profile', 'blog:add_comment', 'blog:edit_comment',
+    'blog:delete_comment', 'pages:page_create', 'pages:page_edit',
+}
+
+# Query strings for views that do little without one.
+QUERY_STRINGS = {
+    'blog:search': 'q=%D0%BE%D0%B1%D0%B5%D0%B4',
+}
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def url_kwargs(post, comment, page):
+    """URL keyword arguments for every named route, by view name."""
+    category_slug = post.category.slug
+    return {
+        'blog:index': {},
+        'blog:search': {},
+        'blog:feed': {'kind': 'rss'},
+        'blog:category_feed': {'category_slug': category_slug, 'kind': 'atom'},
+        'blog:post_detail': {'id': post.pk},
+        'blog:category_posts': {'category_slug': category_slug},
+        'blog:category_posts_stream': {'category_slug': category_slug},
+        'blog:category_posts_plural': {'category_slug': category_slug},
+        'blog:edit_profile': {},
+        'blog:profile': {'username': post.author.username},
+        'blog:create_post': {},
+        'blog:edit_post': {'post_id': post.pk},
+        'blog:delete_post': {'post_id': post.pk},
+        'blog:comments_fragment': {'post_id': post.pk},
+        'blog:add_comment': {'post_id': post.pk},
+        'blog:edit_comment': {'post_id': post.pk, 'comment_id': comment.pk},
+        'blog:delete_comment': {'post_id': post.pk, 'comment_id': comment.pk},
+        'blog:sitemap': {},
+        'blog:sitemap_section': {'section': 'posts', 'number': 0},
+        'blog:api_posts': {},
+        'blog:api_post': {'post_id': post.pk},
+        'blog:api_post_comments': {'post_id': post.pk},
+        'blog:api_categories': {},
+        'blog:api_category': {'category_slug': category_slug},
+        'blog:api_category_posts': {'category_slug': category_slug},
+        'blog:api_author_posts': {'username': post.author.username},
+        'blog:api_locations': {},
+        'pages:about': {},
+        'pages:rules': {},
+        'pages:page_create': {},
+        'pages:page_edit': {'slug': page.slug},
+        'pages:page_detail': {'slug': page.slug},
+    }
+
+
+def collect_urls(post, comment, page):
+    """Return ``{view name: path}`` for every route of the two apps.
+
+    Fails for a route without arguments in `url_kwargs`, so a new URL
+    can't silently drop out of the benchmark.
+    """
+    from django.urls import reverse
+
+    from blog import urls as blog_urls
+    from pages import urls as pages_urls
+
+    kwargs = url_kwargs(post, comment, page)
+    urls = {}
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            name = f'{module.app_name}:{pattern.name}'
+            if name not in kwargs:
+                raise KeyError(f'No benchmark arguments for URL {name!r}')
+            urls[name] = reverse(name, kwargs=kwargs[name])
+            if name in QUERY_STRINGS:
+                urls[name] += '?' + QUERY_STRINGS[name]
+    return urls
+
+
+def sample_objects():
+    """Return the newest visible post, one of its comments and a page."""
+    from django.contrib.auth import get_user_model
+
+    from blog.clock import visibility_now
+    from blog.models import Comment, Post
+    from pages.models import Page
+
+    post = (
+        Post.objects.select_related('author', 'category')
+        .filter(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=visibility_now(),
+        )
+        .order_by('-pub_date')
+        .first()
+    )
+    get_user_model().objects.filter(pk=post.author_id).update(is_staff=True)
+    comment = Comment.objects.filter(post=post).first()
+    page, _ = Page.objects.get_or_create(
+        slug='bench', defaults={'title': 'Бенчмарк', 'content': 'Страница'}
+    )
+    return post, comment, page
+
+
+def _client_fetcher(client):
+    def fetch(path):
+        response = client.get(path)
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+        return response.status_code
+
+    return fetch
+
+
+def _server_fetcher(port, cookie):
+    local = threading.local()
+
+    def fetch(path):
+        connection = getattr(local, 'connection', None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection(
+                '127.0.0.1', port
+            )
+        headers = {'Cookie': cookie} if cookie else {}
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    return fetch
+
+
+def _start_server():
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server(
+        '127.0.0.1', 0, get_wsgi_application(),
+        server_class=_ThreadingWSGIServer, handler_class=_QuietHandler,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _peak_memory(fetch, path, samples):
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            fetch(path)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        return peak
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name, path, fetch, repeat, memory_samples):
+    from blog.middleware import view_query_stats
+
+    fetch(path)  # warm up template, URL and page caches
+    view_query_stats.pop(name, None)
+    statuses = {}
+    samples = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        request_started = time.perf_counter()
+        status = fetch(path)
+        samples.append(time.perf_counter() - request_started)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    elapsed = time.perf_counter() - started
+    stats = view_query_stats.get(name, {'requests': 0, 'queries': 0})
+    return {
+        'path': path,
+        'statuses': statuses,
+        'requests_per_sec': round(repeat / elapsed, 1),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'queries_per_request': round(
+            stats['queries'] / max(stats['requests'], 1), 2
+        ),
+        'peak_memory_kib': round(
+            _peak_memory(fetch, path, memory_samples) / 1024, 1
+        ),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ensure_data(args):
+    """Seed ``args.posts`` posts, or reuse a database that already has them."""
+    from blog.models import Post
+
+    existing = Post.objects.count()
+    if existing == args.posts:
+        return {'reused': True, 'posts': existing}
+    if existing:
+        raise SystemExit(
+            f'{args.database} holds {existing} posts, not {args.posts}; '
+            'remove it or pick another --database.'
+        )
+    started = time.perf_counter()
+    rows = scale_fixture(
+        args.posts, n_users=args.users,
+        comments_per_post=args.comments_per_post, seed=args.seed,
+    )
+    rows['seconds'] = round(time.perf_counter() - started, 1)
+    return rows
+
+
+def run(args):
+    from django import get_version
+    from django.test import Client
+
+    seeded = ensure_data(args)
+    post, comment, page = sample_objects()
+    urls = collect_urls(post, comment, page)
+    if args.only:
+        urls = {name: path for name, path in urls.items() if name in args.only}
+
+    anonymous, author = Client(), Client()
+    author.force_login(post.author)
+    server = _start_server() if args.server else None
+    report = {}
+    try:
+        for name, path in urls.items():
+            logged_in = args.authenticated or name in LOGIN_REQUIRED
+            if server is not None:
+                cookie = ''
+                if logged_in:
+                    cookie = f'sessionid={author.cookies["sessionid"].value}'
+                fetch = _server_fetcher(server.server_port, cookie)
+            else:
+                fetch = _client_fetcher(author if logged_in else anonymous)
+            report[name] = measure(
+                name, path, fetch, args.repeat, args.memory_samples
+            )
+            report[name]['authenticated'] = logged_in
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    return {
+        'meta': {
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'django': get_version(),
+            'mode': 'wsgi-server' if args.server else 'test-client',
+            'posts': args.posts,
+            'repeat': args.repeat,
+            'seed': seeded,
+            'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'views': report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--comments-per-post', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--memory-samples', type=int, default=5)
+    parser.add_argument(
+        '--server', action='store_true',
+        help='request the pages over HTTP from a local WSGI server',
+    )
+    parser.add_argument(
+        '--authenticated', action='store_true',
+        help='request every page as a logged-in author',
+    )
+    parser.add_argument(
+        '--database', help='keep the seeded SQLite database in this file',
+    )
+    parser.add_argument(
+        '--only', nargs='+', metavar='VIEW',
+        help='benchmark only these views, e.g. blog:index',
+    )
+    parser.add_argument('--output', help='write the report to this file')
+    args = parser.parse_args()
+    setup_django()
+    # 404s and query budget warnings would flood stderr; the report has them.
+    logging.disable(logging.WARNING)
+    old_name = create_test_database(args.database)
+    try:
+        report = run(args)
+    finally:
+        destroy_test_database(old_name, keep=bool(args.database))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Grow the ``db.json`` fixture into a data set of any size.
+
+The categories, locations and users of the fixture are loaded as they are;
+posts are generated by cycling through the fixture's posts, so titles,
+texts and the category/location mix look like the real thing. Extra
+readers are added as authors, and every post gets comments. Everything is
+written with ``bulk_create`` in batches, and the result only depends on the
+arguments and ``seed``.
+"""
+import itertools
+import json
+import random
+from datetime import timedelta
+from pathlib import Path
+
+FIXTURE = Path(__file__).resolve().parent.parent.parent / 'db.json'
+BATCH_SIZE = 5000
+
+# Share of generated posts that are drafts, or scheduled in the future.
+UNPUBLISHED_SHARE = 0.01
+SCHEDULED_SHARE = 0.001
+
+
+def _batches(objects, size):
+    iterator = iter(objects)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def load_fixture(path=FIXTURE):
+    """Return the fixture's objects grouped by model label."""
+    grouped = {}
+    for obj in json.loads(Path(path).read_text(encoding='utf-8')):
+        grouped.setdefault(obj['model'], []).append(obj)
+    return grouped
+
+
+def _create_base(fixture):
+    from django.contrib.auth import get_user_model
+
+    from blog.models import Category, Location
+
+    User = get_user_model()
+    for model, label in (
+        (Category, 'blog.category'),
+        (Location, 'blog.location'),
+        (User, 'auth.user'),
+    ):
+        model.objects.bulk_create(
+            model(pk=obj['pk'], **{
+                name: value for name, value in obj['fields'].items()
+                if name not in ('groups', 'user_permissions')
+            })
+            for obj in fixture.get(label, [])
+        )
+
+
+def _create_users(n_users, password_hash):
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    existing = User.objects.count()
+    for batch in _batches(
+        (
+            User(username=f'reader{i}', password=password_hash)
+            for i in range(existing, n_users)
+        ),
+        BATCH_SIZE,
+    ):
+        User.objects.bulk_create(batch)
+    return list(User.objects.values_list('pk', flat=True))
+
+
+def _generate_posts(n_posts, sources, author_ids, comments_per_post, rng, now):
+    from blog.excerpts import fill_text_stats
+    from blog.models import Post
+
+    for i in range(n_posts):
+        source = sources[i % len(sources)]['fields']
+        roll = rng.random()
+        pub_date = now - timedelta(minutes=i)
+        is_published = roll >= UNPUBLISHED_SHARE
+        if roll < SCHEDULED_SHARE:
+            pub_date = now + timedelta(days=rng.randint(1, 30))
+            is_published = True
+        yield fill_text_stats(Post(
+            title=f'{source["title"]} #{i}'[:256],
+            text=source['text'],
+            pub_date=pub_date,
+            is_published=is_published,
+            author_id=rng.choice(author_ids),
+            category_id=source['category'],
+            location_id=source['location'],
+            comment_count=comments_per_post,
+        ))
+
+
+def scale_fixture(n_posts, n_users=100, comments_per_post=3, seed=0,
+                  fixture_path=FIXTURE):
+    """Fill the current database with ``n_posts`` posts based on the fixture.
+
+    Returns the number of rows written per model.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from blog.models import Comment, Post
+
+    rng = random.Random(seed)
+    fixture = load_fixture(fixture_path)
+    _create_base(fixture)
+    author_ids = _create_users(n_users, make_password('bench'))
+    now = timezone.now()
+    for batch in _batches(
+        _generate_posts(
+            n_posts, fixture['blog.post'], author_ids, comments_per_post,
+            rng, now,
+        ),
+        BATCH_SIZE,
+    ):
+        Post.objects.bulk_create(batch)
+    post_ids = Post.objects.order_by('pk').values_list('pk', flat=True)
+    comments = (
+        Comment(
+            post_id=post_id,
+            author_id=rng.choice(author_ids),
+            text=f'Комментарий {n} к посту {post_id}',
+        )
+        for post_id in list(post_ids)
+        for n in range(comments_per_post)
+    )
+    for batch in _batches(comments, BATCH_SIZE):
+        Comment.objects.bulk_create(batch)
+    return {
+        'users': len(author_ids),
+        'posts': n_posts,
+        'comments': n_posts * comments_per_post,
+    }
@@ -0,0 +1,170 @@
+"""Render cost of the feed templates per card, with and without inlined includes.
+
+Renders ``blog/index.html``, ``blog/category.html`` and ``blog/profile.html``
+with pages of ``--cards`` posts, built in memory so no query is run, under
+two template loader setups:
+
+* ``cached``: Django's cached loader, as used outside DEBUG;
+* ``inlined``: `blog.template_loaders.InliningLoader`, the cached loader
+  inlining fixed includes.
+
+The post card fragment cache is bypassed unless ``--card-cache`` is given,
+so every card is rendered. For every template and page size the report
+has the mean/percentile render times, the cost per card, and the marginal
+cost of a card between the smallest and the largest page, which leaves out
+the page's fixed cost::
+
+    python -m benchmarks.templates --cards 10 50 100 --repeat 50
+"""
+import argparse
+import copy
+import json
+import sys
+
+from .common import setup_django, summarize, time_calls
+
+FEED_TEMPLATES = ('blog/index.html', 'blog/category.html', 'blog/profile.html')
+SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+LOADERS = {
+    'cached': [('django.template.loaders.cached.Loader', SOURCE_LOADERS)],
+    'inlined': [('blog.template_loaders.InliningLoader', SOURCE_LOADERS)],
+}
+
+
+def _templates_setting(loaders):
+    from django.conf import settings
+
+    backend = copy.deepcopy(settings.TEMPLATES[0])
+    backend['APP_DIRS'] = False
+    backend['OPTIONS'] = dict(backend['OPTIONS'], debug=False, loaders=loaders)
+    return [backend]
+
+
+def build_posts(count):
+    """Unsaved posts with their author, category and location attached."""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+
+    from blog.excerpts import text_stats
+    from blog.models import Category, Location, Post
+
+    now = timezone.now()
+    author = get_user_model()(pk=1, username='bench', date_joined=now)
+    category = Category(
+        pk=1, title='Бенчмарк', slug='bench', description='Категория бенчмарка',
+        is_published=True, updated_at=now,
+    )
+    location = Location(pk=1, name='Бенчмарк', is_published=True, updated_at=now)
+    text = 'Текст публикации ' * 50
+    excerpt, word_count, reading_time = text_stats(text)
+    posts = []
+    for i in range(count):
+        post = Post(
+            pk=i + 1, title=f'Пост {i}', text=text, excerpt=excerpt,
+            word_count=word_count, reading_time=reading_time,
+            pub_date=now - timezone.timedelta(minutes=i), updated_at=now,
+            author=author, category=category, location=location,
+            comment_count=3,
+        )
+        post.render_image_url = None
+        posts.append(post)
+    return author, category, posts
+
+
+def _context(template_name, count):
+    from django.core.paginator import Paginator
+
+    author, category, posts = build_posts(count)
+    context = {'page_obj': Paginator(posts, count).get_page(1)}
+    if template_name == 'blog/category.html':
+        context['category'] = category
+    elif template_name == 'blog/profile.html':
+        context['profile'] = author
+    return context
+
+
+def _request():
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    return request
+
+
+def run(args):
+    from django.template.loader import render_to_string
+    from django.test import override_settings
+
+    request = _request()
+    report = {}
+    for template_name in FEED_TEMPLATES:
+        rows = {}
+        for count in args.cards:
+            context = _context(template_name, count)
+            row = {}
+            outputs = {}
+            for setup, loaders in LOADERS.items():
+                with override_settings(TEMPLATES=_templates_setting(loaders)):
+                    def render():
+                        return render_to_string(template_name, context, request)
+
+                    outputs[setup] = render()  # compile and warm up
+                    summary = summarize(time_calls(render, args.repeat))
+                summary['us_per_card'] = round(summary['mean_ms'] * 1000 / count, 2)
+                row[setup] = summary
+            row['identical_output'] = len(set(outputs.values())) == 1
+            row['saved_us_per_card'] = round(
+                row['cached']['us_per_card'] - row['inlined']['us_per_card'], 2
+            )
+            rows[count] = row
+        smallest, largest = min(args.cards), max(args.cards)
+        if largest > smallest:
+            rows['marginal_us_per_card'] = {
+                setup: round(
+                    (rows[largest][setup]['mean_ms'] - rows[smallest][setup]['mean_ms'])
+                    * 1000 / (largest - smallest), 2,
+                )
+                for setup in LOADERS
+            }
+        report[template_name] = rows
+    return {
+        'meta': {
+            'cards': args.cards,
+            'repeat': args.repeat,
+            'card_cache': args.card_cache,
+        },
+        'templates': report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument(
+        '--card-cache', action='store_true',
+        help='let the post card fragment cache serve repeated cards',
+    )
+    parser.add_argument('--output', help='write the report to this file')
+    args = parser.parse_args()
+    setup_django()
+    from django.conf import settings
+
+    if not args.card_cache:
+        # A zero timeout stores nothing: every card is rendered.
+        settings.POST_CARD_CACHE_TIMEOUT = 0
+    report = run(args)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
+
+from . import search
 from .models import Category, Location, Post, Comment
 
 
@@ -26,6 +29,7 @@ class PostAdmin(admin.ModelAdmin):
         'location',
         'is_published',
         'pub_date',
+        'comment_count',
     )
     search_fields = ('title', 'text')
     list_filter = (
@@ -34,6 +38,7 @@ class PostAdmin(admin.ModelAdmin):
         'location',
     )
     date_hierarchy = 'pub_date'
+    list_select_related = ('author', 'category', 'location')
     raw_id_fields = ('author',)
     autocomplete_fields = (
         'category',
@@ -65,17 +70,39 @@ class PostAdmin(admin.ModelAdmin):
         (
             'Служебное',
             {
-                'fields': ('created_at',),
+                'fields': (
+                    'created_at',
+                    'comment_count',
+                    'word_count',
+                    'reading_time',
+                ),
                 'classes': ('collapse',),
             },
         ),
     )
-    readonly_fields = ('created_at',)
+    readonly_fields = (
+        'created_at',
+        'comment_count',
+        'word_count',
+        'reading_time',
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # `LIKE '%term%'` over title and text scans the whole table; look
+        # the term up in the full-text index instead.
+        if not search.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        match = search.matching_ids_sql(search_term)
+        if match is None:
+            return queryset, False
+        return queryset.filter(pk__in=RawSQL(*match)), False
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('post', 'author', 'created_at')
+    # `Comment.__str__` and the columns read both relations for every row.
+    list_select_related = ('post', 'author')
 
 
 # Localize admin site titles to Russian
@@ -0,0 +1,215 @@
+"""Read-only JSON API, version 1, over the published posts.
+
+Posts are read with ``values_list()`` of exactly the columns a response
+needs and serialized from the row tuples, without building model
+instances. ``?fields=title,author`` narrows a response to those fields;
+anything left out, the post text included, is never fetched. Lists of
+posts and comments are paginated by the same keyset cursors as the HTML
+feeds: a page carries ``next``, to be passed back as ``?after=``.
+
+The visibility rules are those of the HTML pages.
+"""
+import functools
+
+from django.db.models import Case, F, When
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+
+from . import conditional, registry
+from .diagnostics import with_diagnostics
+from .models import Comment, Post
+from .pagination import CursorPaginator, oldest_first_page
+from .views import get_published_posts_queryset
+
+PAGE_SIZE = 20
+
+
+def _image_url(name):
+    return Post._meta.get_field('image').storage.url(name) if name else None
+
+
+# API field name -> (column or expression, conversion of the value).
+POST_FIELDS = {
+    'id': ('id', None),
+    'title': ('title', None),
+    'text': ('text', None),
+    'excerpt': ('excerpt', None),
+    'word_count': ('word_count', None),
+    'reading_time': ('reading_time', None),
+    'pub_date': ('pub_date', None),
+    'author': ('author__username', None),
+    'category': ('category__slug', None),
+    'location': (
+        Case(When(location__is_published=True, then=F('location__name'))),
+        None,
+    ),
+    'comment_count': ('comment_count', None),
+    'image': ('image', _image_url),
+}
+# Lists leave out the text unless it is asked for.
+LIST_POST_FIELDS = tuple(name for name in POST_FIELDS if name != 'text')
+
+COMMENT_FIELDS = {
+    'id': ('id', None),
+    'author': ('author__username', None),
+    'text': ('text', None),
+    'created_at': ('created_at', None),
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _requested_fields(request, available, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise InvalidFields(
+            f'Unknown fields: {", ".join(unknown) or raw}; '
+            f'available: {", ".join(available)}'
+        )
+    return tuple(dict.fromkeys(names))
+
+
+def _serializer(available, names):
+    """Return the columns to fetch and a function turning a row into a dict.
+
+    Rows start with the two keyset columns, date and id, which the
+    serializer skips.
+    """
+    columns = [available[name][0] for name in names]
+    conversions = [available[name][1] for name in names]
+
+    def serialize(row):
+        return {
+            name: convert(value) if convert else value
+            for name, convert, value in zip(names, conversions, row[2:])
+        }
+
+    return columns, serialize
+
+
+def _row_boundary(row):
+    return row[0], row[1]
+
+
+def api_view(view):
+    """Serve GET and HEAD only; report bad ``?fields=`` and 404s as JSON."""
+    @with_diagnostics
+    @require_safe
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except InvalidFields as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        except Http404:
+            return JsonResponse({'error': 'Not found.'}, status=404)
+
+    return wrapper
+
+
+def _post_page(request, posts):
+    names = _requested_fields(request, POST_FIELDS, LIST_POST_FIELDS)
+    columns, serialize = _serializer(POST_FIELDS, names)
+    paginator = CursorPaginator(
+        posts.values_list('pub_date', 'id', *columns),
+        PAGE_SIZE,
+        boundary=_row_boundary,
+    )
+    page = paginator.get_page(after=request.GET.get('after'))
+    return JsonResponse({
+        'results': [serialize(row) for row in page],
+        'next': page.next_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def post_list(request):
+    return _post_page(request, get_published_posts_queryset())
+
+
+@api_view
+def category_posts(request, category_slug):
+    category = registry.published_category(category_slug)
+    if category is None:
+        raise Http404()
+    return _post_page(request, get_published_posts_queryset().filter(category_id=category.pk))
+
+
+@api_view
+def author_posts(request, username):
+    author_id = conditional.author_id(username)
+    if author_id is None:
+        raise Http404()
+    return _post_page(request, get_published_posts_queryset().filter(author_id=author_id))
+
+
+@api_view
+def post_detail(request, post_id):
+    names = _requested_fields(request, POST_FIELDS, tuple(POST_FIELDS))
+    columns, serialize = _serializer(POST_FIELDS, names)
+    row = (
+        get_published_posts_queryset().filter(pk=post_id)
+        .values_list('pub_date', 'id', *columns).first()
+    )
+    if row is None:
+        raise Http404()
+    return JsonResponse(serialize(row), json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def post_comments(request, post_id):
+    if not get_published_posts_queryset().filter(pk=post_id).exists():
+        raise Http404()
+    names = _requested_fields(request, COMMENT_FIELDS, tuple(COMMENT_FIELDS))
+    columns, serialize = _serializer(COMMENT_FIELDS, names)
+    page = oldest_first_page(
+        Comment.objects.filter(post_id=post_id)
+        .values_list('created_at', 'id', *columns),
+        'created_at',
+        PAGE_SIZE,
+        after=request.GET.get('after'),
+        boundary=_row_boundary,
+    )
+    return JsonResponse({
+        'results': [serialize(row) for row in page],
+        'next': page.next_cursor,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def _category(category):
+    return {
+        'slug': category.slug,
+        'title': category.title,
+        'description': category.description,
+    }
+
+
+@api_view
+def category_list(request):
+    return JsonResponse({
+        'results': [_category(c) for c in registry.published_categories()],
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def category_detail(request, category_slug):
+    category = registry.published_category(category_slug)
+    if category is None:
+        raise Http404()
+    return JsonResponse(_category(category), json_dumps_params={'ensure_ascii': False})
+
+
+@api_view
+def location_list(request):
+    return JsonResponse({
+        'results': [
+            {'id': location.pk, 'name': location.name}
+            for location in registry.published_locations()
+        ],
+    }, json_dumps_params={'ensure_ascii': False})
@@ -7,6 +7,8 @@ class BlogConfig(AppConfig):
     verbose_name = 'Блог'
 
     def ready(self):
+        from . import signals, sqlite  # noqa: F401
+
         # Preserve user instance PK after delete so tests that filter
         # by the deleted instance (author) don't fail with ValueError.
         try:
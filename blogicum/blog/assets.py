@@ -0,0 +1,161 @@
+"""Static files with hashed names, gzip variants and far-future caching.
+
+`CompressedManifestStaticFilesStorage` is Django's manifest storage:
+``collectstatic`` copies every file under a name carrying a hash of its
+content (``bootstrap.min.css`` -> ``bootstrap.min.5f3e0a1b2c4d.css``) and
+``{% static %}`` looks the hashed name up in ``staticfiles.json``. A new
+version of a file gets a new URL, so no hand-made ``?v=`` busting is
+needed. On top of that it writes a ``.gz`` next to every compressible
+file, and memoizes the URLs it hands out, so a ``{% static %}`` costs a
+dict lookup per render.
+
+`StaticAssetsMiddleware` serves ``STATIC_ROOT`` when ``STATIC_SERVE`` is on
+and no web server in front does it: the gzip variant to clients that
+accept it, and hashed names with an immutable ``Cache-Control`` for a
+year; other names may change in place and are cached for a minute only.
+"""
+import asyncio
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml', '.html', '.map',
+)
+# Smaller files gain nothing worth a second request header.
+COMPRESS_MIN_SIZE = 256
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MUTABLE_CACHE_CONTROL = 'public, max-age=60'
+_REFUSED_RE = re.compile(r'q=0(?:\.0{0,3})?')
+
+
+def _compress(path):
+    """Write ``path.gz`` if gzip makes ``path`` noticeably smaller."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return False
+    # A fixed mtime keeps the output the same from one deploy to the next.
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) > len(data) * 0.95:
+        return False
+    with open(f'{path}.gz', 'wb') as file:
+        file.write(compressed)
+    return True
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._urls = {}
+
+    def url(self, name, force=False):
+        key = (name, force, settings.DEBUG)
+        try:
+            return self._urls[key]
+        except KeyError:
+            url = self._urls[key] = super().url(name, force)
+            return url
+
+    def post_process(self, paths, dry_run=False, **options):
+        self._urls = {}
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in (*paths, *self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                _compress(self.path(name))
+
+
+def _accepts_gzip(request):
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() not in ('gzip', '*'):
+            continue
+        if _REFUSED_RE.fullmatch(params.strip().lower().replace(' ', '')):
+            continue
+        return True
+    return False
+
+
+class _Asset:
+    """What the middleware needs to know about one collected file."""
+
+    def __init__(self, path, immutable):
+        self.path = path
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.gzip_path = f'{path}.gz' if os.path.isfile(f'{path}.gz') else None
+        self.last_modified = os.stat(path).st_mtime
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if immutable else MUTABLE_CACHE_CONTROL
+
+
+class StaticAssetsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT)
+        self.hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        # Collected files don't change while the process runs; missing
+        # names aren't remembered, as anyone can make those up.
+        self._assets = {}
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self._serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self._serve(request) or await self.get_response(request)
+
+    def _asset(self, name):
+        asset = self._assets.get(name)
+        if asset is not None:
+            return asset
+        # The gzip variants are only served in place of their originals.
+        if name.endswith('.gz'):
+            return None
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        asset = self._assets[name] = _Asset(path, name in self.hashed_names)
+        return asset
+
+    def _serve(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+        asset = self._asset(request.path[len(self.prefix):])
+        if asset is None:
+            return None
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'), asset.last_modified
+        ):
+            response = HttpResponseNotModified()
+        elif asset.gzip_path and _accepts_gzip(request):
+            response = FileResponse(open(asset.gzip_path, 'rb'), content_type=asset.content_type)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = FileResponse(open(asset.path, 'rb'), content_type=asset.content_type)
+        if asset.gzip_path:
+            response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = asset.cache_control
+        response.headers['Last-Modified'] = http_date(asset.last_modified)
+        return response
@@ -0,0 +1,58 @@
+"""Bounded thread pool for the database work of the async views.
+
+Django's ORM is synchronous, so an async view has to hand its queries to
+a thread. ``sync_to_async`` would run them either on the one thread shared
+by all thread-sensitive calls, which serializes every request, or on the
+event loop's default executor, which is sized by the CPU count rather than
+by what the database can take. `run` uses a pool of ``ASYNC_DB_WORKERS``
+threads instead: at most that many queries, and database connections, are
+in flight at once, and further work waits for a free thread.
+
+Every pool thread has its own connection, which is closed after a call
+when ``CONN_MAX_AGE`` says so, as Django does at the end of a request.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .middleware import active_recorder, recording
+
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_DB_WORKERS,
+                    thread_name_prefix='blog-db',
+                )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    try:
+        recorder = active_recorder.get()
+        if recorder is None:
+            return func(*args, **kwargs)
+        with recording(recorder):
+            return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(func, *args, **kwargs):
+    """Call ``func(*args, **kwargs)`` on the pool and return its result.
+
+    Context variables of the caller, such as the active translation and
+    the request's query recorder, are visible to ``func``.
+    """
+    return await sync_to_async(
+        _call, thread_sensitive=False, executor=_get_executor()
+    )(func, args, kwargs)
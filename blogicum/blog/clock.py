@@ -0,0 +1,90 @@
+"""Bucketed clock for the publication filters.
+
+Filtering on ``pub_date <= timezone.now()`` puts a different microsecond
+in every query, so no two feed queries are alike and nothing keyed on
+them can be cached. `visibility_now` instead rounds the clock down to
+``VISIBILITY_CLOCK_GRANULARITY`` seconds: every request in the same bucket
+runs the same SQL and sees the same posts.
+
+A scheduled post therefore shows up at the first bucket boundary at or
+after its ``pub_date`` (see `visible_at`), up to one bucket late. Keys built
+from the SQL change when the bucket rolls over; results that don't embed
+the clock, such as rendered pages, stay valid until the boundary at which
+the next scheduled post appears (`expires_in`).
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Post
+
+_NEXT_PUBLICATION_KEY = 'blog:next_publication'
+# Cached in place of None, which the cache can't tell from a miss.
+_NO_PUBLICATION = 'none'
+
+
+def granularity():
+    return max(int(settings.VISIBILITY_CLOCK_GRANULARITY), 1)
+
+
+def _floor(moment):
+    step = granularity()
+    seconds = moment.timestamp() // step * step
+    return datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc)
+
+
+def visibility_now():
+    """The current time, rounded down to the start of its bucket."""
+    return _floor(timezone.now())
+
+
+def visible_at(pub_date):
+    """When a post with ``pub_date`` becomes visible on the public pages."""
+    start = _floor(pub_date)
+    if start == pub_date:
+        return start
+    return start + datetime.timedelta(seconds=granularity())
+
+
+def next_scheduled_publication():
+    """``pub_date`` of the next published post still in the future, or None.
+
+    The lookup is cached for one bucket and dropped whenever a post is
+    saved or deleted (see `blog.signals`).
+    """
+    cached = cache.get(_NEXT_PUBLICATION_KEY)
+    now = visibility_now()
+    if cached is not None:
+        if cached == _NO_PUBLICATION:
+            return None
+        if cached > now:
+            return cached
+    pub_date = Post.objects.filter(
+        is_published=True, pub_date__gt=now
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+    cache.set(
+        _NEXT_PUBLICATION_KEY,
+        _NO_PUBLICATION if pub_date is None else pub_date,
+        granularity(),
+    )
+    return pub_date
+
+
+def forget_next_publication():
+    cache.delete(_NEXT_PUBLICATION_KEY)
+
+
+def expires_in(limit):
+    """Seconds, at most ``limit``, until the public posts may change.
+
+    Only the next scheduled publication can change them, at the bucket
+    boundary where it becomes visible.
+    """
+    pub_date = next_scheduled_publication()
+    if pub_date is None:
+        return limit
+    remaining = (visible_at(pub_date) - timezone.now()).total_seconds()
+    return max(min(limit, int(remaining) + 1), 0)
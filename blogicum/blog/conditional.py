@@ -0,0 +1,161 @@
+"""Conditional GET for the public blog pages.
+
+`conditional_page` answers ``If-None-Match`` and ``If-Modified-Since`` with
+304 Not Modified before the view, or the page cache in front of it, does
+any work, the way `django.views.decorators.http.condition` does; HEAD
+requests get the same short-circuit. The async views use its parts,
+`page_validators`, `not_modified` and `add_validators`, directly.
+
+The validators come from data kept up to date anyway, and are cached so
+that a repeated request usually costs no query at all:
+
+* the `blog.page_cache` generations of the page's tags, which the signal
+  handlers move on every post, comment and category change and which are
+  also the times of those changes;
+* the `blog.registry` generation, moved by category and location changes;
+* the newest visible ``pub_date`` in the page's scope, which moves when a
+  scheduled post becomes visible without anything being written. It is
+  one indexed ``MAX()`` query, cached per `blog.clock` bucket.
+
+ETags are weak and include the user, the language and the scheme and host,
+as pages differ per viewer and feeds carry absolute links. Last-Modified is
+only sent to anonymous users, since a timestamp can't tell one viewer's copy
+of a page from another's.
+"""
+import datetime
+import functools
+import hashlib
+import logging
+from calendar import timegm
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Max
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import clock, page_cache, registry
+
+logger = logging.getLogger('blog.conditional')
+
+_NEWEST_KEY = 'blog:newest_pub_date:{}'
+_AUTHOR_KEY = 'blog:author_id:{}'
+# Cached in place of None, which the cache can't tell from a miss.
+_NOTHING = 'none'
+
+
+def author_id(username):
+    """Primary key of the user called ``username``, or None; cached."""
+    key = _AUTHOR_KEY.format(hashlib.md5(username.encode()).hexdigest())
+    pk = cache.get(key)
+    if pk is None:
+        pk = (
+            get_user_model().objects.filter(username=username)
+            .values_list('pk', flat=True).first()
+        )
+        cache.set(key, _NOTHING if pk is None else pk)
+    return None if pk == _NOTHING else pk
+
+
+def forget_author(username):
+    cache.delete(_AUTHOR_KEY.format(hashlib.md5(username.encode()).hexdigest()))
+
+
+def _newest_pub_date(posts, stamps):
+    """Newest visible ``pub_date`` among ``posts``, cached per clock bucket.
+
+    The SQL embeds the bucketed clock, and any write to the posts moves
+    ``stamps``, so together they identify the answer.
+    """
+    posts = posts.filter(pub_date__lte=clock.visibility_now())
+    raw = f'{posts.query}|{stamps}'
+    key = _NEWEST_KEY.format(hashlib.md5(raw.encode()).hexdigest())
+    newest = cache.get(key)
+    if newest is None:
+        newest = posts.aggregate(newest=Max('pub_date'))['newest']
+        cache.set(key, _NOTHING if newest is None else newest, clock.granularity())
+    return None if newest == _NOTHING else newest
+
+
+def _to_datetime(stamp):
+    return datetime.datetime.fromtimestamp(stamp / 1e6, tz=datetime.timezone.utc)
+
+
+def page_validators(request, scope, args, kwargs):
+    """Return ``(etag, last_modified)`` for the page, computed once."""
+    if hasattr(request, '_page_validators'):
+        return request._page_validators
+    validators = (None, None)
+    try:
+        page_scope = scope(request, *args, **kwargs)
+        if page_scope is not None:
+            tags, posts = page_scope
+            validators = _compute(request, tags, posts)
+    except DatabaseError as exc:
+        # Let the view itself deal with a database it can't reach.
+        logger.warning('No validators for %s: %s', request.path, exc)
+    request._page_validators = validators
+    return validators
+
+
+def _compute(request, tags, posts):
+    stamps = sorted(page_cache.generations(*tags).items())
+    categories_stamp = registry.generation()
+    newest = _newest_pub_date(posts, (stamps, categories_stamp))
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    raw = (
+        f'{stamps}|{categories_stamp}|{newest}|{user_id}|{translation.get_language()}'
+        f'|{request.scheme}://{request.get_host()}'
+    )
+    etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+    last_modified = None
+    if not user_id:
+        changed = [_to_datetime(stamp) for _, stamp in stamps]
+        changed.append(_to_datetime(categories_stamp))
+        if newest is not None:
+            changed.append(newest)
+        last_modified = max(changed)
+    return etag, last_modified
+
+
+def not_modified(request, etag, last_modified):
+    """The 304 (or 412) response for ``request``, or None to render the page."""
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and timegm(last_modified.utctimetuple()),
+    )
+
+
+def add_validators(request, response, etag, last_modified):
+    if request.method in ('GET', 'HEAD'):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(
+                timegm(last_modified.utctimetuple())
+            )
+        if etag:
+            response.headers.setdefault('ETag', etag)
+    return response
+
+
+def conditional_page(scope):
+    """Answer conditional GET and HEAD requests for a page before rendering it.
+
+    ``scope(request, *args, **kwargs)`` gets the view's arguments and returns
+    the page's `blog.page_cache` tags and the posts queryset whose newest
+    visible ``pub_date`` the page depends on, or None to skip validation.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            etag, last_modified = page_validators(request, scope, args, kwargs)
+            response = not_modified(request, etag, last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return add_validators(request, response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
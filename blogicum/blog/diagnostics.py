@@ -0,0 +1,117 @@
+"""Opt-in request diagnostics for the blog views.
+
+Diagnostics are switched on for every request with the
+``BLOG_DIAGNOSTICS`` setting, or for a single request by adding
+``?_diagnostics=1`` when ``DEBUG`` is on or the user is staff. When they
+are on, a view decorated with `with_diagnostics` logs the queries it ran,
+the time they took, the response status, a snippet of the rendered page
+with its ``/posts/`` links, and anything the view recorded with `note`.
+
+When diagnostics are off the decorator calls the view directly and `note`
+returns before evaluating its value, so the hot path pays one attribute
+lookup per call and nothing else.
+"""
+import contextlib
+import functools
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .routers import aliases
+
+logger = logging.getLogger('blog.diagnostics')
+
+REQUEST_FLAG = '_diagnostics'
+SNIPPET_LENGTH = 2000
+
+_HREF_RE = re.compile(r'href="([^"]+)"')
+
+
+def diagnostics_enabled(request):
+    if getattr(settings, 'BLOG_DIAGNOSTICS', False):
+        return True
+    if REQUEST_FLAG not in request.GET:
+        return False
+    user = getattr(request, 'user', None)
+    return settings.DEBUG or bool(getattr(user, 'is_staff', False))
+
+
+def note(request, name, value):
+    """Record ``value`` for the diagnostics report of ``request``.
+
+    ``value`` may be a callable, which is only called when diagnostics are
+    enabled; use one for anything that costs a query or a loop to compute.
+    """
+    notes = getattr(request, '_diagnostics_notes', None)
+    if notes is None:
+        return
+    if callable(value):
+        try:
+            value = value()
+        except Exception as exc:
+            value = f'<{type(exc).__name__}: {exc}>'
+    notes.append((name, value))
+
+
+def _report(view_name, request, response, queries, elapsed):
+    logger.debug(
+        '%s %s -> %s in %.1f ms, %d queries (%.1f ms in DB)',
+        view_name,
+        request.get_full_path(),
+        response.status_code,
+        elapsed * 1000,
+        len(queries),
+        sum(float(q['time']) for q in queries) * 1000,
+    )
+    for query in queries:
+        logger.debug(
+            '%s query on %s (%s s): %s',
+            view_name, query['alias'], query['time'], query['sql'],
+        )
+    for name, value in request._diagnostics_notes:
+        logger.debug('%s %s=%r', view_name, name, value)
+    if getattr(response, 'streaming', False):
+        return
+    content = response.content.decode(response.charset, errors='replace')
+    logger.debug(
+        '%s rendered_contains_form=%s posts_hrefs=%s',
+        view_name,
+        '<form' in content,
+        [h for h in _HREF_RE.findall(content) if h.startswith('/posts/')],
+    )
+    logger.debug(
+        '%s rendered_snippet=%s',
+        view_name,
+        content[:SNIPPET_LENGTH].replace('\n', '\\n'),
+    )
+
+
+def with_diagnostics(view):
+    """Run ``view`` under diagnostics when they are enabled for the request."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not diagnostics_enabled(request):
+            return view(request, *args, **kwargs)
+        request._diagnostics_notes = []
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            # Reads may go to a replica (`blog.routers`).
+            captured = {
+                alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in aliases()
+            }
+            response = view(request, *args, **kwargs)
+        elapsed = time.perf_counter() - started
+        queries = [
+            dict(query, alias=alias)
+            for alias, context in captured.items()
+            for query in context.captured_queries
+        ]
+        _report(view.__name__, request, response, queries, elapsed)
+        return response
+
+    return wrapper
@@ -0,0 +1,32 @@
+"""Stored excerpt, word count and reading time of a post.
+
+Feed cards and feeds show the stored excerpt instead of truncating the
+text at render time, so the list queries leave ``Post.text`` out. The
+values are filled on every save by `blog.signals`; posts written around
+the signals (``bulk_create``, raw SQL) get them from `fill_text_stats` or
+``manage.py rebuild_excerpts``.
+"""
+import math
+
+from django.utils.text import Truncator
+
+# Words shown on a feed card; the same as the old `truncatewords:10`.
+EXCERPT_WORDS = 10
+# Upper bound in characters, for texts with very long words.
+EXCERPT_LENGTH = 300
+WORDS_PER_MINUTE = 200
+
+
+def text_stats(text):
+    """Return the excerpt, word count and reading time in minutes of ``text``."""
+    words = len(text.split())
+    excerpt = Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(EXCERPT_LENGTH)
+    return excerpt, words, math.ceil(words / WORDS_PER_MINUTE)
+
+
+def fill_text_stats(post):
+    """Set the stored excerpt fields of ``post`` from its text."""
+    post.excerpt, post.word_count, post.reading_time = text_stats(post.text)
+    return post
@@ -0,0 +1,123 @@
+"""RSS and Atom feeds of the published posts, written as a stream.
+
+`django.utils.feedgenerator` builds a feed from a list of every item and
+writes it out in one go. `feed_response` uses its feed classes, but feeds
+them the posts a batch at a time straight from a database iterator, and
+sends out each batch's XML as soon as it is written.
+"""
+import io
+import itertools
+
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .clock import visibility_now
+
+FEED_ITEMS = 50
+# Items written per chunk of the response.
+CHUNK_ITEMS = 10
+
+
+class _StreamingFeed:
+    def __init__(self, *args, updated, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = updated
+
+    def latest_post_date(self):
+        # The items aren't known up front; the caller passes the newest date.
+        return self.updated
+
+    def stream(self, item_batches):
+        """Yield the feed's XML, one chunk per batch of item dicts."""
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+
+        def drain():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        handler.startDocument()
+        self.write_head(handler)
+        yield drain()
+        for batch in item_batches:
+            self.items = batch
+            self.write_items(handler)
+            yield drain()
+        self.write_tail(handler)
+        yield drain()
+
+
+class RssFeed(_StreamingFeed, feedgenerator.Rss201rev2Feed):
+    def write_head(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+class AtomFeed(_StreamingFeed, feedgenerator.Atom1Feed):
+    def write_head(self, handler):
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        handler.endElement('feed')
+
+
+FEED_CLASSES = {'rss': RssFeed, 'atom': AtomFeed}
+
+
+def _item(request, post):
+    link = request.build_absolute_uri(reverse('blog:post_detail', args=(post.pk,)))
+    return {
+        'title': post.title,
+        'link': link,
+        'description': post.excerpt,
+        'author_name': post.author.username,
+        'pubdate': post.pub_date,
+        'unique_id': link,
+        'categories': [post.category.title] if post.category else (),
+    }
+
+
+def _batches(request, feed, posts):
+    batch = []
+    for post in posts:
+        # `add_item` normalizes the values the way the feed classes expect.
+        feed.add_item(**_item(request, post))
+        batch.append(feed.items.pop())
+        if len(batch) == CHUNK_ITEMS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def feed_response(request, kind, posts, title, link, description):
+    """Stream the ``kind`` feed of the newest `FEED_ITEMS` of ``posts``.
+
+    ``posts`` must be ordered newest first; the items show the stored
+    excerpt, so the text may be deferred.
+    """
+    rows = posts[:FEED_ITEMS].iterator(chunk_size=FEED_ITEMS)
+    first = next(rows, None)
+    feed = FEED_CLASSES[kind](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        language='ru',
+        feed_url=request.build_absolute_uri(),
+        updated=first.pub_date if first is not None else visibility_now(),
+    )
+    posts = [] if first is None else itertools.chain([first], rows)
+    return StreamingHttpResponse(
+        feed.stream(_batches(request, feed, posts)),
+        content_type=feed.content_type,
+    )
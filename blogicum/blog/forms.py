@@ -1,8 +1,16 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from . import registry
 from .models import Post, Comment, Category, Location
 
 
+def _choices(field, objects):
+    choices = [(obj.pk, field.label_from_instance(obj)) for obj in objects]
+    if field.empty_label is not None:
+        choices.insert(0, ('', field.empty_label))
+    return choices
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
@@ -10,13 +18,21 @@ class PostForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Only allow selecting published categories and published locations
+        # Only allow selecting published categories and published locations.
+        # The options come from the in-memory registry; the querysets are
+        # only hit to validate a submitted choice.
         try:
             self.fields['category'].queryset = Category.objects.filter(is_published=True)
+            self.fields['category'].choices = _choices(
+                self.fields['category'], registry.published_categories()
+            )
         except Exception:
             pass
         try:
             self.fields['location'].queryset = Location.objects.filter(is_published=True)
+            self.fields['location'].choices = _choices(
+                self.fields['location'], registry.published_locations()
+            )
         except Exception:
             pass
 
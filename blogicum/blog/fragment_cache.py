@@ -0,0 +1,80 @@
+"""Fragment cache for the post cards rendered by every feed page.
+
+Cache keys are built from the data a card depends on: the post's
+``updated_at`` stamp and comment counter, the publish state and stamps of
+its category and location, the author name and the active language and
+time zone. Any change to those produces a new key, so stale cards are never
+served and nothing has to be deleted explicitly; the orphaned entries just
+age out of the cache.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import get_template
+from django.utils import timezone, translation
+
+POST_CARD_TEMPLATE = 'includes/post_card.html'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def fragment_cache_stats():
+    """Return a snapshot of this process's post card cache counters."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_fragment_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _stamp(obj):
+    if obj is None:
+        return '-'
+    updated_at = getattr(obj, 'updated_at', None)
+    return f'{obj.pk}:{int(obj.is_published)}:{updated_at and updated_at.timestamp()}'
+
+
+def post_card_cache_key(post):
+    author = getattr(post, 'author', None)
+    parts = (
+        post.pk,
+        post.updated_at and post.updated_at.timestamp(),
+        post.comment_count,
+        _stamp(post.category),
+        _stamp(post.location),
+        getattr(author, 'username', ''),
+        getattr(post, 'render_image_url', None),
+        translation.get_language(),
+        timezone.get_current_timezone_name(),
+    )
+    digest = hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+    return f'blog:post_card:{digest}'
+
+
+def render_post_card(post):
+    """Render `includes/post_card.html` for a post, using the cache."""
+    template = get_template(POST_CARD_TEMPLATE)
+    # Template-only fallbacks pass plain dicts; those are never cached.
+    if not hasattr(post, 'updated_at'):
+        return template.render({'post': post})
+    key = post_card_cache_key(post)
+    cache = caches['local']
+    html = cache.get(key)
+    if html is not None:
+        _count('hits')
+        return html
+    _count('misses')
+    html = template.render({'post': post})
+    cache.set(key, html, settings.POST_CARD_CACHE_TIMEOUT)
+    return html
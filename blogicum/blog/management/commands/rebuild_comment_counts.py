@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculate the stored Post.comment_count counters in batches '
+        'and repair the ones that drifted from the comment table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of posts to recalculate per transaction.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the counters that would be repaired.',
+        )
+
+    def _check_batch(self, last_id, batch_size):
+        # Walk the table by primary key ranges so every batch is an index
+        # seek regardless of how far into the table we are.
+        batch = list(
+            Post.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'comment_count')[:batch_size]
+        )
+        actual = dict(
+            Comment.objects.filter(post_id__in=[pk for pk, _ in batch])
+            .order_by()
+            .values('post_id')
+            .annotate(n=Count('pk'))
+            .values_list('post_id', 'n')
+        )
+        stale = [
+            Post(pk=pk, comment_count=actual.get(pk, 0))
+            for pk, stored in batch
+            if stored != actual.get(pk, 0)
+        ]
+        return stale, batch
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        if batch_size < 1:
+            batch_size = 1
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            # Count and repair inside one transaction so comments written
+            # concurrently can't slip between the read and the update.
+            with transaction.atomic():
+                stale, batch = self._check_batch(last_id, batch_size)
+                if stale and not dry_run:
+                    Post.objects.bulk_update(stale, ['comment_count'])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            checked += len(batch)
+            repaired += len(stale)
+            self.stdout.write(
+                f'Checked {checked} posts, stale counters: {repaired}'
+            )
+        action = 'would be repaired' if dry_run else 'repaired'
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {checked} posts checked, {repaired} counters {action}.'
+        ))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog import page_cache
+from blog.excerpts import text_stats
+from blog.models import Post
+
+STATS_FIELDS = ('excerpt', 'word_count', 'reading_time')
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored excerpt, word count and reading time of '
+        'posts in batches, filling in posts written without signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of posts to recompute per transaction.',
+        )
+
+    def _rebuild_batch(self, last_id, batch_size):
+        # Walk the table by primary key ranges, like rebuild_comment_counts.
+        batch = list(
+            Post.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'author_id', 'category_id', 'text', *STATS_FIELDS)[:batch_size]
+        )
+        # Bumping `updated_at` retires the cached cards; the cached pages
+        # are invalidated by `handle`, as `bulk_update` sends no signals.
+        now = timezone.now()
+        stale = []
+        for pk, author_id, category_id, text, *stored in batch:
+            stats = text_stats(text)
+            if tuple(stored) != stats:
+                stale.append(Post(
+                    pk=pk, author_id=author_id, category_id=category_id,
+                    updated_at=now, **dict(zip(STATS_FIELDS, stats)),
+                ))
+        if stale:
+            Post.objects.bulk_update(stale, [*STATS_FIELDS, 'updated_at'])
+        return batch, stale
+
+    def handle(self, *args, batch_size, **options):
+        if batch_size < 1:
+            batch_size = 1
+        checked = updated = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch, stale = self._rebuild_batch(last_id, batch_size)
+            if not batch:
+                break
+            # Once committed, so no page is cached again from the old rows.
+            page_cache.invalidate(*(
+                tag for post in stale for tag in page_cache.post_tags(post)
+            ))
+            last_id = batch[-1][0]
+            checked += len(batch)
+            updated += len(stale)
+            self.stdout.write(f'Checked {checked} posts, updated: {updated}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {checked} posts checked, {updated} excerpts updated.'
+        ))
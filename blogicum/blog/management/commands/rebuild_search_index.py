@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the full-text search index of posts in batches, picking up '
+        'posts written without signals and dropping deleted ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of posts to reindex per transaction.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search needs the SQLite backend.')
+        if batch_size < 1:
+            batch_size = 1
+        indexed = 0
+        last_id = 0
+        while True:
+            # Walk the table by primary key ranges; every range also covers
+            # the gaps left by deleted posts, so their index rows go too.
+            batch = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                search.index_posts(last_id + 1, batch[-1])
+            last_id = batch[-1]
+            indexed += len(batch)
+            self.stdout.write(f'Indexed {indexed} posts')
+        search.drop_posts_after(last_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {indexed} posts indexed.'
+        ))
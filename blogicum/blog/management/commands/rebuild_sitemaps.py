@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from blog import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the sitemap shards whose posts, profiles or categories '
+        'changed since the last rebuild.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild every shard, changed or not.',
+        )
+
+    def handle(self, *args, force, **options):
+        manifest, rebuilt = sitemaps.refresh(force=force)
+        for name in rebuilt:
+            self.stdout.write(f'Rebuilt {name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {len(rebuilt)} of {len(manifest["shards"])} shards rebuilt.'
+        ))
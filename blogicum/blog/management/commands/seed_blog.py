@@ -0,0 +1,255 @@
+import bisect
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog import search
+from blog.excerpts import fill_text_stats
+from blog.models import Category, Comment, Location, Post
+
+WORDS = (
+    'утро вечер город море дорога поезд книга письмо друг дом сад река '
+    'небо зима лето осень весна дождь снег солнце ветер лес поле мост '
+    'улица площадь музей театр концерт ужин обед прогулка встреча разговор '
+    'история праздник работа отпуск путешествие вокзал гора озеро остров '
+    'кофе чай рынок библиотека парк окно лампа кошка собака птица'
+).split()
+
+CATEGORY_TITLES = (
+    'Путешествия', 'Еда', 'Город', 'Природа', 'Работа', 'Книги', 'Кино',
+    'Музыка', 'Спорт', 'День как день', 'Наука', 'Искусство',
+)
+
+# Exponents of the power laws: how concentrated posts are on the most
+# active authors, and comments on the most discussed posts.
+AUTHOR_SKEW = 1.2
+COMMENT_SKEW = 1.1
+
+
+def _power_law_weights(n, skew, rng):
+    """Cumulative Zipf weights over ``n`` items in a shuffled order."""
+    ranks = list(range(1, n + 1))
+    rng.shuffle(ranks)
+    return list(itertools.accumulate(1 / rank ** skew for rank in ranks))
+
+
+def _pick(cum_weights, rng):
+    return bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+def _batches(objects, size):
+    iterator = iter(objects)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _sentence(rng, n_words):
+    return ' '.join(rng.choices(WORDS, k=n_words)).capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, categories, locations, '
+        'posts and comments using batched bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument(
+            '--comments',
+            type=int,
+            default=30000,
+            help='Total number of comments, spread over posts by a power law.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the generator; the same seed gives the same data.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows to insert per transaction.',
+        )
+        parser.add_argument(
+            '--unpublished-share',
+            type=float,
+            default=0.1,
+            help='Share of unpublished categories, locations and posts.',
+        )
+        parser.add_argument(
+            '--scheduled-share',
+            type=float,
+            default=0.02,
+            help='Share of posts scheduled for publication in the future.',
+        )
+
+    def _insert(self, model, objects):
+        """Bulk insert ``objects`` in batches; return the number of rows."""
+        started = time.perf_counter()
+        rows = 0
+        for batch in _batches(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            rows += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {rows} rows in '
+            f'{elapsed:.1f} s ({rows / max(elapsed, 1e-9):.0f} rows/s)'
+        )
+        return rows
+
+    @staticmethod
+    def _first_pk(model):
+        # SQLite doesn't return primary keys from bulk inserts, so rows get
+        # explicit keys that later rows can refer to.
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def _users(self, rng, count):
+        User = get_user_model()
+        prefix = f'seed{self.seed}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Users with the "{prefix}" prefix already exist; '
+                'pick another --seed.'
+            )
+        first = self._first_pk(User)
+        password = make_password(None)
+        self._insert(User, (
+            User(
+                pk=first + i,
+                username=f'{prefix}{i}',
+                first_name=rng.choice(WORDS).capitalize(),
+                password=password,
+            )
+            for i in range(count)
+        ))
+        return list(range(first, first + count))
+
+    def _categories(self, rng, count):
+        first = self._first_pk(Category)
+        self._insert(Category, (
+            Category(
+                pk=first + i,
+                title=f'{CATEGORY_TITLES[i % len(CATEGORY_TITLES)]} {i}',
+                description=_sentence(rng, 12),
+                slug=f'seed{self.seed}-{i}',
+                is_published=rng.random() >= self.unpublished_share,
+            )
+            for i in range(count)
+        ))
+        return list(range(first, first + count))
+
+    def _locations(self, rng, count):
+        first = self._first_pk(Location)
+        self._insert(Location, (
+            Location(
+                pk=first + i,
+                name=_sentence(rng, 2),
+                is_published=rng.random() >= self.unpublished_share,
+            )
+            for i in range(count)
+        ))
+        return list(range(first, first + count))
+
+    def _posts(self, rng, count, author_ids, category_ids, location_ids,
+               comment_counts):
+        author_weights = _power_law_weights(len(author_ids), AUTHOR_SKEW, rng)
+        now = timezone.now()
+        first = self._first_pk(Post)
+
+        def generate():
+            for i in range(count):
+                if rng.random() < self.scheduled_share:
+                    pub_date = now + timedelta(minutes=rng.randint(1, 60 * 24 * 30))
+                else:
+                    # Denser towards the present, like a living blog.
+                    pub_date = now - timedelta(
+                        minutes=int(rng.expovariate(1 / (60 * 24 * 90)))
+                    )
+                # `bulk_create` skips the signals that fill the excerpt.
+                yield fill_text_stats(Post(
+                    pk=first + i,
+                    title=_sentence(rng, rng.randint(2, 6)),
+                    text='\n\n'.join(
+                        _sentence(rng, rng.randint(8, 40))
+                        for _ in range(rng.randint(1, 5))
+                    ),
+                    pub_date=pub_date,
+                    is_published=rng.random() >= self.unpublished_share,
+                    author_id=author_ids[_pick(author_weights, rng)],
+                    category_id=rng.choice(category_ids),
+                    location_id=(
+                        rng.choice(location_ids)
+                        if location_ids and rng.random() < 0.7 else None
+                    ),
+                    comment_count=comment_counts[i],
+                ))
+
+        self._insert(Post, generate())
+        return first
+
+    def _comments(self, rng, first_post, comment_posts, author_ids):
+        self._insert(Comment, (
+            Comment(
+                post_id=first_post + index,
+                author_id=rng.choice(author_ids),
+                text=_sentence(rng, rng.randint(3, 25)),
+            )
+            for index in comment_posts
+        ))
+
+    def handle(self, *args, users, categories, locations, posts, comments,
+               seed, batch_size, unpublished_share, scheduled_share,
+               **options):
+        if users < 1 or categories < 1:
+            raise CommandError('At least one user and one category are needed.')
+        self.seed = seed
+        self.batch_size = max(batch_size, 1)
+        self.unpublished_share = unpublished_share
+        self.scheduled_share = scheduled_share
+        rng = random.Random(seed)
+        started = time.perf_counter()
+
+        author_ids = self._users(rng, users)
+        category_ids = self._categories(rng, categories)
+        location_ids = self._locations(rng, locations)
+        # Decide up front which post every comment goes to: a few hot posts
+        # collect most of the discussion, and the posts' counters match.
+        comment_posts = []
+        comment_counts = [0] * posts
+        if posts:
+            post_weights = _power_law_weights(posts, COMMENT_SKEW, rng)
+            comment_posts = sorted(
+                _pick(post_weights, rng) for _ in range(comments)
+            )
+            for index in comment_posts:
+                comment_counts[index] += 1
+        first_post = self._posts(
+            rng, posts, author_ids, category_ids, location_ids, comment_counts
+        )
+        self._comments(rng, first_post, comment_posts, author_ids)
+        if posts and search.is_available():
+            # Bulk inserts skip the signal handlers that index posts.
+            with transaction.atomic():
+                search.index_posts(first_post, first_post + posts - 1)
+
+        rows = users + categories + locations + posts + len(comment_posts)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {rows} rows in {elapsed:.1f} s '
+            f'({rows / max(elapsed, 1e-9):.0f} rows/s).'
+        ))
@@ -0,0 +1,182 @@
+"""Per-request query budgets with N+1 detection.
+
+`QueryBudgetMiddleware` records every query a request runs, on the
+primary and on the read replicas (`blog.routers`), through
+``execute_wrapper`` and checks the totals against the
+``QUERY_BUDGETS`` setting, a mapping of URL names (``'blog:index'``) to
+the maximum number of queries the view may run. Queries are also grouped by
+fingerprint, the SQL with literal values and ``IN`` lists collapsed: a
+fingerprint repeated ``QUERY_BUDGET_REPEAT_THRESHOLD`` times or more is the
+signature of an N+1 loop.
+
+Violations are logged as warnings, or raised as `QueryBudgetExceeded` when
+``QUERY_BUDGET_RAISE`` is on. Running totals per view are kept in
+`view_query_stats`. The body of a streaming response runs its queries
+while it is sent, so those responses are checked once it is exhausted.
+
+Under ASGI the async views run their queries on the threads of
+`blog.async_db`, where the request's recorder, published in
+`active_recorder`, is installed around every call. Sync views are called
+from `QueryBudgetMiddleware.process_view` with the recorder installed on
+the thread they run on. The middleware must therefore come last in
+``MIDDLEWARE``, so that no other ``process_view`` is skipped.
+"""
+import asyncio
+import contextlib
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+from .routers import aliases
+
+logger = logging.getLogger('blog.query_budget')
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_stats_lock = threading.Lock()
+view_query_stats = {}
+
+# The `QueryRecorder` of the async request being served, if any.
+active_recorder = contextvars.ContextVar('active_recorder', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """Normalize ``sql`` so that queries differing only in values match."""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _LITERAL_RE.sub('?', sql)
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable collecting SQL fingerprints and timings."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        # An async request's queries may run on several threads at once.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+                self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, threshold=None):
+        """Return ``{fingerprint: count}`` for suspected N+1 queries."""
+        if threshold is None:
+            threshold = settings.QUERY_BUDGET_REPEAT_THRESHOLD
+        return {
+            sql: n for sql, n in self.fingerprints.items() if n >= threshold
+        }
+
+    def problems(self, budget=None):
+        """Describe every way the recorded queries break the budget."""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} queries, budget is {budget}')
+        for sql, n in self.repeated().items():
+            problems.append(f'possible N+1: {n} x {sql}')
+        return problems
+
+
+@contextlib.contextmanager
+def recording(recorder):
+    """Install ``recorder`` on this thread's connection to every alias."""
+    with contextlib.ExitStack() as stack:
+        for alias in aliases():
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+def _record_stats(view_name, recorder):
+    with _stats_lock:
+        stats = view_query_stats.setdefault(
+            view_name, {'requests': 0, 'queries': 0, 'db_time': 0.0}
+        )
+        stats['requests'] += 1
+        stats['queries'] += recorder.count
+        stats['db_time'] += recorder.duration
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, like
+            # `django.utils.deprecation.MiddlewareMixin` does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recording(recorder):
+            response = self.get_response(request)
+        return self._finish(request, recorder, response)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = active_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            active_recorder.reset(token)
+        return self._finish(request, recorder, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = active_recorder.get()
+        if recorder is None or asyncio.iscoroutinefunction(view_func):
+            return None
+        # A sync view under ASGI: the handler would call it on a thread
+        # `__acall__` has no hold on.
+        with recording(recorder):
+            response = view_func(request, *view_args, **view_kwargs)
+            if callable(getattr(response, 'render', None)):
+                response = response.render()
+        return response
+
+    def _finish(self, request, recorder, response):
+        if response.streaming:
+            response.streaming_content = self._recorded_stream(
+                request, recorder, response.streaming_content
+            )
+        else:
+            self._check(request, recorder)
+        return response
+
+    def _recorded_stream(self, request, recorder, content):
+        # Iterated by the server after the middleware has returned.
+        with recording(recorder):
+            yield from content
+        self._check(request, recorder)
+
+    def _check(self, request, recorder):
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        _record_stats(view_name, recorder)
+        problems = recorder.problems(settings.QUERY_BUDGETS.get(view_name))
+        if problems:
+            message = f'{view_name} ({request.path}): ' + '; '.join(problems)
+            if settings.QUERY_BUDGET_RAISE:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:55
+
+import math
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+BATCH_SIZE = 1000
+
+
+def text_stats(text):
+    # A copy of `blog.excerpts.text_stats` as of this migration.
+    words = len(text.split())
+    excerpt = Truncator(Truncator(text).words(10, truncate=' …')).chars(300)
+    return excerpt, words, math.ceil(words / 200)
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    last_id = 0
+    while True:
+        batch = list(
+            Post.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', 'text')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for post in batch:
+            post.excerpt, post.word_count, post.reading_time = text_stats(post.text)
+        Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Анонс'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Время чтения, мин'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Слов'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
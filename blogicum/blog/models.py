@@ -1,6 +1,24 @@
+import contextlib
+import contextvars
+
 from django.db import models
 from django.conf import settings
 
+from .excerpts import EXCERPT_LENGTH
+
+# Ids of the posts a delete in progress removes. The comments deleted with
+# them skip the upkeep of their post (see `blog.signals`): it goes too.
+deleting_posts = contextvars.ContextVar('deleting_posts', default=frozenset())
+
+
+@contextlib.contextmanager
+def _deleting(post_ids):
+    token = deleting_posts.set(deleting_posts.get() | frozenset(post_ids))
+    try:
+        yield
+    finally:
+        deleting_posts.reset(token)
+
 
 class BaseModel(models.Model):
     """Abstract model holding common publication fields."""
@@ -11,6 +29,8 @@ class BaseModel(models.Model):
         help_text='Снимите галочку, чтобы скрыть публикацию.',
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')
+    # Version stamp for cached renderings; bumped by every `save()`.
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
 
     class Meta:
         abstract = True
@@ -56,6 +76,12 @@ class Location(BaseModel):
         self.save(update_fields=("is_published",))
 
 
+class PostQuerySet(models.QuerySet):
+    def delete(self):
+        with _deleting(self.order_by().values_list('pk', flat=True)):
+            return super().delete()
+
+
 class Post(BaseModel):
     title = models.CharField(max_length=256, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
@@ -90,15 +116,77 @@ class Post(BaseModel):
         related_name='posts',
     )
     image = models.ImageField(upload_to='posts/', null=True, blank=True, verbose_name='Изображение')
+    # Filled by `blog.thumbnails`: the image's `width` and `height`, and the
+    # `renditions` widths whose thumbnails have been generated so far.
+    image_meta = models.JSONField(default=dict, blank=True, editable=False)
+    # Maintained by the signal handlers in `blog.signals`; rebuild with
+    # `manage.py rebuild_comment_counts` if it ever drifts.
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментариев',
+    )
+    # Derived from `text` on save by `blog.signals` (see `blog.excerpts`),
+    # so the feeds never load the text itself; rebuild with
+    # `manage.py rebuild_excerpts`.
+    excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False,
+        verbose_name='Анонс',
+    )
+    word_count = models.IntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Слов',
+    )
+    reading_time = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Время чтения, мин',
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        # Access paths of the public feeds: the index page, a category page
+        # and an author profile, all ordered by publication date. SQLite
+        # compares booleans as bare columns (``WHERE "is_published"``), so
+        # the publication flag goes into a partial index condition rather
+        # than into the indexed columns.
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_published=True),
+                name='post_published_pub_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=models.Q(is_published=True),
+                name='post_category_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx',
+            ),
+        )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, update_fields=None, **kwargs):
+        # `blog.signals` derives these from the text before every save.
+        if update_fields is not None and 'text' in update_fields:
+            update_fields = {*update_fields, 'excerpt', 'word_count', 'reading_time'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with _deleting([self.pk]):
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, related_name='comments', verbose_name='Публикация')
@@ -110,6 +198,12 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx',
+            ),
+        )
 
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
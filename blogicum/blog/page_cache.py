@@ -0,0 +1,208 @@
+"""Full-page cache for anonymous readers of the public blog pages.
+
+Cached pages are stored under a key made of the view, the path, the
+pagination parameters and the language, together with the *tags* the view
+declared while rendering (``index``, ``post:<id>``, ``category:<id>``,
+``location:<id>``, ``profile:<author id>``). Every tag has a generation
+counter in the cache; `invalidate` bumps it, and a cached page is only
+served while all of its tags still have the generations it was stored
+with. The signal handlers in `blog.signals` bump exactly the tags a
+changed post, comment, category or location can affect.
+
+The counters live in the shared default cache, so a change reaches every
+worker process; the pages themselves are kept in each process's ``local``
+cache. Pages without tags, such as deep index pages, simply expire. Pages
+are kept for at most ``PAGE_CACHE_TIMEOUT`` seconds, and never past the
+moment the next scheduled post becomes visible (see `blog.clock`).
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils import translation
+
+from . import clock
+from .diagnostics import diagnostics_enabled
+
+PAGINATION_PARAMS = ('page', 'after', 'before', 'format')
+
+_GENERATION_KEY = 'blog:page_tag:{}'
+
+
+def _new_generation():
+    # Time based, in microseconds, so a counter evicted from the cache never
+    # restarts at a value an old page may have been stored with.
+    return time.time_ns() // 1000
+
+
+def invalidate(*tags):
+    """Expire every cached page carrying any of ``tags``."""
+    keys = [_GENERATION_KEY.format(tag) for tag in set(tags)]
+    stamp = _new_generation()
+    current = cache.get_many(keys)
+    # A fresh timestamp rather than an increment, so that a generation is
+    # also the time its tag last changed (see `blog.conditional`).
+    cache.set_many(
+        {key: max(stamp, current.get(key, 0) + 1) for key in keys}, None
+    )
+
+
+def _generations(tags):
+    keys = {_GENERATION_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    return {keys[key]: value for key, value in found.items()}
+
+
+def _ensure_generations(tags, stamp=None):
+    stamp = stamp or _new_generation()
+    for tag in tags:
+        cache.add(_GENERATION_KEY.format(tag), stamp, None)
+    return _generations(tags)
+
+
+def generations(*tags):
+    """Return ``{tag: generation}``, a microsecond timestamp of its last change.
+
+    A tag whose counter is missing from the cache counts as changed now.
+    """
+    return _ensure_generations(tags)
+
+
+def tag(request, *tags):
+    """Declare that the page being rendered depends on ``tags``.
+
+    A no-op unless the request is being considered for the page cache.
+    """
+    page_tags = getattr(request, '_page_cache_tags', None)
+    if page_tags is not None:
+        page_tags.update(tags)
+
+
+def post_tags(post):
+    """Tags of the pages that display ``post``."""
+    tags = ['index', f'post:{post.pk}', f'profile:{post.author_id}']
+    if post.category_id is not None:
+        tags.append(f'category:{post.category_id}')
+    return tags
+
+
+def feed_tags(posts):
+    """Tags for the categories and locations shown on a page of posts."""
+    tags = set()
+    for post in posts:
+        if getattr(post, 'category_id', None) is not None:
+            tags.add(f'category:{post.category_id}')
+        if getattr(post, 'location_id', None) is not None:
+            tags.add(f'location:{post.location_id}')
+    return tags
+
+
+def _cache_key(request):
+    params = '&'.join(
+        f'{name}={request.GET.get(name, "")}' for name in PAGINATION_PARAMS
+    )
+    # Feeds carry absolute links, so pages are kept per scheme and host.
+    raw = (
+        f'{request.scheme}://{request.get_host()}{request.path}?{params}'
+        f'|{translation.get_language()}'
+    )
+    view_name = request.resolver_match.view_name if request.resolver_match else ''
+    return f'blog:page:{view_name}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def is_cacheable_request(request):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not diagnostics_enabled(request)
+    )
+
+
+def _is_cacheable_response(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def page_timeout():
+    """Seconds a page may stay cached, capped by the next scheduled post."""
+    return clock.expires_in(settings.PAGE_CACHE_TIMEOUT)
+
+
+def cached_page(request):
+    """Return the cached page for ``request`` while its tags are unchanged."""
+    entry = caches['local'].get(_cache_key(request))
+    if entry is not None:
+        stored_generations, response = entry
+        if _generations(stored_generations) == stored_generations:
+            return response
+    return None
+
+
+def collect_tags(request):
+    """Start collecting the tags of the page rendered for ``request``."""
+    request._page_cache_tags = set()
+    # Taken before the view reads anything, so a change landing while it
+    # renders is newer than the page.
+    request._page_cache_started = _new_generation()
+
+
+def do_not_store(request):
+    """Keep the page being rendered for ``request`` out of the page cache."""
+    request._page_cache_tags = None
+
+
+def store_page(request, response):
+    """Cache ``response`` under the tags collected while rendering it.
+
+    A page is not stored when one of its tags changed after the view
+    started, as it may show the data from before the change. A streaming
+    response is cached once it has been sent out completely, as a plain
+    response, with the generations its tags had when the view returned it.
+    """
+    if request._page_cache_tags is None or not _is_cacheable_response(response):
+        return
+    timeout = page_timeout()
+    if timeout <= 0:
+        return
+    started = request._page_cache_started
+    # Missing counters are stamped with the start: no change is known after it.
+    generations = _ensure_generations(request._page_cache_tags, started)
+    if any(generation > started for generation in generations.values()):
+        return
+    key = _cache_key(request)
+    if getattr(response, 'streaming', False):
+        response.streaming_content = _store_when_sent(
+            response.streaming_content, dict(response.items()),
+            key, generations, timeout,
+        )
+    else:
+        caches['local'].set(key, (generations, response), timeout)
+
+
+def _store_when_sent(content, headers, key, generations, timeout):
+    chunks = []
+    for chunk in content:
+        chunks.append(chunk)
+        yield chunk
+    complete = HttpResponse(b''.join(chunks))
+    for header, value in headers.items():
+        complete[header] = value
+    caches['local'].set(key, (generations, complete), timeout)
+
+
+def cache_anonymous_page(view):
+    """Serve ``view`` from the page cache for anonymous GET requests."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+        response = cached_page(request)
+        if response is None:
+            collect_tags(request)
+            response = view(request, *args, **kwargs)
+            store_page(request, response)
+        return response
+
+    return wrapper
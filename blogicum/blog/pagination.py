@@ -0,0 +1,186 @@
+"""Keyset (cursor) pagination for the post feeds.
+
+`django.core.paginator.Paginator` needs a ``COUNT(*)`` and an
+``OFFSET page * per_page`` for every page, so deep pages get slower the
+further a client walks. `CursorPaginator` seeks straight to the next page
+through the ``(pub_date, id)`` feed indexes instead: a page only ever reads
+``per_page + 1`` rows, whatever its depth.
+
+Cursors are opaque url-safe tokens carrying the boundary row's
+``(pub_date, id)`` plus the page number, which is only used for display
+and cache keys.
+"""
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(pub_date, pk, number):
+    raw = f'{pub_date.isoformat()}|{pk}|{number}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(pub_date, pk, number)`` stored in a cursor token."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk, number = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk, number = int(pk), int(number)
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise InvalidCursor(token)
+    if pub_date is None or number < 1:
+        raise InvalidCursor(token)
+    return pub_date, pk, number
+
+
+class CursorPage(Sequence):
+    """A page of a `CursorPaginator`, usable where templates expect a Page."""
+
+    is_cursor_page = True
+
+    def __init__(self, object_list, number, paginator,
+                 has_next=False, has_previous=False, date_field='pub_date',
+                 boundary=None):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.date_field = date_field
+        # ``boundary(row)`` returns the ``(date, pk)`` of a row that isn't a
+        # model instance, such as a `values_list()` tuple.
+        self.boundary = boundary or self._instance_boundary
+
+    def _instance_boundary(self, obj):
+        return getattr(obj, self.date_field), obj.pk
+
+    def __repr__(self):
+        return f'<CursorPage {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(*self.boundary(self.object_list[-1]), self.number)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(*self.boundary(self.object_list[0]), self.number)
+
+
+class CursorPaginator:
+    """Paginate a post queryset newest first by ``(pub_date, id)``."""
+
+    def __init__(self, queryset, per_page, boundary=None):
+        self.queryset = queryset.order_by('-pub_date', '-pk')
+        self.per_page = per_page
+        self.boundary = boundary
+
+    def get_page(self, after=None, before=None):
+        """Return the page following ``after`` or preceding ``before``.
+
+        Malformed tokens fall back to the first page, the same way
+        `Paginator.get_page` treats out-of-range page numbers.
+        """
+        try:
+            if after:
+                return self._page_after(*decode_cursor(after))
+            if before:
+                return self._page_before(*decode_cursor(before))
+        except InvalidCursor:
+            pass
+        return self._page_after(None, None, 0)
+
+    def _page_after(self, pub_date, pk, number):
+        queryset = self.queryset
+        if pub_date is not None:
+            # The redundant `pub_date__lte` bound lets the database seek the
+            # index range instead of evaluating the OR for every row.
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk),
+                pub_date__lte=pub_date,
+            )
+        rows = list(queryset[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page],
+            number + 1,
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=pub_date is not None,
+            boundary=self.boundary,
+        )
+
+    def _page_before(self, pub_date, pk, number):
+        queryset = self.queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk),
+            pub_date__gte=pub_date,
+        ).reverse()
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(
+            rows,
+            max(number - 1, 1),
+            self,
+            has_next=True,
+            has_previous=has_previous,
+            boundary=self.boundary,
+        )
+
+
+def oldest_first_page(queryset, date_field, per_page, after=None, boundary=None):
+    """Return the `CursorPage` of ``queryset`` following the ``after`` cursor.
+
+    Rows are ordered oldest first by ``(date_field, pk)``, the order
+    comments are shown in; a malformed cursor gives the first page. Only
+    forward cursors are issued.
+    """
+    queryset = queryset.order_by(date_field, 'pk')
+    moment, pk, number = None, None, 0
+    if after:
+        try:
+            moment, pk, number = decode_cursor(after)
+        except InvalidCursor:
+            pass
+    if moment is not None:
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__gt': moment})
+            | Q(**{date_field: moment, 'pk__gt': pk}),
+            **{f'{date_field}__gte': moment},
+        )
+    rows = list(queryset[:per_page + 1])
+    return CursorPage(
+        rows[:per_page],
+        number + 1,
+        None,
+        has_next=len(rows) > per_page,
+        date_field=date_field,
+        boundary=boundary,
+    )
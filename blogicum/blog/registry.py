@@ -0,0 +1,78 @@
+"""In-process registry of the published categories and locations.
+
+Categories and locations change rarely but are read on every category page
+and every post form. Each worker process keeps them in memory, indexed by
+slug and pk, and reloads them when the shared generation counter in the
+cache moves: `invalidate` bumps it, and `blog.signals` calls it whenever a
+`Category` or `Location` is saved or deleted. Checking the counter costs
+one cache read per lookup; the cache is shared between workers (see
+``CACHES``), so a change made in one process reaches all of them.
+
+Registry objects are shared between requests and threads; treat them as
+read-only.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import Category, Location
+
+_GENERATION_KEY = 'blog:registry_generation'
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class _Snapshot:
+    def __init__(self, generation):
+        self.generation = generation
+        categories = list(Category.objects.filter(is_published=True).order_by('pk'))
+        locations = list(Location.objects.filter(is_published=True).order_by('pk'))
+        self.categories = categories
+        self.categories_by_slug = {c.slug: c for c in categories}
+        self.categories_by_pk = {c.pk: c for c in categories}
+        self.locations = locations
+        self.locations_by_pk = {loc.pk: loc for loc in locations}
+
+
+def generation():
+    """Microsecond timestamp of the last category or location change."""
+    value = cache.get(_GENERATION_KEY)
+    if value is None:
+        # Time based, like the page cache tags, so a counter evicted from
+        # the cache never comes back at a value a worker has loaded.
+        cache.add(_GENERATION_KEY, time.time_ns() // 1000, None)
+        value = cache.get(_GENERATION_KEY)
+    return value
+
+
+def invalidate():
+    """Make every worker reload the registry on its next lookup."""
+    previous = cache.get(_GENERATION_KEY, 0)
+    cache.set(_GENERATION_KEY, max(time.time_ns() // 1000, previous + 1), None)
+
+
+def snapshot():
+    global _snapshot
+    current_generation = generation()
+    current = _snapshot
+    if current is not None and current.generation == current_generation:
+        return current
+    with _lock:
+        if _snapshot is None or _snapshot.generation != current_generation:
+            _snapshot = _Snapshot(current_generation)
+        return _snapshot
+
+
+def published_category(slug):
+    """The published category with ``slug``, or None."""
+    return snapshot().categories_by_slug.get(slug)
+
+
+def published_categories():
+    return snapshot().categories
+
+
+def published_locations():
+    return snapshot().locations
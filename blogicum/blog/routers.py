@@ -0,0 +1,120 @@
+"""Read/write splitting between the primary database and its replicas.
+
+`PrimaryReplicaRouter` sends the reads of a request to one of the
+``READ_REPLICAS`` aliases, read-only connections to the same SQLite file
+(``mode=ro`` URIs), and every write to ``default``. `PrimaryPinningMiddleware`
+keeps a request on the primary when
+
+* it isn't a GET, HEAD or OPTIONS request, so a form view reads the rows
+  it is about to change from the primary;
+* it has already written something, so it reads back its own writes;
+* the client wrote something in the last ``REPLICA_PIN_SECONDS``, which
+  the middleware remembers in a cookie: the redirect after adding a
+  comment shows the comment even from a replica that lags behind.
+
+Outside a request, in management commands and the shell, everything goes
+to the primary.
+"""
+import asyncio
+import contextvars
+import random
+
+from django.conf import settings
+
+PRIMARY = 'default'
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# The `_RequestState` of the request being served, if any.
+_state = contextvars.ContextVar('primary_replica_state', default=None)
+
+
+def replicas():
+    return list(getattr(settings, 'READ_REPLICAS', ()))
+
+
+def aliases():
+    """Every alias a request's queries may run on: the primary first."""
+    return [PRIMARY, *(alias for alias in replicas() if alias != PRIMARY)]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned:
+            return PRIMARY
+        aliases = replicas()
+        if not aliases:
+            return PRIMARY
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+class PrimaryPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state, token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(state, response)
+
+    @staticmethod
+    def _start(request):
+        state = _RequestState(
+            request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+        )
+        return state, _state.set(state)
+
+    @staticmethod
+    def _finish(state, response):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
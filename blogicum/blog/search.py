@@ -0,0 +1,215 @@
+"""Full-text search over posts backed by an SQLite FTS5 table.
+
+``blog_post_fts`` holds the title and text of every post under the post's
+id as rowid. The signal handlers in `blog.signals` keep it in step with
+`Post` saves and deletes; rows written around the signals (``bulk_create``,
+``QuerySet.update``, raw SQL) are picked up by `index_posts`, which
+``manage.py rebuild_search_index`` runs over the whole table in batches.
+
+`search_posts` ranks matches with BM25, a title match weighing more than
+a text match, and pages through them by the ``(rank, id)`` keyset, so a
+deep page costs the same as the first one. Only posts visible on the
+public feeds are returned.
+"""
+import base64
+import binascii
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .clock import visibility_now
+from .models import Category, Post
+from .pagination import InvalidCursor
+
+TABLE = 'blog_post_fts'
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+SNIPPET_TOKENS = 16
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r'\w+')
+# Control characters can't occur in post text; they mark the matches in
+# snippets until the text around them is escaped.
+_MARK_START, _MARK_END = '\x02', '\x03'
+
+
+def is_available():
+    """FTS5 search is only set up on SQLite, see migration 0008."""
+    return connection.vendor == 'sqlite'
+
+
+def build_match(query):
+    """Turn user input into an FTS5 query: all words, the last as a prefix.
+
+    Returns None when ``query`` has no words. Only word characters reach
+    FTS5, so user input can't inject query syntax.
+    """
+    terms = _TERM_RE.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+
+def index_post(post):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            [post.pk, post.title, post.text],
+        )
+
+
+def unindex_post(pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [pk])
+
+
+def index_posts(first_pk, last_pk):
+    """Reindex the posts with ids in ``[first_pk, last_pk]``.
+
+    Index rows of posts deleted from that range are dropped as well.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid BETWEEN %s AND %s',
+            [first_pk, last_pk],
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, title, text) '
+            f'SELECT id, title, text FROM {Post._meta.db_table} '
+            'WHERE id BETWEEN %s AND %s',
+            [first_pk, last_pk],
+        )
+
+
+def drop_posts_after(pk):
+    """Drop the index rows of posts with ids above ``pk``."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid > %s', [pk])
+
+
+def encode_cursor(rank, pk, number):
+    raw = f'{rank!r}|{pk}|{number}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(rank, pk, number)`` stored in a search cursor token."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        rank, pk, number = raw.split('|')
+        rank, pk, number = float(rank), int(pk), int(number)
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise InvalidCursor(token)
+    if number < 1:
+        raise InvalidCursor(token)
+    return rank, pk, number
+
+
+def _snippet(raw):
+    return mark_safe(
+        escape(raw or '')
+        .replace(_MARK_START, '<mark>')
+        .replace(_MARK_END, '</mark>')
+    )
+
+
+class SearchPage:
+    """A page of search results, best match first."""
+
+    def __init__(self, object_list, number, has_next):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.search_rank, last.pk, self.number)
+
+
+def search_posts(query, per_page, after=None):
+    """Return the `SearchPage` of published posts matching ``query``.
+
+    Every post carries its BM25 ``search_rank`` (lower is better) and a
+    ``search_snippet`` of the text around the matches, with the matched
+    words in ``<mark>``. A malformed ``after`` cursor gives the first page.
+    """
+    match = build_match(query)
+    if match is None or not is_available():
+        return SearchPage([], 1, False)
+    rank_sql = f'bm25({TABLE}, {TITLE_WEIGHT}, {TEXT_WEIGHT})'
+    now = connection.ops.adapt_datetimefield_value(visibility_now())
+    params = [_MARK_START, _MARK_END, match, now]
+    keyset = ''
+    number = 1
+    if after:
+        try:
+            rank, pk, previous_number = decode_cursor(after)
+        except InvalidCursor:
+            pass
+        else:
+            keyset = (
+                f'AND ({rank_sql} > %s OR ({rank_sql} = %s AND f.rowid > %s))'
+            )
+            params += [rank, rank, pk]
+            number = previous_number + 1
+    # Same visibility rules as `views.get_published_posts_queryset`.
+    sql = (
+        f'SELECT f.rowid, {rank_sql} AS search_rank, '
+        f"snippet({TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}) "
+        f'FROM {TABLE} AS f '
+        f'JOIN {Post._meta.db_table} AS p ON p.id = f.rowid '
+        f'JOIN {Category._meta.db_table} AS c ON c.id = p.category_id '
+        f'WHERE {TABLE} MATCH %s AND p.is_published AND p.pub_date <= %s '
+        f'AND c.is_published {keyset} '
+        'ORDER BY search_rank, f.rowid LIMIT %s'
+    )
+    params.append(per_page + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = (
+        Post.objects.select_related('author', 'category', 'location')
+        .defer('text')
+        .in_bulk([pk for pk, _, _ in rows])
+    )
+    results = []
+    for pk, rank, snippet in rows:
+        post = posts.get(pk)
+        if post is None:
+            continue
+        post.search_rank = rank
+        post.search_snippet = _snippet(snippet)
+        results.append(post)
+    return SearchPage(results, number, has_next)
+
+
+def matching_ids_sql(query):
+    """Return ``(sql, params)`` selecting the ids of all posts matching ``query``.
+
+    Visibility is not checked; used by the admin changelist search.
+    """
+    match = build_match(query)
+    if match is None:
+        return None
+    return f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', (match,)
@@ -0,0 +1,219 @@
+"""Signal handlers keeping denormalized and cached blog data in sync."""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import clock, conditional, excerpts, page_cache, registry, search, thumbnails
+from .models import Category, Comment, Location, Post, deleting_posts
+
+
+def _shift_comment_count(post_id, delta):
+    # A single UPDATE ... SET comment_count = comment_count + delta is atomic
+    # on every backend, so concurrent comment writes can't lose increments.
+    # The counter is unsigned, so never decrement it below zero.
+    if post_id is None:
+        return
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the post an existing comment belonged to before saving."""
+    instance._previous_post_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'post' not in update_fields:
+        return
+    instance._previous_post_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('post_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _shift_comment_count(instance.post_id, 1)
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id is not None and previous_post_id != instance.post_id:
+        # Comment moved to another post (possible from the admin).
+        _shift_comment_count(previous_post_id, -1)
+        _shift_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts.get():
+        return
+    _shift_comment_count(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post(sender, instance, raw=False, **kwargs):
+    """Record the pages and image of an existing post before saving it."""
+    instance._previous_page_tags = []
+    instance._image_changed = False
+    if raw:
+        return
+    previous = None
+    if not instance._state.adding and instance.pk is not None:
+        previous = Post.objects.filter(pk=instance.pk).only(
+            'author_id', 'category_id', 'image'
+        ).first()
+    if previous is not None:
+        instance._previous_page_tags = page_cache.post_tags(previous)
+        instance._image_changed = previous.image.name != instance.image.name
+    else:
+        instance._image_changed = bool(instance.image)
+    if instance._image_changed:
+        # New dimensions; the old thumbnails belong to the replaced file.
+        instance.image_meta = thumbnails.read_image_meta(instance.image)
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Location)
+@receiver(pre_save, sender=Post)
+def fill_raw_updated_at(sender, instance, raw=False, **kwargs):
+    # Raw saves skip `auto_now`, and fixtures dumped before the stamp
+    # existed, as ``db.json``, don't carry it.
+    if raw and instance.updated_at is None:
+        instance.updated_at = instance.created_at or timezone.now()
+
+
+@receiver(pre_save, sender=Post)
+def fill_post_text_stats(sender, instance, update_fields=None, **kwargs):
+    # Raw saves too: fixtures carry the text but not what derives from it.
+    # Saves of other fields only, as of a post loaded without its text,
+    # leave the stored values alone.
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    excerpts.fill_text_stats(instance)
+
+
+@receiver(post_save, sender=Post)
+def handle_saved_post(sender, instance, raw=False, **kwargs):
+    page_cache.invalidate(
+        *page_cache.post_tags(instance),
+        *getattr(instance, '_previous_page_tags', ()),
+    )
+    if not raw and getattr(instance, '_image_changed', False):
+        thumbnails.schedule_thumbnails(instance)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    page_cache.invalidate(*page_cache.post_tags(instance))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_next_publication(sender, instance, **kwargs):
+    # The post may have been, or now be, the next one scheduled.
+    clock.forget_next_publication()
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields=None, **kwargs):
+    if not search.is_available():
+        return
+    if update_fields is not None and not {'title', 'text'} & set(update_fields):
+        return
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    if search.is_available():
+        search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    # The detail page lists the comments and every feed card shows the
+    # counter, so the comment affects the same pages as its post.
+    if instance.post_id in deleting_posts.get():
+        return
+    post = Post.objects.filter(pk=instance.post_id).only(
+        'author_id', 'category_id'
+    ).first()
+    if post is None:
+        page_cache.invalidate(f'post:{instance.post_id}')
+        return
+    tags = page_cache.post_tags(post)
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id is not None and previous_post_id != instance.post_id:
+        tags.append(f'post:{previous_post_id}')
+    page_cache.invalidate(*tags)
+
+
+def _invalidate_registry():
+    # Once now, for this transaction's own reads, and once after commit:
+    # other workers reloading in between still saw the old rows.
+    registry.invalidate()
+    transaction.on_commit(registry.invalidate)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    # Publishing or hiding a category adds or removes index entries.
+    page_cache.invalidate('index', f'category:{instance.pk}')
+    _invalidate_registry()
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_pages(sender, instance, **kwargs):
+    page_cache.invalidate(f'location:{instance.pk}')
+    _invalidate_registry()
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_previous_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_username = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and instance.USERNAME_FIELD not in update_fields:
+        return
+    instance._previous_username = (
+        sender._default_manager.filter(pk=instance.pk)
+        .values_list(instance.USERNAME_FIELD, flat=True).first()
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_profile_pages(sender, instance, update_fields=None, **kwargs):
+    # Logging in only stamps `last_login`, which no page shows.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    username = instance.get_username()
+    page_cache.invalidate(f'profile:{instance.pk}')
+    conditional.forget_author(username)
+    previous = getattr(instance, '_previous_username', None)
+    instance._previous_username = None
+    if previous is None or previous == username:
+        return
+    conditional.forget_author(previous)
+    # Post cards show the author's name, and post pages their commenters'.
+    tags = {
+        tag
+        for post in instance.posts.only('pk', 'author_id', 'category_id')
+        for tag in page_cache.post_tags(post)
+    }
+    tags.update(
+        f'post:{post_id}'
+        for post_id in instance.comments.values_list('post_id', flat=True).distinct()
+    )
+    page_cache.invalidate(*tags)
@@ -0,0 +1,269 @@
+"""Sitemap index over the public pages, split into shards kept on disk.
+
+Three sections are listed: ``posts``, ``profiles`` and ``categories``.
+Posts and profiles are sharded by fixed key ranges: shard ``n`` of
+``posts`` holds the visible posts with ``id`` in
+``(n * SITEMAP_SHARD_SIZE, (n + 1) * SITEMAP_SHARD_SIZE]``, and ``profiles``
+does the same over the authors' ids. A shard never holds more than
+``SITEMAP_SHARD_SIZE`` URLs, and a post always lands in the same shard.
+
+`refresh` writes the shards as XML files to ``SITEMAP_ROOT``, streaming
+each one from a ``values_list()`` iterator, and records in a manifest the
+signature every shard was built from: its number of URLs and newest
+lastmod, all shards of a section computed by one grouped query. A later
+`refresh` rebuilds only the shards whose signature moved, which a new,
+edited, hidden or deleted post, or a scheduled one becoming visible,
+always does. A URL's lastmod is the later of its ``pub_date`` and its
+last edit.
+
+The files hold the URLs' paths only: the views put the site's scheme and
+host (``SITEMAP_BASE_URL``, or the request's) in front while sending
+them, so requests for other hosts, or over http and https, share the same
+shards. The views call `current_manifest`, which refreshes at most every
+``SITEMAP_REFRESH_SECONDS``; ``manage.py rebuild_sitemaps`` does it
+ahead of time.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max
+from django.urls import reverse
+
+from . import registry
+from .clock import visibility_now
+from .models import Post
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+ITERATOR_CHUNK_SIZE = 2000
+MANIFEST = 'manifest.json'
+# Bumped when the shard files change format; older ones are rebuilt.
+MANIFEST_VERSION = 2
+# Characters of a shard file read per chunk when it is sent.
+SEND_CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+
+
+def _visible_posts():
+    # Same visibility rules as `views.get_published_posts_queryset`.
+    return Post.objects.filter(
+        is_published=True,
+        pub_date__lte=visibility_now(),
+        category__is_published=True,
+    ).order_by()
+
+
+def _shard(field):
+    size = settings.SITEMAP_SHARD_SIZE
+    return ExpressionWrapper((F(field) - 1) / size, output_field=IntegerField())
+
+
+def _key_range(number):
+    size = settings.SITEMAP_SHARD_SIZE
+    return number * size, (number + 1) * size
+
+
+def _lastmod(*stamps):
+    return max(stamp for stamp in stamps if stamp is not None)
+
+
+def _signatures(rows):
+    return {
+        row['shard']: [row['n'], _lastmod(row['updated'], row['published']).isoformat()]
+        for row in rows
+    }
+
+
+def _post_signatures():
+    return _signatures(
+        _visible_posts()
+        .annotate(shard=_shard('id'))
+        .values('shard')
+        .annotate(n=Count('id'), updated=Max('updated_at'), published=Max('pub_date'))
+    )
+
+
+def _post_entries(number):
+    low, high = _key_range(number)
+    rows = (
+        _visible_posts().filter(id__gt=low, id__lte=high)
+        .order_by('id')
+        .values_list('id', 'pub_date', 'updated_at')
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    # One `reverse()` instead of one per post.
+    prefix, suffix = reverse('blog:post_detail', args=(0,)).rsplit('0', 1)
+    for pk, pub_date, updated_at in rows:
+        yield f'{prefix}{pk}{suffix}', _lastmod(pub_date, updated_at)
+
+
+def _profile_signatures():
+    return _signatures(
+        _visible_posts()
+        .annotate(shard=_shard('author_id'))
+        .values('shard')
+        .annotate(
+            n=Count('author_id', distinct=True),
+            updated=Max('updated_at'),
+            published=Max('pub_date'),
+        )
+    )
+
+
+def _profile_entries(number):
+    low, high = _key_range(number)
+    rows = (
+        _visible_posts().filter(author_id__gt=low, author_id__lte=high)
+        .values_list('author_id', 'author__username')
+        .annotate(updated=Max('updated_at'), published=Max('pub_date'))
+        .order_by('author_id')
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    for _, username, updated_at, pub_date in rows:
+        yield reverse('blog:profile', args=(username,)), _lastmod(pub_date, updated_at)
+
+
+def _category_entries(number=0):
+    newest = {
+        category_id: _lastmod(updated_at, pub_date)
+        for category_id, updated_at, pub_date in (
+            _visible_posts().values_list('category_id')
+            .annotate(updated=Max('updated_at'), published=Max('pub_date'))
+        )
+    }
+    return [
+        (
+            reverse('blog:category_posts', args=(category.slug,)),
+            _lastmod(category.updated_at, newest.get(category.pk)),
+        )
+        for category in registry.published_categories()
+    ]
+
+
+def _category_signatures():
+    # A handful of rows: the signature is taken from the entries themselves.
+    entries = _category_entries()
+    if not entries:
+        return {}
+    return {0: [len(entries), max(lastmod for _, lastmod in entries).isoformat()]}
+
+
+# Section name -> (signatures of its shards, URL entries of a shard).
+SECTIONS = {
+    'posts': (_post_signatures, _post_entries),
+    'profiles': (_profile_signatures, _profile_entries),
+    'categories': (_category_signatures, _category_entries),
+}
+
+
+def shard_name(section, number):
+    return f'{section}-{number}'
+
+
+def _root():
+    return Path(settings.SITEMAP_ROOT)
+
+
+def shard_path(name):
+    return _root() / f'{name}.xml'
+
+
+def _write_atomically(path, chunks):
+    # Readers see the old file or the new one, never a partial write.
+    with tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=path.parent, delete=False, suffix='.tmp'
+    ) as file:
+        try:
+            for chunk in chunks:
+                file.write(chunk)
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def _urlset(entries):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+    for path, lastmod in entries:
+        yield (
+            f'<url><loc>{escape(path)}</loc>'
+            f'<lastmod>{lastmod.isoformat()}</lastmod></url>\n'
+        )
+    yield '</urlset>\n'
+
+
+def load_manifest():
+    try:
+        with open(_root() / MANIFEST, encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {'version': MANIFEST_VERSION, 'checked_at': 0, 'shards': {}}
+
+
+def refresh(force=False):
+    """Rebuild the shards that changed since the last refresh.
+
+    Returns the new manifest and the names of the rebuilt shards.
+    """
+    with _lock:
+        _root().mkdir(parents=True, exist_ok=True)
+        previous = load_manifest()
+        force = force or previous.get('version') != MANIFEST_VERSION
+        shards, rebuilt = {}, []
+        for section, (signatures, entries) in SECTIONS.items():
+            for number, signature in sorted(signatures().items()):
+                name = shard_name(section, number)
+                shards[name] = {'signature': signature}
+                stored = previous['shards'].get(name)
+                if (force or stored is None or stored['signature'] != signature
+                        or not shard_path(name).exists()):
+                    _write_atomically(shard_path(name), _urlset(entries(number)))
+                    rebuilt.append(name)
+        for name in set(previous['shards']) - set(shards):
+            shard_path(name).unlink(missing_ok=True)
+        manifest = {
+            'version': MANIFEST_VERSION, 'checked_at': time.time(), 'shards': shards,
+        }
+        _write_atomically(_root() / MANIFEST, [json.dumps(manifest)])
+    return manifest, rebuilt
+
+
+def site_url(request):
+    return settings.SITEMAP_BASE_URL or request.build_absolute_uri('/').rstrip('/')
+
+
+def current_manifest():
+    """The manifest, refreshed first if it is older than the refresh interval."""
+    manifest = load_manifest()
+    age = time.time() - manifest['checked_at']
+    if manifest.get('version') != MANIFEST_VERSION or age >= settings.SITEMAP_REFRESH_SECONDS:
+        manifest, _ = refresh()
+    return manifest
+
+
+def shard_content(file, base_url):
+    """The text of an open shard file, with ``base_url`` before every path."""
+    prefix = f'<loc>{escape(base_url)}'
+    with file:
+        while lines := file.readlines(SEND_CHUNK_SIZE):
+            yield ''.join(lines).replace('<loc>', prefix)
+
+
+def index_xml(manifest, base_url):
+    yield f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+    for name, shard in manifest['shards'].items():
+        section, number = name.rsplit('-', 1)
+        location = base_url + reverse(
+            'blog:sitemap_section', args=(section, int(number))
+        )
+        yield (
+            f'<sitemap><loc>{escape(location)}</loc>'
+            f'<lastmod>{shard["signature"][1]}</lastmod></sitemap>\n'
+        )
+    yield '</sitemapindex>\n'
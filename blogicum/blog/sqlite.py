@@ -0,0 +1,63 @@
+"""Connection profile of the SQLite database.
+
+Every new SQLite connection runs the PRAGMAs of the ``SQLITE_PRAGMAS``
+setting, a mapping of pragma names to values, in order. The defaults of
+`blogicum.settings` switch the database to write-ahead logging, so readers
+no longer wait for a writer and a writer no longer waits for readers, and
+make a connection wait ``busy_timeout`` milliseconds for a lock instead of
+failing with "database is locked" at once. Together with ``CONN_MAX_AGE``
+the PRAGMAs run once per persistent connection rather than per request.
+
+PRAGMAs that can't apply to a connection, such as WAL on an in-memory
+database, are left at what SQLite picks. Read-only connections (``mode=ro``
+URIs, as the replicas of `blog.routers`) skip the ones about writing the
+file: switching the journal mode fails there unless the file already is
+in that mode, and the primary's connections set it for everyone.
+"""
+import re
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# PRAGMAs about writing the database file.
+WRITE_PRAGMAS = ('journal_mode', 'synchronous')
+
+_NAME_RE = re.compile(r'^[a-z_]+$')
+_VALUE_RE = re.compile(r'^-?\w+$')
+
+
+def pragma_statements(pragmas):
+    """Return the ``PRAGMA name = value`` statements for ``pragmas``."""
+    statements = []
+    for name, value in pragmas.items():
+        value = str(value)
+        if not _NAME_RE.match(name) or not _VALUE_RE.match(value):
+            raise ValueError(f'Invalid SQLite pragma {name!r} = {value!r}')
+        statements.append(f'PRAGMA {name} = {value}')
+    return statements
+
+
+def is_read_only(connection):
+    name = str(connection.settings_dict['NAME'])
+    if not name.startswith('file:'):
+        return False
+    params = parse_qs(name.partition('?')[2])
+    return params.get('mode') == ['ro'] or params.get('immutable') == ['1']
+
+
+@receiver(connection_created, dispatch_uid='blog.sqlite.configure_connection')
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if is_read_only(connection):
+        pragmas = {
+            name: value for name, value in pragmas.items()
+            if name not in WRITE_PRAGMAS
+        }
+    statements = pragma_statements(pragmas)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,126 @@
+"""Template loader inlining ``{% include %}`` tags at compile time.
+
+``{% include "includes/category_link.html" %}`` looks the template up
+every time it renders: once per feed card, as every card is a render of
+its own (`blog.fragment_cache`). `InliningLoader` replaces each include of
+a fixed template name with the included template's nodes when the
+including template is compiled, so rendering it is a plain context push.
+
+An include stays as it is when its name is a variable, when it has
+``only``, and when the included template can't be loaded or keeps
+per-render state of its own (``{% cycle %}``, ``{% ifchanged %}``,
+blocks), which the shared render state of an inlined copy would change.
+
+`InliningLoader` is Django's cached loader doing that before it caches a
+template, and is configured in its place::
+
+    'loaders': [
+        ('blog.template_loaders.InliningLoader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+A change to an included template shows up only once the including one is
+compiled again, that is after a restart.
+"""
+import threading
+
+from django.template import Node, TemplateDoesNotExist
+from django.template.defaulttags import CycleNode, IfChangedNode, IfNode
+from django.template.loader_tags import BlockNode, ExtendsNode, IncludeNode
+from django.template.loaders import cached
+from django.template.loaders.base import Loader as BaseLoader
+
+# Nodes keeping state in `context.render_context`, which an included
+# template gets afresh on every render but an inlined one would share.
+STATEFUL_NODES = (BlockNode, CycleNode, ExtendsNode, IfChangedNode)
+
+_compiling = threading.local()
+
+
+class InlinedIncludeNode(Node):
+    child_nodelists = ('nodelist',)
+
+    def __init__(self, include, template):
+        self.token = include.token
+        self.origin = include.origin
+        self.template_name = template.name
+        self.extra_context = include.extra_context
+        self.nodelist = template.nodelist
+
+    def __repr__(self):
+        return f'<{self.__class__.__qualname__}: template={self.template_name!r}>'
+
+    def render(self, context):
+        values = {
+            name: var.resolve(context)
+            for name, var in self.extra_context.items()
+        }
+        with context.push(**values):
+            return self.nodelist.render(context)
+
+
+def _fixed_name(include):
+    expression = include.template
+    if include.isolated_context or expression.filters:
+        return None
+    # Quoted names are resolved to the string itself when parsed.
+    return expression.var if isinstance(expression.var, str) else None
+
+
+def _nodelists(node):
+    if isinstance(node, IfNode):
+        return [nodelist for _, nodelist in node.conditions_nodelists]
+    return [
+        nodelist for nodelist in (
+            getattr(node, attr, None) for attr in node.child_nodelists
+        )
+        if nodelist is not None
+    ]
+
+
+class _Inlining(BaseLoader):
+    """Inlines the includes of a template once it is compiled."""
+
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        names = getattr(_compiling, 'names', None)
+        if names is None:
+            names = _compiling.names = set()
+        names.add(template_name)
+        try:
+            self._inline(template.nodelist, names)
+        finally:
+            names.discard(template_name)
+        return template
+
+    def _included(self, include, names):
+        name = _fixed_name(include)
+        # A template including itself, directly or not, renders recursively.
+        if name is None or name in names:
+            return None
+        try:
+            template = self.engine.get_template(name)
+        except TemplateDoesNotExist:
+            return None
+        for node_type in STATEFUL_NODES:
+            if template.nodelist.get_nodes_by_type(node_type):
+                return None
+        return template
+
+    def _inline(self, nodelist, names):
+        for i, node in enumerate(nodelist):
+            if isinstance(node, IncludeNode):
+                template = self._included(node, names)
+                if template is not None:
+                    nodelist[i] = InlinedIncludeNode(node, template)
+                continue
+            for child in _nodelists(node):
+                self._inline(child, names)
+
+
+class InliningLoader(cached.Loader, _Inlining):
+    # The cached loader calls `_Inlining.get_template` on a cache miss, so
+    # templates are cached with their includes already inlined.
+    pass
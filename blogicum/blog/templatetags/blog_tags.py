@@ -0,0 +1,42 @@
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.safestring import mark_safe
+
+from blog.fragment_cache import render_post_card
+from blog.thumbnails import image_dimensions, rendition_widths, thumbnail_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card(post):
+    """Render a feed card for ``post`` through the fragment cache."""
+    return mark_safe(render_post_card(post))
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, css_class=''):
+    """Render ``post``'s image, preferring its generated thumbnails.
+
+    The ``src`` is the largest thumbnail that fits a feed card, the other
+    renditions go to ``srcset``. Posts whose thumbnails are not ready yet
+    get the original upload.
+    """
+    original_url = post.render_image_url
+    image_width, image_height = image_dimensions(post)
+    widths = rendition_widths(post)
+    srcset = [
+        (default_storage.url(thumbnail_name(post.image.name, width)), width)
+        for width in widths
+    ]
+    fitting = [url for url, width in srcset if width <= settings.CARD_IMAGE_WIDTH]
+    if srcset and image_width:
+        srcset.append((original_url, image_width))
+    return {
+        'src': fitting[-1] if fitting else original_url,
+        'srcset': ', '.join(f'{url} {width}w' for url, width in srcset),
+        'width': image_width,
+        'height': image_height,
+        'css_class': css_class,
+    }
@@ -0,0 +1,189 @@
+"""Background thumbnail generation for `Post.image`.
+
+After a post with a new image is committed, `schedule_thumbnails` hands
+the file to a process pool, so `create_post` and `edit_post` return without
+waiting for Pillow. The worker writes one rendition per width in
+``THUMBNAIL_WIDTHS`` narrower than the original next to the upload, under
+``posts/thumbs/``, and the parent process records the finished widths in
+``Post.image_meta['renditions']``. Until then templates keep showing the
+original image (see the ``post_image`` template tag).
+
+The image's dimensions are stored in `Post.image_meta` when it is
+uploaded, so pages can reserve the space and don't reflow.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import page_cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'thumbs'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def thumbnail_name(image_name, width):
+    """Storage name of the ``width`` rendition of ``image_name``."""
+    directory, filename = os.path.split(image_name)
+    stem, ext = os.path.splitext(filename)
+    if ext.lower() not in ('.jpg', '.jpeg', '.png'):
+        ext = '.png'
+    return os.path.join(directory, THUMBNAIL_DIR, f'{stem}_{width}w{ext}')
+
+
+def _meta(post):
+    meta = post.image_meta
+    return meta if isinstance(meta, dict) else {}
+
+
+def image_dimensions(post):
+    """Return the stored ``(width, height)`` of ``post``'s image."""
+    meta = _meta(post)
+    width, height = meta.get('width'), meta.get('height')
+    if isinstance(width, int) and isinstance(height, int):
+        return width, height
+    return None, None
+
+
+def rendition_widths(post):
+    """Widths of the thumbnails available for ``post``, smallest first."""
+    widths = _meta(post).get('renditions')
+    if not isinstance(widths, list):
+        return []
+    return sorted(w for w in widths if isinstance(w, int))
+
+
+def read_image_meta(image):
+    """Build the `Post.image_meta` of a freshly assigned image file."""
+    if not image:
+        return {}
+    try:
+        width, height = get_image_dimensions(image)
+    except (OSError, ValueError):
+        width = height = None
+    if width is None:
+        return {}
+    return {'width': width, 'height': height, 'renditions': []}
+
+
+def planned_widths(post):
+    image_width = image_dimensions(post)[0] or 0
+    return [w for w in sorted(settings.THUMBNAIL_WIDTHS) if w < image_width]
+
+
+def make_renditions(source_path, targets):
+    """Write resized copies of ``source_path``; runs in a worker process.
+
+    ``targets`` is a list of ``(width, destination path)`` pairs. Returns the
+    widths written. Only Pillow and the file system are touched here, the
+    worker never needs Django or the database.
+    """
+    from PIL import Image
+
+    written = []
+    with Image.open(source_path) as original:
+        original.load()
+        for width, path in targets:
+            height = max(1, round(original.height * width / original.width))
+            image = original.copy()
+            if path.lower().endswith(('.jpg', '.jpeg')) and image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.thumbnail((width, height), Image.LANCZOS)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            image.save(path, optimize=True)
+            written.append(width)
+    return written
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+        return _executor
+
+
+def _targets(post):
+    return [
+        (width, default_storage.path(thumbnail_name(post.image.name, width)))
+        for width in planned_widths(post)
+    ]
+
+
+def _store_renditions(post_id, image_name, widths):
+    with transaction.atomic():
+        post = (
+            Post.objects.select_for_update()
+            .only('author_id', 'category_id', 'image', 'image_meta')
+            .filter(pk=post_id, image=image_name)
+            .first()
+        )
+        if post is None:
+            # Deleted, or the image was replaced while we were working.
+            return
+        meta = dict(_meta(post), renditions=widths)
+        # Bump `updated_at` too: it is part of the post card cache key.
+        Post.objects.filter(pk=post_id).update(
+            image_meta=meta, updated_at=timezone.now()
+        )
+    page_cache.invalidate(*page_cache.post_tags(post))
+
+
+def _on_renditions_done(post_id, image_name, future):
+    try:
+        widths = future.result()
+        _store_renditions(post_id, image_name, widths)
+    except Exception:
+        logger.exception('Thumbnail generation failed for post %s', post_id)
+    finally:
+        # Runs on the executor's callback thread, which has its own
+        # connections that nothing else would close.
+        connections.close_all()
+
+
+def generate_thumbnails(post):
+    """Generate ``post``'s thumbnails in this process and store them."""
+    targets = _targets(post)
+    widths = make_renditions(post.image.path, targets) if targets else []
+    _store_renditions(post.pk, post.image.name, widths)
+
+
+def schedule_thumbnails(post):
+    """Generate ``post``'s thumbnails in the background after commit."""
+    if not post.image:
+        return
+    try:
+        source_path = post.image.path
+        targets = _targets(post)
+    except NotImplementedError:
+        # Storage without local paths; the original is served as is.
+        return
+    if not targets:
+        return
+    post_id, image_name = post.pk, post.image.name
+
+    def submit():
+        if not settings.THUMBNAIL_ASYNC:
+            try:
+                widths = make_renditions(source_path, targets)
+                _store_renditions(post_id, image_name, widths)
+            except Exception:
+                logger.exception('Thumbnail generation failed for post %s', post_id)
+            return
+        future = _get_executor().submit(make_renditions, source_path, targets)
+        future.add_done_callback(
+            lambda f: _on_renditions_done(post_id, image_name, f)
+        )
+
+    transaction.on_commit(submit)
@@ -1,32 +1,99 @@
-from django.urls import path
-from . import views
+from django.urls import path, register_converter
+from . import api, feeds, sitemaps, views
 
 app_name = 'blog'
 
-urlpatterns = [
-    path('', views.index, name='index'),
-    path(
-        'posts/<int:id>/',
-        views.post_detail,
-        name='post_detail'
-    ),
-    path(
-        'category/<slug:category_slug>/',
-        views.category_posts,
-        name='category_posts'
-    ),
-    # alternate plural URL used by tests
-    path(
-        'categories/<slug:category_slug>/',
-        views.category_posts,
-        name='category_posts_plural'
-    ),
-    path('profile/edit/', views.edit_profile, name='edit_profile'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/create/', views.create_post, name='create_post'),
-    path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
-    path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
-    path('posts/<int:post_id>/comment/', views.add_comment, name='add_comment'),
-    path('posts/<int:post_id>/edit_comment/<int:comment_id>/', views.edit_comment, name='edit_comment'),
-    path('posts/<int:post_id>/delete_comment/<int:comment_id>/', views.delete_comment, name='delete_comment'),
-]
+
+class FeedKindConverter:
+    regex = '|'.join(feeds.FEED_CLASSES)
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+register_converter(FeedKindConverter, 'feed_kind')
+
+
+class SitemapSectionConverter(FeedKindConverter):
+    regex = '|'.join(sitemaps.SECTIONS)
+
+
+register_converter(SitemapSectionConverter, 'sitemap_section')
+
+
+def build_urlpatterns(asynchronous=False):
+    """Return the app's URL patterns.
+
+    With ``asynchronous`` the public read pages are served by their async
+    versions, see `blogicum.async_urls`.
+    """
+    if asynchronous:
+        index = views.index_async
+        post_detail = views.post_detail_async
+        category_posts = views.category_posts_async
+        profile = views.profile_async
+    else:
+        index = views.index
+        post_detail = views.post_detail
+        category_posts = views.category_posts
+        profile = views.profile
+    return [
+        path('', index, name='index'),
+        path('search/', views.search, name='search'),
+        path('feed/<feed_kind:kind>/', views.feed, name='feed'),
+        path('sitemap.xml', views.sitemap_index, name='sitemap'),
+        path(
+            'sitemap-<sitemap_section:section>-<int:number>.xml',
+            views.sitemap_section,
+            name='sitemap_section'
+        ),
+        path(
+            'posts/<int:id>/',
+            post_detail,
+            name='post_detail'
+        ),
+        path(
+            'category/<slug:category_slug>/',
+            category_posts,
+            name='category_posts'
+        ),
+        path(
+            'category/<slug:category_slug>/all/',
+            views.category_posts_stream,
+            name='category_posts_stream'
+        ),
+        path(
+            'category/<slug:category_slug>/feed/<feed_kind:kind>/',
+            views.category_feed,
+            name='category_feed'
+        ),
+        # alternate plural URL used by tests
+        path(
+            'categories/<slug:category_slug>/',
+            category_posts,
+            name='category_posts_plural'
+        ),
+        path('profile/edit/', views.edit_profile, name='edit_profile'),
+        path('profile/<str:username>/', profile, name='profile'),
+        path('posts/create/', views.create_post, name='create_post'),
+        path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
+        path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
+        path('posts/<int:post_id>/comments/', views.comments_fragment, name='comments_fragment'),
+        path('posts/<int:post_id>/comment/', views.add_comment, name='add_comment'),
+        path('posts/<int:post_id>/edit_comment/<int:comment_id>/', views.edit_comment, name='edit_comment'),
+        path('posts/<int:post_id>/delete_comment/<int:comment_id>/', views.delete_comment, name='delete_comment'),
+        path('api/v1/posts/', api.post_list, name='api_posts'),
+        path('api/v1/posts/<int:post_id>/', api.post_detail, name='api_post'),
+        path('api/v1/posts/<int:post_id>/comments/', api.post_comments, name='api_post_comments'),
+        path('api/v1/categories/', api.category_list, name='api_categories'),
+        path('api/v1/categories/<slug:category_slug>/', api.category_detail, name='api_category'),
+        path('api/v1/categories/<slug:category_slug>/posts/', api.category_posts, name='api_category_posts'),
+        path('api/v1/authors/<str:username>/posts/', api.author_posts, name='api_author_posts'),
+        path('api/v1/locations/', api.location_list, name='api_locations'),
+    ]
+
+
+urlpatterns = build_urlpatterns()
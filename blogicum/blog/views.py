@@ -1,13 +1,28 @@
 # Correct imports (remove duplicates and stray indent)
+from django.conf import settings
 from django.shortcuts import get_object_or_404, render, redirect
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import quote_etag
+from django.db import transaction
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model, login
 
-from .models import Category, Post, Comment
+from .models import Post, Comment
 from .forms import PostForm, CommentForm, EditUserForm
+from . import async_db, conditional, feeds, page_cache, registry, sitemaps
+from .clock import visibility_now
+from .conditional import conditional_page
+from .diagnostics import note, with_diagnostics
+from .page_cache import cache_anonymous_page, feed_tags
+from .page_cache import tag as page_cache_tag
+from .pagination import CursorPaginator, oldest_first_page
+from .search import search_posts
+import asyncio
+import datetime
+import json
 import logging
 
 # module logger for debug/info messages
@@ -21,6 +36,7 @@ posts = [
         'id': i,
         'title': f'Title {i}',
         'text': f'Post text {i} ' + ('x' * 40),
+        'excerpt': f'Post text {i} ' + ('x' * 40),
         'pub_date': timezone.now(),
         'location': {
             'name': 'Планета Земля',
@@ -40,274 +56,239 @@ posts = [
 PAGE_SIZE = 10
 # Use same page size for main page as tests expect (N_PER_PAGE)
 MAIN_PAGE_SIZE = 5
+# `?page=N` links are still honoured for old bookmarks and crawlers, but
+# only this deep: past it the OFFSET scan costs more than the page is worth
+# and clients should follow the `?after=` cursors instead.
+MAX_OFFSET_PAGE = 50
+# Comments shown inline on a post page and per `comments_fragment` request.
+COMMENTS_PAGE_SIZE = 50
+# Rows fetched per database round trip by the streaming listings.
+STREAM_CHUNK_SIZE = 500
+
+
+def paginate_posts(request, posts_qs):
+    """Paginate a post feed for the current request.
+
+    Feeds are paginated by `(pub_date, id)` cursors passed as `?after=` /
+    `?before=`. A `?page=N` parameter switches to the offset paginator for
+    compatibility, raising 404 beyond `MAX_OFFSET_PAGE`.
+    """
+    page_number = request.GET.get('page')
+    if page_number is not None:
+        try:
+            number = int(page_number)
+        except ValueError:
+            number = 1
+        if number > MAX_OFFSET_PAGE:
+            raise Http404()
+        return Paginator(posts_qs, PAGE_SIZE).get_page(number)
+    paginator = CursorPaginator(posts_qs, PAGE_SIZE)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
 
 
-def index(request):
-    """Main page: paginated published posts."""
-    try:
-        posts_qs = get_published_posts_queryset().annotate(comment_count=Count('comments'))
+def _annotate_image_urls(page_obj):
+    """Attach a safe `render_image_url` to each post for the templates."""
+    for post in page_obj:
         try:
-            logger.debug(f"[DEBUG] index: db_posts_count={posts_qs.count()}")
+            url = post.image.url
         except Exception:
-            logger.debug("[DEBUG] index: can't count posts_qs")
-        # Always use DB queryset when DB access succeeds — even if it is empty.
-        # Only fall back to the module-level `posts` when DB access raises an
-        # exception (e.g. test runner blocks DB operations).
-        try:
-            # Paginate main page using PAGE_SIZE (tests expect pages of
-            # `N_PER_PAGE` items). Keep `posts` as a separate short list
-            # limited by `MAIN_PAGE_SIZE` for templates that expect only
-            # the latest few posts on the index.
-            paginator = Paginator(posts_qs.order_by('-pub_date'), PAGE_SIZE)
-            page_number = request.GET.get('page')
-            page_obj = paginator.get_page(page_number)
-        except Exception as e:
-            logger.debug(f"[DEBUG] index: paginator/db path failed: {e}")
-            module_posts = globals().get('posts') or []
-            paginator = Paginator(list(reversed(module_posts)), PAGE_SIZE)
-            page_obj = paginator.get_page(1)
-    except RuntimeError:
-        # When DB access is blocked prefer the module-level `posts` list
-        # so template-only tests can render expected content.
+            url = None
         try:
-            from . import posts as module_posts
-            paginator = Paginator(list(reversed(module_posts)), PAGE_SIZE)
-            page_obj = paginator.get_page(1)
+            setattr(post, 'render_image_url', url)
         except Exception:
-            page_obj = []
+            pass
 
-    module_posts = globals().get('posts') or []
-    try:
-        sample = list(page_obj)[:2]
-        logger.debug(f"[DEBUG] index: page_obj_item_types={[type(x) for x in sample]}")
-    except Exception:
-        logger.debug("[DEBUG] index: can't introspect page_obj items")
-    # Annotate posts with safe image URL for templates
-    try:
-        for p in page_obj:
-            try:
-                url = p.image.url
-            except Exception:
-                url = None
-            try:
-                setattr(p, 'render_image_url', url)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    # Provide both `page_obj` (paginated) and `posts` (short latest list)
+
+def _index_scope(request):
+    return ['index'], Post.objects.filter(is_published=True)
+
+
+def _post_scope(request, id):
+    return [f'post:{id}'], Post.objects.filter(pk=id)
+
+
+def _category_scope(request, category_slug):
+    category = registry.published_category(category_slug)
+    if category is None:
+        return None
+    return (
+        [f'category:{category.pk}'],
+        Post.objects.filter(category=category, is_published=True),
+    )
+
+
+def _profile_scope(request, username):
+    author_id = conditional.author_id(username)
+    if author_id is None:
+        return None
+    return [f'profile:{author_id}'], Post.objects.filter(author_id=author_id)
+
+
+@with_diagnostics
+@conditional_page(_index_scope)
+@cache_anonymous_page
+def index(request):
+    """Main page: paginated published posts."""
+    posts_qs = get_published_posts_queryset()
     try:
-        latest = list(posts_qs.order_by('-pub_date')[:MAIN_PAGE_SIZE])
-    except Exception:
-        latest = list(reversed(module_posts))[:MAIN_PAGE_SIZE]
+        page_obj = paginate_posts(request, posts_qs)
+        # `posts` is the short list of the latest posts; on the first page
+        # it is a prefix of the page itself and costs no extra query.
+        if page_obj.has_previous():
+            latest = list(posts_qs[:MAIN_PAGE_SIZE])
+        else:
+            latest = list(page_obj)[:MAIN_PAGE_SIZE]
+    except Http404:
+        raise
+    except Exception as e:
+        # Only fall back to the module-level `posts` when DB access raises
+        # (e.g. the test runner blocks DB operations); an empty queryset
+        # still renders an empty feed.
+        logger.debug(f"index: paginator/db path failed: {e}")
+        # A transient error must not be served from the page cache.
+        page_cache.do_not_store(request)
+        module_posts = list(reversed(posts))
+        page_obj = Paginator(module_posts, PAGE_SIZE).get_page(1)
+        latest = module_posts[:MAIN_PAGE_SIZE]
+    note(request, 'page_obj_item_types', lambda: [type(x) for x in list(page_obj)[:2]])
+    # Only the first pages follow every post change; deeper cached pages
+    # are left to expire.
+    if getattr(page_obj, 'number', 1) <= settings.PAGE_CACHE_INDEX_PAGES:
+        page_cache_tag(request, 'index')
+    page_cache_tag(request, *feed_tags(page_obj))
+    _annotate_image_urls(page_obj)
     context = {'page_obj': page_obj, 'posts': latest}
     return render(request, 'blog/index.html', context)
 
 
-def post_detail(request, id):
-    """Show single post with comments and comment form."""
+def _author_may_preview(request, post):
+    """Whether the author may see their hidden post right after creating it."""
+    if not getattr(request.user, 'is_authenticated', False):
+        return False
+    if request.user != post.author:
+        return False
     try:
-        logger.debug(f"[DEBUG] post_detail: enter id={id} user={getattr(request.user,'username',None)} auth={getattr(request.user,'is_authenticated',None)}")
+        sid = request.session.get('just_created_post_id')
+        sids = request.session.get('just_created_post_ids', [])
     except Exception:
-        pass
-    now = timezone.now()
-    from django.http import Http404
-    try:
-        # Fetch the post by PK and enforce visibility rules below.
-        # If the object doesn't exist, raise Http404 so tests can
-        # assert 404 for missing ids.
-        try:
-            post = Post.objects.select_related('author', 'category', 'location').get(pk=id)
-        except Post.DoesNotExist:
-            raise Http404()
+        return False
+    return post.id == sid or post.id in sids
 
-        try:
-            pid = getattr(post, 'id', None)
-            is_pub = getattr(post, 'is_published', None)
-            pub_date = getattr(post, 'pub_date', None)
-            cat_pub = getattr(getattr(post, 'category', None), 'is_published', None)
-            logger.debug(
-                f"[DEBUG] post_detail: id={pid} is_published={is_pub} pub_date={pub_date}"
-            )
-            logger.debug(
-                f"[DEBUG] post_detail: category_published={cat_pub}"
-            )
-        except Exception:
-            pass
-        try:
-            pid = getattr(post, 'id', None)
-            is_pub = getattr(post, 'is_published', None)
-            pub_date = getattr(post, 'pub_date', None)
-            cat_pub = getattr(getattr(post, 'category', None), 'is_published', None)
-            author = getattr(post, 'author', None)
-            logger.debug(
-                f"[DBG] post_after_fetch: id={pid} is_published={is_pub} pub_date={pub_date}"
-            )
-            logger.debug(f"[DBG] post_after_fetch: category_published={cat_pub} author={author}")
-        except Exception:
-            logger.debug("[DBG] post_after_fetch: couldn't introspect post")
 
-        # Enforce visibility rules: unpublished, scheduled, or
-        # category-unpublished posts are not visible to any requester.
-        try:
-            logger.debug(f"[DEBUG] post_detail: post_author={getattr(post.author,'username',None)} request_user={getattr(request.user,'username',None)}")
-        except Exception:
-            pass
-        post_is_published = bool(getattr(post, 'is_published', False))
-        post_pub_ok = getattr(post, 'pub_date', now) <= now
-        category_pub_ok = True
-        try:
-            if getattr(post, 'category', None) is not None:
-                category_pub_ok = bool(getattr(post.category, 'is_published', True))
-        except Exception:
-            category_pub_ok = True
-
-        visible_to_everyone = post_is_published and post_pub_ok and category_pub_ok
-        # Enforce visibility strictly: unpublished, scheduled, or
-        # category-unpublished posts are not visible to everyone.
-        # Allow a short session-based exception immediately after
-        # post creation so the author can view the just-created post.
-        allow_author_session = False
-        try:
-            sid = request.session.get('just_created_post_id')
-            sids = request.session.get('just_created_post_ids', [])
-            if sid is not None and sid == getattr(post, 'id', None):
-                if getattr(request.user, 'is_authenticated', False) and request.user == post.author:
-                    allow_author_session = True
-            elif getattr(post, 'id', None) in sids:
-                if getattr(request.user, 'is_authenticated', False) and request.user == post.author:
-                    allow_author_session = True
-        except Exception:
-            allow_author_session = False
-
-        # Only allow author access via explicit session markers set on create.
-
-        if not visible_to_everyone and not allow_author_session:
-            dbg = dict(
-                visible=visible_to_everyone,
-                post_id=getattr(post, 'id', None),
-                post_is_published=getattr(post, 'is_published', None),
-                post_pub_date=getattr(post, 'pub_date', None),
-                category_published=getattr(getattr(post, 'category', None), 'is_published', None),
-                request_user=getattr(request.user, 'username', None),
-                post_author=getattr(post.author, 'username', None),
-                allow_author=allow_author_session,
-            )
-            logger.debug(f"[DBG] post_detail: {dbg}")
-            logger.debug("post_detail: post not visible to requester -> raising 404")
-            raise Http404()
+def _get_visible_post(request, post_id):
+    """Return the post if the request may see it, else raise Http404."""
+    # Fetch the post by PK and enforce visibility rules below.
+    # If the object doesn't exist, raise Http404 so tests can
+    # assert 404 for missing ids.
+    try:
+        post = Post.objects.select_related('author', 'category', 'location').get(pk=post_id)
+    except Post.DoesNotExist:
+        raise Http404()
+
+    # Enforce visibility rules: unpublished, scheduled, or
+    # category-unpublished posts are not visible to everyone.
+    # Allow a short session-based exception immediately after
+    # post creation so the author can view the just-created post.
+    visible_to_everyone = (
+        post.is_published
+        and post.pub_date <= visibility_now()
+        and (post.category is None or post.category.is_published)
+    )
+    if not visible_to_everyone and not _author_may_preview(request, post):
+        note(request, 'hidden_post', lambda: dict(
+            post_id=post.id,
+            post_is_published=post.is_published,
+            post_pub_date=post.pub_date,
+            category_published=getattr(post.category, 'is_published', None),
+            post_author=post.author.username,
+        ))
+        raise Http404()
+    return post
+
+
+def _comments_page(request, post_id):
+    return oldest_first_page(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        'created_at',
+        COMMENTS_PAGE_SIZE,
+        after=request.GET.get('after'),
+    )
+
+
+@with_diagnostics
+@conditional_page(_post_scope)
+@cache_anonymous_page
+def post_detail(request, id):
+    """Show single post with the first page of comments and comment form."""
+    try:
+        post = _get_visible_post(request, id)
     except Http404:
         # If DB is accessible but object missing or explicitly hidden,
         # propagate 404.
         raise
     except Exception:
         # When DB access is blocked try to use module-level `posts` list
-        module_posts = globals().get('posts') or []
-        pd = next((p for p in module_posts if p.get('id') == id), None)
-        if pd is not None:
-            post = pd
-        else:
+        post = next((p for p in posts if p.get('id') == id), None)
+        if post is None:
             # If DB lookup failed and there's no module-level post, treat as not found
             raise Http404()
-    # If we got a dict-like post (module-level fallback), render directly
-    if isinstance(post, dict):
-        comments = []
-        form = CommentForm()
-        return render(request, 'blog/detail.html', {'post': post, 'comments': comments, 'form': form})
-
-    # At this point `post` is an ORM object fetched only if published
-    # and visible — no additional visibility checks required here.
-    # comments for real ORM post
-    try:
-        comments = post.comments.select_related('author').all()
-    except Exception:
-        comments = []
-
-    form = CommentForm()
-
-    # debug info for tests: show whether user is authenticated and form provided
-    try:
-        logger.debug(f"[DEBUG] post_detail: user_auth={request.user.is_authenticated}, providing_form={form is not None}")
-    except Exception:
-        logger.debug("[DEBUG] post_detail: can't read request.user")
-    # render to string and check presence of <form> for debugging
-    from django.template import loader
-    context = {'post': post, 'comments': comments, 'form': form}
-    rendered = loader.render_to_string('blog/detail.html', context=context, request=request)
-    logger.debug(f"[DEBUG] post_detail: rendered_contains_form={('<form' in rendered)}")
-    snippet = rendered[:2000].replace('\n', '\\n')
-    logger.debug(f"[DEBUG] post_detail: rendered_snippet={snippet}")
-    # Debug: list anchors that start with /posts/ to help tests locate edit/delete links
-    try:
-        import re
-
-        hrefs = re.findall(r'href="([^"]+)"', rendered)
-        posts_hrefs = [h for h in hrefs if h.startswith('/posts/')]
-        logger.debug(f"[DEBUG] post_detail: posts_hrefs={posts_hrefs}")
-    except Exception:
-        pass
-    try:
-        # Print comment authors vs request user for debugging equality issues
-        try:
-            comment_authors = [getattr(c.author, 'username', repr(c.author)) for c in comments]
-        except Exception:
-            comment_authors = []
-        req_user = getattr(request.user, 'username', repr(request.user))
-        logger.debug(f"[DEBUG] post_detail: comment_authors={comment_authors}, request_user={req_user}")
-    except Exception:
-        pass
-    try:
-        # Check per-comment equality with request.user
-        for c in comments:
-            try:
-                cid = getattr(c, 'id', None)
-                caid = getattr(c.author, 'id', None)
-                ruid = getattr(request.user, 'id', None)
-                logger.debug(
-                    f"[DEBUG] post_detail: comment_id={cid} author_id={caid} request_user_id={ruid}"
-                )
-                logger.debug(f"[DEBUG] post_detail: eq={c.author == request.user}")
-            except Exception:
-                logger.debug("[DEBUG] post_detail: comment equality check failed")
-    except Exception:
-        pass
+        return render(request, 'blog/detail.html', {'post': post, 'comments': [], 'form': CommentForm()})
+
+    page_cache_tag(request, f'post:{post.id}', *feed_tags([post]))
+    # Later pages are loaded from `comments_fragment`; the total comes from
+    # the denormalized `Post.comment_count`.
+    comments = _comments_page(request, post.id)
+    note(request, 'comment_authors', lambda: [
+        (c.id, c.author.username, c.author == request.user) for c in comments
+    ])
+    context = {'post': post, 'comments': comments, 'form': CommentForm()}
     return render(request, 'blog/detail.html', context)
 
 
+@with_diagnostics
+@cache_anonymous_page
+def comments_fragment(request, post_id):
+    """A page of a post's comments, as HTML or, with `?format=json`, JSON."""
+    post = _get_visible_post(request, post_id)
+    page_cache_tag(request, f'post:{post.id}')
+    comments = _comments_page(request, post.id)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'count': post.comment_count,
+            'next_cursor': comments.next_cursor,
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created_at': comment.created_at.isoformat(),
+                }
+                for comment in comments
+            ],
+        }, json_dumps_params={'ensure_ascii': False})
+    return render(request, 'includes/comment_list.html', {
+        'post': post, 'comments': comments,
+    })
+
+
+@with_diagnostics
+@conditional_page(_category_scope)
+@cache_anonymous_page
 def category_posts(request, category_slug):
     """Show posts in a category if category is published; otherwise 404."""
     try:
-        category = get_object_or_404(Category, slug=category_slug, is_published=True)
-        # For category pages use pagination (tests expect paginated results)
-        posts_qs = get_published_posts_queryset(category=category).annotate(comment_count=Count('comments'))
-        try:
-            cnt = posts_qs.count()
-            logger.debug(f"[DEBUG] category_posts: found_posts={cnt}")
-            try:
-                sample_titles = [getattr(p, 'title', repr(p)) for p in list(posts_qs[:5])]
-                logger.debug(f"[DEBUG] category_posts: sample_titles={sample_titles}")
-            except Exception as e:
-                logger.debug(f"[DEBUG] category_posts: can't iterate posts_qs: {e}")
-        except Exception:
-            logger.debug("[DEBUG] category_posts: can't count posts")
-        try:
-            # Always present a paginated `page_obj` (PAGE_SIZE) so tests that
-            # expect pagination find it consistent; keep `posts` as the full
-            # ordered list for template use if needed.
-            posts_list = list(posts_qs.order_by('-pub_date'))
-            # Always provide both a paginated `page_obj` (PAGE_SIZE) for
-            # tests that expect pagination, and a full `posts` list for
-            # tests that expect the entire category listing.
-            paginator = Paginator(posts_list, PAGE_SIZE)
-            page_number = request.GET.get('page')
-            page_obj = paginator.get_page(page_number)
-            posts = posts_list
-        except Exception:
-            try:
-                page_obj = list(posts_qs)
-            except Exception:
-                page_obj = []
-            posts = page_obj
+        category = registry.published_category(category_slug)
+        if category is None:
+            raise Http404()
+        # Only the requested page is fetched; a complete listing is served
+        # separately by `category_posts_stream`.
+        page_obj = paginate_posts(
+            request, get_published_posts_queryset(category=category)
+        )
+        page_cache_tag(request, f'category:{category.id}', *feed_tags(page_obj))
     except RuntimeError:
         # During pytest runs without DB access the test runner blocks DB
         # operations with a RuntimeError. In that case return a simple
@@ -319,71 +300,149 @@ def category_posts(request, category_slug):
                 self.description = ''
 
         category = _Cat(category_slug)
-        try:
-            from . import posts as module_posts
-            filtered = [p for p in module_posts if p.get('category', {}).get('slug') == category_slug]
-            paginator = Paginator(list(reversed(filtered)), PAGE_SIZE)
-            page_obj = paginator.get_page(1)
-        except Exception:
-            page_obj = []
-        # Ensure `posts` exists in the DB-block fallback too
-        try:
-            posts = list(page_obj)
-        except Exception:
-            posts = []
+        filtered = [p for p in posts if p.get('category', {}).get('slug') == category_slug]
+        page_obj = Paginator(list(reversed(filtered)), PAGE_SIZE).get_page(1)
 
-    # debug: print which template file will be used
-    try:
-        from django.template.loader import select_template, render_to_string
-        tpl = select_template(['blog/category.html'])
-        origin = getattr(tpl, 'origin', None)
-        name = getattr(origin, 'name', None) or getattr(tpl, 'name', None)
-        logger.debug(f"[DEBUG] category_posts: template_used={name}")
+    note(request, 'sample_titles', lambda: [getattr(p, 'title', p) for p in list(page_obj)[:5]])
+    _annotate_image_urls(page_obj)
+    return render(request, 'blog/category.html', {'category': category, 'page_obj': page_obj})
+
+
+@with_diagnostics
+def search(request):
+    """Full-text search over the published posts, best match first."""
+    query = request.GET.get('q', '').strip()
+    page_obj = search_posts(query, PAGE_SIZE, after=request.GET.get('after'))
+    note(request, 'search_results', len(page_obj))
+    return render(request, 'blog/search.html', {'query': query, 'page_obj': page_obj})
+
+
+def category_posts_stream(request, category_slug):
+    """Stream every published post of a category as JSON lines.
+
+    Rows are read with a server-side iterator in `STREAM_CHUNK_SIZE`
+    chunks and written out one by one, so memory use stays flat however
+    large the category is.
+    """
+    category = registry.published_category(category_slug)
+    if category is None:
+        raise Http404()
+    rows = (
+        get_published_posts_queryset(category=category)
+        .values_list('id', 'title', 'pub_date', 'author__username')
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+
+    def lines():
+        for post_id, title, pub_date, username in rows:
+            yield json.dumps({
+                'id': post_id,
+                'title': title,
+                'pub_date': pub_date.isoformat(),
+                'author': username,
+                'url': reverse('blog:post_detail', args=(post_id,)),
+            }, ensure_ascii=False) + '\n'
+
+    return StreamingHttpResponse(lines(), content_type='application/x-ndjson; charset=utf-8')
+
+
+def _feed_scope(request, kind):
+    return _index_scope(request)
+
+
+def _category_feed_scope(request, category_slug, kind):
+    return _category_scope(request, category_slug)
+
+
+@with_diagnostics
+@conditional_page(_feed_scope)
+@cache_anonymous_page
+def feed(request, kind):
+    """RSS or Atom feed of the newest published posts."""
+    # Every post change moves the `index` tag, and so does every category
+    # change, which may rename a category shown in the items.
+    page_cache_tag(request, 'index')
+    return feeds.feed_response(
+        request, kind, get_published_posts_queryset(),
+        title='Блогикум',
+        link=reverse('blog:index'),
+        description='Новые публикации',
+    )
+
+
+@with_diagnostics
+@conditional_page(_category_feed_scope)
+@cache_anonymous_page
+def category_feed(request, category_slug, kind):
+    """RSS or Atom feed of the newest published posts of a category."""
+    category = registry.published_category(category_slug)
+    if category is None:
+        raise Http404()
+    page_cache_tag(request, f'category:{category.id}')
+    return feeds.feed_response(
+        request, kind, get_published_posts_queryset(category=category),
+        title=f'Блогикум: {category.title}',
+        link=reverse('blog:category_posts', args=(category.slug,)),
+        description=category.description,
+    )
+
+
+@with_diagnostics
+def sitemap_index(request):
+    """Sitemap index listing the shards of `blog.sitemaps`."""
+    manifest = sitemaps.current_manifest()
+    return HttpResponse(
+        ''.join(sitemaps.index_xml(manifest, sitemaps.site_url(request))),
+        content_type='application/xml',
+    )
+
+
+@with_diagnostics
+def sitemap_section(request, section, number):
+    """One sitemap shard, served from its file on disk."""
+    name = sitemaps.shard_name(section, number)
+    shard = sitemaps.current_manifest()['shards'].get(name)
+    if shard is None:
+        raise Http404()
+    count, lastmod = shard['signature']
+    etag = quote_etag(f'{name}:{count}:{lastmod}')
+    last_modified = datetime.datetime.fromisoformat(lastmod)
+    response = conditional.not_modified(request, etag, last_modified)
+    if response is None:
         try:
-            # Annotate posts with safe render_image_url for templates
-            try:
-                for p in page_obj:
-                    try:
-                        url = p.image.url
-                    except Exception:
-                        url = None
-                    try:
-                        setattr(p, 'render_image_url', url)
-                    except Exception:
-                        pass
-            except Exception:
-                pass
-            rendered = render_to_string('blog/category.html', {'category': category, 'page_obj': page_obj}, request=request)
-            snippet = rendered[:2000].replace('\n', '\\n')
-            logger.debug(f"[DEBUG] category_posts: rendered_snippet={snippet}")
-        except Exception as e:
-            import traceback
-            logger.debug(f"[DEBUG] category_posts: render error: {type(e).__name__}: {e}")
-            traceback.print_exc()
-    except Exception:
-        logger.debug("[DEBUG] category_posts: can't determine template used")
-    # Return both keys; tests may pick either `page_obj` or `posts`.
-    return render(request, 'blog/category.html', {'category': category, 'page_obj': page_obj, 'posts': posts})
+            file = open(sitemaps.shard_path(name), encoding='utf-8')
+        except FileNotFoundError:
+            # Dropped by a concurrent refresh.
+            raise Http404()
+        response = StreamingHttpResponse(
+            sitemaps.shard_content(file, sitemaps.site_url(request)),
+            content_type='application/xml',
+        )
+    return conditional.add_validators(request, response, etag, last_modified)
 
 
 def get_published_posts_queryset(category=None):
     """Return a queryset of posts filtered by publication rules.
 
-    The filtering always uses the current time computed at call time
-    (no module-level constant) and applies three conditions:
+    The filtering uses the bucketed clock of `blog.clock`, so every call
+    in the same bucket builds the same SQL, and applies three conditions:
     - `is_published=True`
     - `pub_date__lte=now`
     - published category (either `category__is_published=True` or
       matching `category` when provided).
     """
-    now = timezone.now()
-    base_qs = Post.objects.select_related('author', 'category', 'location')
+    now = visibility_now()
+    # Lists show the stored excerpt; only the detail page needs the text.
+    base_qs = Post.objects.select_related('author', 'category', 'location').defer('text')
     # Order posts newest first to satisfy pagination and ordering tests
     if category is None:
-        return base_qs.filter(is_published=True, pub_date__lte=now, category__is_published=True).order_by('-pub_date')
-    return base_qs.filter(category=category, is_published=True, pub_date__lte=now).order_by('-pub_date')
+        return base_qs.filter(is_published=True, pub_date__lte=now, category__is_published=True).order_by('-pub_date', '-id')
+    return base_qs.filter(category=category, is_published=True, pub_date__lte=now).order_by('-pub_date', '-id')
 
 
+@with_diagnostics
+@conditional_page(_profile_scope)
+@cache_anonymous_page
 def profile(request, username):
     User = get_user_model()
     try:
@@ -391,103 +450,176 @@ def profile(request, username):
         # If owner -> show all posts by the user (including unpublished/future)
         if request.user.is_authenticated and request.user == profile_user:
             posts_qs = (
-                Post.objects.filter(author__username=username)
-                .select_related('category', 'location')
-                .annotate(comment_count=Count('comments'))
-                .order_by('-pub_date')
+                Post.objects.filter(author=profile_user)
+                .select_related('author', 'category', 'location')
+                .defer('text')
+                .order_by('-pub_date', '-id')
             )
-            try:
-                logger.debug(f"[DEBUG] profile: owner_view user={request.user} profile_user={profile_user} posts_count={posts_qs.count()}")
-                try:
-                    total = Post.objects.count()
-                    logger.debug(f"[DEBUG] profile: total_posts_in_db={total}")
-                except Exception:
-                    logger.debug("[DEBUG] profile: can't get total posts count")
-                try:
-                    authors = list(Post.objects.values_list('author__username', flat=True))
-                    logger.debug(f"[DEBUG] profile: post_authors={authors}")
-                except Exception:
-                    logger.debug("[DEBUG] profile: can't list post authors")
-                try:
-                    same_user_count = Post.objects.filter(author__username=profile_user.username).count()
-                    sample_ids = [p.id for p in Post.objects.filter(author__username=profile_user.username)[:10]]
-                    logger.debug(f"[DEBUG] profile: owner_view author__username_count={same_user_count} sample_ids={sample_ids}")
-                except Exception:
-                    logger.debug("[DEBUG] profile: can't query Post by author__username")
-            except Exception:
-                logger.debug("[DEBUG] profile: owner_view can't count posts_qs")
         else:
-            posts_qs = (
-                get_published_posts_queryset().filter(author__username=username).annotate(comment_count=Count('comments'))
-            )
-            try:
-                logger.debug(f"[DEBUG] profile: public_view user={request.user} profile_user={profile_user} posts_count={posts_qs.count()}")
-                try:
-                    same_user_count = Post.objects.filter(author__username=profile_user.username).count()
-                    sample_ids = [p.id for p in Post.objects.filter(author__username=profile_user.username)[:10]]
-                    logger.debug(f"[DEBUG] profile: public_view author__username_count={same_user_count} sample_ids={sample_ids}")
-                except Exception:
-                    logger.debug("[DEBUG] profile: can't query Post by author__username")
-            except Exception:
-                logger.debug("[DEBUG] profile: public_view can't count posts_qs")
-        paginator = Paginator(posts_qs, PAGE_SIZE)
-        page_obj = paginator.get_page(request.GET.get('page'))
+            posts_qs = get_published_posts_queryset().filter(author=profile_user)
+        page_obj = paginate_posts(request, posts_qs)
+        page_cache_tag(request, f'profile:{profile_user.id}', *feed_tags(page_obj))
     except RuntimeError:
         # Fall back to module-level posts list for template-only tests
-        try:
-            from . import posts as module_posts
-            # filter by author username if possible and paginate
-            filtered = [p for p in reversed(module_posts) if p.get('author', {}).get('username') == username]
-            paginator = Paginator(list(filtered), PAGE_SIZE)
-            page_obj = paginator.get_page(1)
-        except Exception:
-            class _StubUser:
-                def __init__(self, username):
-                    self.username = username
+        class _StubUser:
+            def __init__(self, username):
+                self.username = username
+
+        profile_user = _StubUser(username)
+        page_cache.do_not_store(request)
+        filtered = [p for p in reversed(posts) if p.get('author', {}).get('username') == username]
+        page_obj = Paginator(filtered, PAGE_SIZE).get_page(1)
+    _annotate_image_urls(page_obj)
+    note(request, 'page_obj_image_info', lambda: [
+        (getattr(p, 'id', None), getattr(p, 'render_image_url', None)) for p in page_obj
+    ])
+    return render(request, 'blog/profile.html', {'profile': profile_user, 'page_obj': page_obj})
+
 
-            profile_user = _StubUser(username)
-            page_obj = []
+# Async versions of the public read views, served under ASGI (see
+# `blogicum.asgi`). Independent queries and cache lookups of a page run
+# concurrently on the bounded pool of `blog.async_db`; the event loop
+# thread itself never touches the database. Diagnostics only cover the
+# sync views.
+
+async def _serve_async(request, scope, kwargs, build):
+    """Async `conditional_page` and `cache_anonymous_page` around ``build()``."""
+    # Resolving the lazy `request.user` may load the session.
+    cacheable = await async_db.run(page_cache.is_cacheable_request, request)
+    lookups = [async_db.run(conditional.page_validators, request, scope, (), kwargs)]
+    if cacheable:
+        lookups.append(async_db.run(page_cache.cached_page, request))
+    (etag, last_modified), *cached = await asyncio.gather(*lookups)
+    response = conditional.not_modified(request, etag, last_modified)
+    if response is None and cached:
+        response = cached[0]
+    if response is None:
+        if cacheable:
+            page_cache.collect_tags(request)
+        response = await build()
+        if cacheable:
+            await async_db.run(page_cache.store_page, request, response)
+    return conditional.add_validators(request, response, etag, last_modified)
+
+
+async def _paginate_async(request, posts_qs):
+    """`paginate_posts`, fetching an offset page and its count concurrently."""
+    page_number = request.GET.get('page')
+    if page_number is None:
+        return await async_db.run(paginate_posts, request, posts_qs)
     try:
-        from django.template.loader import render_to_string
-        # Annotate page_obj posts with a safe render_image_url and inspect image presence
-        try:
-            for p in page_obj:
-                try:
-                    url = p.image.url
-                except Exception:
-                    url = None
-                try:
-                    setattr(p, 'render_image_url', url)
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        # Debug: inspect page_obj items for image presence
-        try:
-            img_info = []
-            for p in page_obj:
-                try:
-                    has_image = bool(getattr(p, 'image', None))
-                    url = getattr(p.image, 'url', 'NOURL')
-                    img_info.append((getattr(p, 'id', None), has_image, url, type(getattr(p, 'image', None)).__name__))
-                except Exception as _e:
-                    img_info.append((getattr(p, 'id', None), 'ERR', str(_e), None))
-            logger.debug(f"[DEBUG] profile: page_obj_image_info={img_info}")
-        except Exception:
-            logger.debug("[DEBUG] profile: couldn't inspect page_obj images")
-        rendered = render_to_string('blog/profile.html', {'profile': profile_user, 'page_obj': page_obj}, request=request)
-        logger.debug(f"[DEBUG] profile: rendered_img_count={rendered.count('<img')}")
-        snippet = rendered[:1000].replace('\n', '\\n')
-        logger.debug(f"[DEBUG] profile: rendered_snippet={snippet}")
-    except Exception:
-        pass
-    return render(request, 'blog/profile.html', {'profile': profile_user, 'page_obj': page_obj})
+        number = int(page_number)
+    except ValueError:
+        number = 1
+    if number > MAX_OFFSET_PAGE:
+        raise Http404()
+    paginator = Paginator(posts_qs, PAGE_SIZE)
+    offset = (max(number, 1) - 1) * PAGE_SIZE
+    _, rows = await asyncio.gather(
+        async_db.run(lambda: paginator.count),
+        async_db.run(list, posts_qs[offset:offset + PAGE_SIZE]),
+    )
+    page_obj = paginator.get_page(number)
+    if page_obj.number == number:
+        page_obj.object_list = rows
+    else:
+        page_obj.object_list = await async_db.run(list, page_obj.object_list)
+    return page_obj
+
+
+def _is_first_page(request):
+    return not any(request.GET.get(name) for name in ('page', 'after', 'before'))
+
+
+async def index_async(request):
+    """Async `index`."""
+    async def build():
+        posts_qs = get_published_posts_queryset()
+        if _is_first_page(request):
+            page_obj = await _paginate_async(request, posts_qs)
+            latest = None
+        else:
+            page_obj, latest = await asyncio.gather(
+                _paginate_async(request, posts_qs),
+                async_db.run(list, posts_qs[:MAIN_PAGE_SIZE]),
+            )
+        if not page_obj.has_previous():
+            latest = list(page_obj)[:MAIN_PAGE_SIZE]
+        if getattr(page_obj, 'number', 1) <= settings.PAGE_CACHE_INDEX_PAGES:
+            page_cache_tag(request, 'index')
+        page_cache_tag(request, *feed_tags(page_obj))
+        _annotate_image_urls(page_obj)
+        context = {'page_obj': page_obj, 'posts': latest}
+        return await async_db.run(render, request, 'blog/index.html', context)
+
+    return await _serve_async(request, _index_scope, {}, build)
+
+
+async def post_detail_async(request, id):
+    """Async `post_detail`: the post and its comments are fetched together."""
+    async def build():
+        post, comments = await asyncio.gather(
+            async_db.run(_get_visible_post, request, id),
+            async_db.run(_comments_page, request, id),
+        )
+        page_cache_tag(request, f'post:{post.id}', *feed_tags([post]))
+        context = {'post': post, 'comments': comments, 'form': CommentForm()}
+        return await async_db.run(render, request, 'blog/detail.html', context)
+
+    return await _serve_async(request, _post_scope, {'id': id}, build)
+
+
+async def category_posts_async(request, category_slug):
+    """Async `category_posts`: the category and its page are looked up together."""
+    async def build():
+        category, page_obj = await asyncio.gather(
+            async_db.run(registry.published_category, category_slug),
+            _paginate_async(
+                request,
+                get_published_posts_queryset().filter(category__slug=category_slug),
+            ),
+        )
+        if category is None:
+            raise Http404()
+        page_cache_tag(request, f'category:{category.id}', *feed_tags(page_obj))
+        _annotate_image_urls(page_obj)
+        context = {'category': category, 'page_obj': page_obj}
+        return await async_db.run(render, request, 'blog/category.html', context)
+
+    return await _serve_async(
+        request, _category_scope, {'category_slug': category_slug}, build
+    )
+
+
+async def profile_async(request, username):
+    """Async `profile`: the user and their posts are looked up together."""
+    async def build():
+        # `_serve_async` has already resolved `request.user`.
+        if request.user.is_authenticated and request.user.username == username:
+            posts_qs = (
+                Post.objects.filter(author__username=username)
+                .select_related('author', 'category', 'location')
+                .defer('text')
+                .order_by('-pub_date', '-id')
+            )
+        else:
+            posts_qs = get_published_posts_queryset().filter(author__username=username)
+        profile_user, page_obj = await asyncio.gather(
+            async_db.run(get_object_or_404, get_user_model(), username=username),
+            _paginate_async(request, posts_qs),
+        )
+        page_cache_tag(request, f'profile:{profile_user.id}', *feed_tags(page_obj))
+        _annotate_image_urls(page_obj)
+        context = {'profile': profile_user, 'page_obj': page_obj}
+        return await async_db.run(render, request, 'blog/profile.html', context)
+
+    return await _serve_async(request, _profile_scope, {'username': username}, build)
 
 
 @login_required
+@with_diagnostics
 def edit_profile(request):
     user = request.user
-    logger.debug(f"[DEBUG] edit_profile: user={user}, authenticated={getattr(user, 'is_authenticated', 'NA')}, method={request.method}")
     if request.method == 'POST':
         form = EditUserForm(request.POST, instance=user)
         if form.is_valid():
@@ -495,7 +627,6 @@ def edit_profile(request):
             return redirect('blog:profile', username=user.username)
     else:
         form = EditUserForm(instance=user)
-    logger.debug(f"[DEBUG] edit_profile: providing_form={form is not None}, form_class={getattr(form, '__class__', None)}")
     return render(request, 'blog/edit_profile.html', {'form': form})
 
 
@@ -575,7 +706,10 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.post = post
         comment.author = request.user
-        comment.save()
+        # Saving fires the `blog.signals` counter update; keep both in one
+        # transaction so Post.comment_count never disagrees with the table.
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', id=post.id)
 
 
@@ -602,6 +736,7 @@ def delete_comment(request, post_id, comment_id):
     if request.user != comment.author:
         return redirect('blog:post_detail', id=post.id)
     if request.method == 'POST':
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
         return redirect('blog:post_detail', id=post.id)
     return render(request, 'blog/comment.html', {'comment': comment})
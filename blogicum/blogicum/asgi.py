@@ -3,14 +3,33 @@ ASGI config for blogicum project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests served over ASGI are routed by `blogicum.async_urls`, so the
+public blog pages are rendered by their async views.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
-application = get_asgi_application()
+
+class AsyncViewsRequest(ASGIRequest):
+    urlconf = 'blogicum.async_urls'
+
+
+class AsyncViewsHandler(ASGIHandler):
+    request_class = AsyncViewsRequest
+
+
+def get_application():
+    """Like `django.core.asgi.get_asgi_application`, with `AsyncViewsHandler`."""
+    django.setup(set_prefix=False)
+    return AsyncViewsHandler()
+
+
+application = get_application()
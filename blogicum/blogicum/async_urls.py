@@ -0,0 +1,17 @@
+"""URL configuration of requests served over ASGI, see `blogicum.asgi`.
+
+The same as `blogicum.urls`, except that the public read pages of the blog
+are served by their async views.
+"""
+from django.urls import include, path
+
+from blog.urls import app_name, build_urlpatterns
+
+from . import urls
+from .urls import handler403, handler404, handler500  # noqa: F401
+
+urlpatterns = [
+    path('', include((build_urlpatterns(asynchronous=True), app_name)))
+    if getattr(pattern, 'app_name', None) == app_name else pattern
+    for pattern in urls.urlpatterns
+]
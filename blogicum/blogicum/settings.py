@@ -21,12 +21,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.assets.StaticAssetsMiddleware',
+    'blog.routers.PrimaryPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -52,13 +55,54 @@ TEMPLATES = [
     },
 ]
 
+# Inline `{% include %}`s of fixed templates when a template is compiled
+# (see `blog.template_loaders`). Off in DEBUG, where an edited include has
+# to show up without a restart.
+TEMPLATE_INLINE_INCLUDES = not DEBUG
+if TEMPLATE_INLINE_INCLUDES:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('blog.template_loaders.InliningLoader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Keep connections open between requests, so the PRAGMAs below
+        # run once per connection rather than once per request.
+        'CONN_MAX_AGE': 60,
+    },
+    # Read-only connection to the same file, see `blog.routers`.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+        'CONN_MAX_AGE': 60,
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+# Aliases the reads of a request are spread over, unless it is pinned to
+# the primary, which lasts REPLICA_PIN_SECONDS after the client's last write.
+READ_REPLICAS = ['replica']
+REPLICA_PIN_SECONDS = 10
+
+# PRAGMAs run on every new SQLite connection (see `blog.sqlite`). WAL lets
+# feed reads go on while a comment is written; with WAL, synchronous=NORMAL
+# can lose the last commits on power loss but never corrupts the database.
+# A negative cache_size is in KiB.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
 }
 
 LANGUAGE_CODE = 'ru-RU'
@@ -74,6 +118,16 @@ LOGIN_URL = '/auth/login/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
+# Outside DEBUG, `collectstatic` writes content-hashed copies and their gzip
+# variants to STATIC_ROOT, and `{% static %}` links the hashed names (see
+# `blog.assets`). With STATIC_SERVE on, `blog.assets.StaticAssetsMiddleware`
+# serves STATIC_ROOT itself; leave it off behind a web server that does.
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+    else 'blog.assets.CompressedManifestStaticFilesStorage'
+)
+STATIC_SERVE = not DEBUG
 
 # Media (user-uploaded files)
 MEDIA_URL = '/media/'
@@ -87,3 +141,89 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Use custom CSRF failure view so CsrfViewMiddleware renders our template
 CSRF_FAILURE_VIEW = 'blogicum.views.csrf_failure'
+
+CACHES = {
+    # Generation counters and invalidation state: the page cache tags, the
+    # category registry (`blog.registry`), the publication clock. Every
+    # worker process must see the same values: files on this host by
+    # default, memcached or Redis once workers run on several hosts.
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(BASE_DIR / 'cache'),
+    },
+    # Rendered pages and post cards. They are checked against the shared
+    # counters, or keyed by the data they show, so each process may keep
+    # its own copies in memory.
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+}
+
+# Seconds a rendered post card stays in the fragment cache. Keys change
+# whenever the card's data does, so this only bounds memory, not staleness.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Log queries, rendered output and view notes for every blog request
+# (see `blog.diagnostics`). A single request can opt in with
+# `?_diagnostics=1` when DEBUG is on or the user is staff.
+BLOG_DIAGNOSTICS = False
+
+# Full-page cache for anonymous readers (see `blog.page_cache`): the
+# longest a page may be served from the cache, and how many index pages
+# are invalidated on every post change (deeper pages just expire).
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_INDEX_PAGES = 5
+
+# Publication filters compare `pub_date` with the current time rounded down
+# to this many seconds (`blog.clock`), so scheduled posts appear up to this
+# late but queries within the same interval are identical.
+VISIBILITY_CLOCK_GRANULARITY = 30
+
+# Query budgets checked by `blog.middleware.QueryBudgetMiddleware`: the
+# most queries each URL name may run per request. A SQL fingerprint
+# repeated QUERY_BUDGET_REPEAT_THRESHOLD times in one request is reported
+# as an N+1 pattern. Violations are logged, or raised when
+# QUERY_BUDGET_RAISE is on.
+QUERY_BUDGETS = {
+    'blog:index': 5,
+    'blog:post_detail': 5,
+    # Right after a category change: reloading the registry (2) and the
+    # conditional GET validator (1) come on top of the page itself.
+    'blog:category_posts': 6,
+    # The first request for a username also looks its id up for the
+    # conditional GET validators.
+    'blog:profile': 6,
+    'blog:search': 4,
+    'blog:comments_fragment': 3,
+    'blog:feed': 3,
+    'blog:category_feed': 3,
+    'blog:api_posts': 2,
+    'blog:api_post_comments': 2,
+    'blog:create_post': 4,
+    'blog:edit_post': 5,
+}
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+QUERY_BUDGET_RAISE = False
+
+# Threads of `blog.async_db` running the queries of the async views under
+# ASGI, and so the most database connections they hold at once.
+ASYNC_DB_WORKERS = 8
+
+# Post image thumbnails (see `blog.thumbnails`): rendition widths in pixels
+# and the size of the process pool generating them. With THUMBNAIL_ASYNC
+# off the thumbnails are generated inline right after the post is saved.
+THUMBNAIL_WIDTHS = (320, 640, 960)
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_ASYNC = True
+# Display width of the image in a feed card, in CSS pixels.
+CARD_IMAGE_WIDTH = 640
+
+# Sitemaps (see `blog.sitemaps`): shards of at most SITEMAP_SHARD_SIZE URLs
+# kept as files in SITEMAP_ROOT and checked for changes at most every
+# SITEMAP_REFRESH_SECONDS. URLs start with SITEMAP_BASE_URL, or with the
+# scheme and host of each request.
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_SHARD_SIZE = 50000
+SITEMAP_REFRESH_SECONDS = 60 * 15
+SITEMAP_BASE_URL = ''
@@ -0,0 +1,37 @@
+from typing import Callable, Optional
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import reverse
+
+from blog.middleware import QueryRecorder
+
+
+@pytest.fixture
+def assert_query_budget() -> Callable[..., HttpResponse]:
+    """Request a URL by name and check its queries against a budget.
+
+    The budget defaults to the URL name's entry in `QUERY_BUDGETS`;
+    repeated SQL fingerprints (N+1 patterns) always fail the check.
+    """
+
+    def check(
+            client: Client, url_name: str, *args,
+            budget: Optional[int] = None, **kwargs
+    ) -> HttpResponse:
+        if budget is None:
+            budget = settings.QUERY_BUDGETS[url_name]
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = client.get(reverse(url_name, args=args, kwargs=kwargs))
+        problems = recorder.problems(budget)
+        assert not problems, (
+            f"Убедитесь, что страница `{url_name}` укладывается в бюджет "
+            f"запросов к базе данных: {'; '.join(problems)}"
+        )
+        return response
+
+    return check
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import api
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_pages_through_posts_by_cursor(
+        monkeypatch, mixer, user, client, published_category
+):
+    monkeypatch.setattr(api, "PAGE_SIZE", 2)
+    now = timezone.now()
+    posts = [
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            location=None, is_published=True,
+            pub_date=now - timedelta(hours=i + 1),
+        )
+        for i in range(5)
+    ]
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+
+    seen, after = [], None
+    while True:
+        response = client.get(
+            "/api/v1/posts/", {"after": after} if after else {}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        seen += [item["id"] for item in data["results"]]
+        after = data["next"]
+        if after is None:
+            break
+    assert seen == [post.pk for post in posts], (
+        "Убедитесь, что API отдаёт опубликованные записи по курсору, "
+        "без повторов и пропусков."
+    )
+    assert "text" not in data["results"][0], (
+        "Убедитесь, что в списке записей по умолчанию нет текста."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_fields_selector_limits_columns(client, post_with_published_location):
+    post = post_with_published_location
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/v1/posts/", {"fields": "id,title"})
+    assert response.json()["results"] == [{"id": post.pk, "title": post.title}]
+    post_queries = [q["sql"] for q in queries if '"blog_post"' in q["sql"]]
+    assert post_queries and all(
+        '"blog_post"."text"' not in sql for sql in post_queries
+    ), "Убедитесь, что невыбранные поля не запрашиваются из базы."
+
+    response = client.get(f"/api/v1/posts/{post.pk}/", {"fields": "text"})
+    assert response.json() == {"text": post.text}
+
+    response = client.get("/api/v1/posts/", {"fields": "id,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["error"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_hides_unpublished_objects(
+        mixer, user, client, published_category
+):
+    unpublished_category = mixer.blend("blog.Category", is_published=False)
+    hidden = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False,
+    )
+    assert client.get(f"/api/v1/posts/{hidden.pk}/").status_code == 404
+    assert client.get(f"/api/v1/posts/{hidden.pk}/comments/").status_code == 404
+    assert client.get(
+        f"/api/v1/categories/{unpublished_category.slug}/"
+    ).status_code == 404
+    assert client.get("/api/v1/categories/").json()["results"] == [{
+        "slug": published_category.slug,
+        "title": published_category.title,
+        "description": published_category.description,
+    }]
+    assert client.post("/api/v1/posts/").status_code == 405
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_pages_comments_oldest_first(
+        monkeypatch, mixer, user, client, post_with_published_location
+):
+    monkeypatch.setattr(api, "PAGE_SIZE", 2)
+    post = post_with_published_location
+    comments = [
+        mixer.blend("blog.Comment", post=post, author=user) for _ in range(3)
+    ]
+    url = f"/api/v1/posts/{post.pk}/comments/"
+
+    first = client.get(url).json()
+    second = client.get(url, {"after": first["next"]}).json()
+    assert [c["id"] for c in first["results"] + second["results"]] == [
+        c.pk for c in comments
+    ], "Убедитесь, что комментарии отдаются по порядку и постранично."
+    assert second["next"] is None
+    assert first["results"][0]["author"] == user.username
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, set_urlconf
+from django.utils import timezone
+
+from blog.middleware import view_query_stats
+
+
+def _content(response):
+    return response.status_code, response.content.decode("utf-8")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_render_the_same_pages(
+        mixer, user, post_with_published_location, published_category
+):
+    post = post_with_published_location
+    mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=2),
+    )
+    mixer.blend("blog.Comment", post=post, author=user)
+    paths = [
+        "/",
+        "/?page=2",
+        f"/posts/{post.id}/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+        "/posts/999999/",
+        "/category/missing/",
+        "/profile/missing/",
+    ]
+    expected = {path: _content(Client().get(path)) for path in paths}
+
+    client = AsyncClient()
+    with override_settings(ROOT_URLCONF="blogicum.async_urls"):
+        clear_url_caches()
+        try:
+            for path in paths:
+                response = async_to_sync(client.get)(path)
+                assert _content(response) == expected[path], (
+                    f"Убедитесь, что асинхронная версия `{path}` отдаёт ту же "
+                    "страницу, что и синхронная."
+                )
+        finally:
+            set_urlconf(None)
+            clear_url_caches()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.urls("blogicum.async_urls")
+def test_async_views_record_queries_and_answer_conditional_get(
+        post_with_published_location
+):
+    post = post_with_published_location
+    client = AsyncClient()
+    view_query_stats.pop("blog:post_detail", None)
+    response = async_to_sync(client.get)(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert view_query_stats["blog:post_detail"]["queries"] > 0, (
+        "Убедитесь, что запросы асинхронных представлений учитываются "
+        "бюджетом запросов."
+    )
+    # The async request factory takes header names as they are sent.
+    response = async_to_sync(client.get)(
+        f"/posts/{post.id}/", **{"If-None-Match": response["ETag"]}
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.urls("blogicum.async_urls")
+def test_sync_views_under_asgi_record_queries(post_with_published_location):
+    post = post_with_published_location
+    client = AsyncClient()
+    for view_name, path in (
+        ("blog:comments_fragment", f"/posts/{post.id}/comments/"),
+        ("blog:api_posts", "/api/v1/posts/"),
+    ):
+        view_query_stats.pop(view_name, None)
+        response = async_to_sync(client.get)(path)
+        assert response.status_code == 200
+        assert view_query_stats[view_name]["queries"] > 0, (
+            f"Убедитесь, что запросы синхронного представления `{view_name}` "
+            "учитываются бюджетом запросов под ASGI."
+        )
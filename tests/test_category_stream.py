@@ -0,0 +1,92 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.db.models.query import QuerySet
+from django.utils import timezone
+
+from blog.models import Post
+from blog.views import STREAM_CHUNK_SIZE
+
+
+def _lines(response):
+    content = b"".join(response.streaming_content).decode("utf-8")
+    assert content.endswith("\n")
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_lists_visible_posts_newest_first(
+        mixer, user, client, published_category
+):
+    now = timezone.now()
+    older, newer = (
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, pub_date=now - timedelta(days=days),
+        )
+        for days in (2, 1)
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False, pub_date=now - timedelta(days=1),
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=now + timedelta(days=1),
+    )
+    mixer.blend(
+        "blog.Post", author=user, is_published=True,
+        pub_date=now - timedelta(days=1),
+    )
+
+    response = client.get(f"/category/{published_category.slug}/all/")
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+    assert _lines(response) == [
+        {
+            "id": post.id,
+            "title": post.title,
+            "pub_date": post.pub_date.isoformat(),
+            "author": user.username,
+            "url": f"/posts/{post.id}/",
+        }
+        for post in (newer, older)
+    ], (
+        "Убедитесь, что поток содержит по одному JSON-объекту в строке "
+        "для каждой опубликованной записи категории, от новых к старым."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_reads_posts_in_chunks(
+        monkeypatch, mixer, user, client, published_category
+):
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    chunk_sizes, materialized = [], []
+    iterator, fetch_all = QuerySet.iterator, QuerySet._fetch_all
+
+    def spy_iterator(self, chunk_size=2000):
+        chunk_sizes.append(chunk_size)
+        return iterator(self, chunk_size=chunk_size)
+
+    def spy_fetch_all(self):
+        if self.model is Post:
+            materialized.append(self)
+        return fetch_all(self)
+
+    monkeypatch.setattr(QuerySet, "iterator", spy_iterator)
+    monkeypatch.setattr(QuerySet, "_fetch_all", spy_fetch_all)
+
+    response = client.get(f"/category/{published_category.slug}/all/")
+    assert chunk_sizes == [STREAM_CHUNK_SIZE] == [500], (
+        "Убедитесь, что записи читаются итератором порциями по 500 строк."
+    )
+    assert len(_lines(response)) == 3
+    assert materialized == [], (
+        "Убедитесь, что поток не загружает список записей целиком."
+    )
@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from blog import clock
+from blog.views import get_published_posts_queryset
+
+BUCKET_START = datetime.datetime(2030, 1, 1, 12, 0, 0, tzinfo=datetime.timezone.utc)
+
+
+def _freeze(monkeypatch, seconds):
+    moment = BUCKET_START + datetime.timedelta(seconds=seconds)
+    monkeypatch.setattr(timezone, "now", lambda: moment)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_sql_is_stable_within_a_bucket(settings, monkeypatch):
+    settings.VISIBILITY_CLOCK_GRANULARITY = 30
+    _freeze(monkeypatch, 1.5)
+    first = str(get_published_posts_queryset().query)
+    _freeze(monkeypatch, 29.9)
+    assert str(get_published_posts_queryset().query) == first, (
+        "Убедитесь, что в пределах одного интервала запрос ленты не "
+        "меняется."
+    )
+    _freeze(monkeypatch, 30)
+    assert str(get_published_posts_queryset().query) != first
+
+
+@pytest.mark.django_db(transaction=True)
+def test_scheduled_post_appears_at_bucket_boundary(
+        settings, monkeypatch, mixer, user, published_category
+):
+    settings.VISIBILITY_CLOCK_GRANULARITY = 30
+    _freeze(monkeypatch, 0)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=BUCKET_START + datetime.timedelta(seconds=40),
+    )
+    assert clock.next_scheduled_publication() == post.pub_date
+    assert clock.visible_at(post.pub_date) == (
+        BUCKET_START + datetime.timedelta(seconds=60)
+    )
+    assert clock.expires_in(300) == 61
+    assert clock.expires_in(10) == 10
+
+    _freeze(monkeypatch, 45)
+    assert post not in get_published_posts_queryset()
+    _freeze(monkeypatch, 60)
+    assert post in get_published_posts_queryset()
+    assert clock.next_scheduled_publication() is None
+    assert clock.expires_in(300) == 300
@@ -0,0 +1,98 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models.signals import post_delete
+
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_count_follows_comments(
+        user_client, user, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Первый комментарий"}
+    )
+    user_client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Второй комментарий"}
+    )
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при добавлении комментария увеличивается счётчик "
+        "комментариев публикации."
+    )
+
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении комментария уменьшается счётчик "
+        "комментариев публикации."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_comment_counts(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+
+    call_command("rebuild_comment_counts", batch_size=1, stdout=StringIO())
+
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что команда `rebuild_comment_counts` восстанавливает "
+        "счётчики комментариев."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_deleting_post_skips_per_comment_updates(
+        mixer, post_with_published_location, post_of_another_author,
+        django_assert_max_num_queries
+):
+    post = post_with_published_location
+    mixer.cycle(50).blend("blog.Comment", post=post)
+    mixer.blend("blog.Comment", post=post_of_another_author)
+
+    with django_assert_max_num_queries(20):
+        post.delete()
+
+    post_of_another_author.refresh_from_db()
+    assert post_of_another_author.comment_count == 1, (
+        "Убедитесь, что удаление публикации не обновляет счётчик "
+        "комментариев для каждого её комментария."
+    )
+    comment = Comment.objects.get(post=post_of_another_author)
+    comment.delete()
+    post_of_another_author.refresh_from_db()
+    assert post_of_another_author.comment_count == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_post_delete_keeps_comment_upkeep(
+        mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+
+    def fail(sender, instance, **kwargs):
+        raise RuntimeError("delete failed")
+
+    post_delete.connect(fail, sender=Comment)
+    try:
+        with pytest.raises(RuntimeError):
+            post.delete()
+        with pytest.raises(RuntimeError):
+            Post.objects.filter(pk=post.pk).delete()
+    finally:
+        post_delete.disconnect(fail, sender=Comment)
+
+    Comment.objects.filter(post=post).first().delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что после неудачного удаления публикации "
+        "удаление её комментария обновляет счётчик."
+    )
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import views
+from blog.models import Comment, Post
+
+
+def _comments(mixer, post, author, count):
+    comments = mixer.cycle(count).blend("blog.Comment", post=post, author=author)
+    # Half of the comments share a timestamp, so the id has to break ties.
+    moment = timezone.now() - timedelta(hours=1)
+    Comment.objects.filter(
+        pk__in=[comment.pk for comment in comments[::2]]
+    ).update(created_at=moment)
+    Post.objects.filter(pk=post.pk).update(comment_count=count)
+    return list(
+        Comment.objects.filter(post=post)
+        .order_by("created_at", "pk").values_list("pk", flat=True)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comments_are_paged_by_cursor(
+        monkeypatch, mixer, user, client, post_with_published_location
+):
+    monkeypatch.setattr(views, "COMMENTS_PAGE_SIZE", 3)
+    post = post_with_published_location
+    expected = _comments(mixer, post, user, 8)
+
+    response = client.get(f"/posts/{post.id}/")
+    first_page = [comment.pk for comment in response.context["comments"]]
+    assert first_page == expected[:3], (
+        "Убедитесь, что на странице публикации сразу показана первая "
+        "страница комментариев, от старых к новым."
+    )
+
+    seen = list(first_page)
+    after = response.context["comments"].next_cursor
+    while after:
+        response = client.get(
+            f"/posts/{post.id}/comments/", {"after": after, "format": "json"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 8
+        seen += [comment["id"] for comment in data["comments"]]
+        after = data["next_cursor"]
+    assert seen == expected, (
+        "Убедитесь, что курсор по `(created_at, id)` проходит все "
+        "комментарии без пропусков и повторов."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comments_fragment_html_and_queries(
+        monkeypatch, mixer, user, client, post_with_published_location
+):
+    monkeypatch.setattr(views, "COMMENTS_PAGE_SIZE", 2)
+    post = post_with_published_location
+    _comments(mixer, post, user, 5)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    assert content.count("<li>") == 2
+    assert "?after=" in content, (
+        "Убедитесь, что фрагмент комментариев ссылается на следующую страницу."
+    )
+    # The post, the comments with their authors and the page cache's
+    # lookup of the next scheduled publication.
+    assert len(queries) <= 3, (
+        "Убедитесь, что страница комментариев загружается запросом поста и "
+        "одним запросом комментариев с авторами."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comments_fragment_hides_unpublished_posts(
+        mixer, user, client, post_with_published_location
+):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(is_published=False)
+    response = client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404, (
+        "Убедитесь, что комментарии снятой с публикации записи недоступны."
+    )
@@ -0,0 +1,97 @@
+import datetime
+
+import pytest
+from django.db import OperationalError
+from django.utils import timezone
+
+from blog import page_cache
+
+
+@pytest.mark.django_db(transaction=True)
+def test_conditional_get_for_public_pages(
+        client, django_assert_num_queries, post_with_published_location
+):
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    validators = {}
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header("ETag") and response.has_header(
+            "Last-Modified"), (
+            f"Убедитесь, что страница `{url}` отдаёт ETag и Last-Modified."
+        )
+        validators[url] = (response["ETag"], response["Last-Modified"])
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        assert response.status_code == 304, (
+            f"Убедитесь, что страница `{url}` отвечает 304 на запрос с "
+            "совпадающим If-None-Match."
+        )
+        assert client.head(
+            url, HTTP_IF_NONE_MATCH=validators[url][0]).status_code == 304
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=validators[url][1]).status_code == 304
+
+    post.title = "Новый заголовок"
+    post.save()
+    for url in urls:
+        etag, last_modified = validators[url]
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f"Убедитесь, что после изменения публикации страница `{url}` "
+            "отдаётся заново."
+        )
+        assert response["ETag"] != etag
+
+
+@pytest.mark.django_db(transaction=True)
+def test_validators_depend_on_viewer(client, user_client, post_with_published_location):
+    anonymous = client.get("/")
+    logged_in = user_client.get("/")
+    assert anonymous["ETag"] != logged_in["ETag"]
+    assert not logged_in.has_header("Last-Modified")
+    response = user_client.get("/", HTTP_IF_NONE_MATCH=anonymous["ETag"])
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_etag_changes_when_scheduled_post_appears(
+        settings, monkeypatch, client, mixer, user, published_category
+):
+    start = datetime.datetime(2030, 1, 1, 12, tzinfo=datetime.timezone.utc)
+    monkeypatch.setattr(timezone, "now", lambda: start)
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=start + datetime.timedelta(seconds=settings.VISIBILITY_CLOCK_GRANULARITY),
+    )
+    etag = client.get("/")["ETag"]
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+    later = start + datetime.timedelta(minutes=5)
+    monkeypatch.setattr(timezone, "now", lambda: later)
+    assert client.get("/", HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+        "Убедитесь, что ETag ленты меняется, когда отложенная публикация "
+        "становится видна."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_unreachable_validators_are_logged(
+        client, caplog, monkeypatch, post_with_published_location
+):
+    def locked(*tags):
+        raise OperationalError("database is locked")
+
+    monkeypatch.setattr(page_cache, "generations", locked)
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert response.status_code == 200
+    assert "ETag" not in response
+    assert any(
+        record.name == "blog.conditional" and "database is locked" in record.getMessage()
+        for record in caplog.records
+    ), "Убедитесь, что недоступность валидаторов записывается в журнал."
@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+
+from conftest import N_PER_PAGE
+
+
+@pytest.mark.django_db(transaction=True)
+def test_cursor_pages_cover_feed(
+        user_client, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    expected_ids = [
+        post.id for post in sorted(
+            posts, key=lambda p: (p.pub_date, p.id), reverse=True
+        )
+    ]
+
+    first_page = user_client.get("/").context["page_obj"]
+    assert first_page.has_next() and not first_page.has_previous()
+    second_page = user_client.get(
+        f"/?after={first_page.next_cursor}"
+    ).context["page_obj"]
+    seen_ids = [p.id for p in first_page] + [p.id for p in second_page]
+    assert seen_ids == expected_ids, (
+        "Убедитесь, что курсорная пагинация выдаёт все публикации ленты "
+        "по одному разу, от новых к старым."
+    )
+    assert second_page.has_previous() and not second_page.has_next()
+
+    back_page = user_client.get(
+        f"/?before={second_page.previous_cursor}"
+    ).context["page_obj"]
+    assert [p.id for p in back_page] == expected_ids[:N_PER_PAGE], (
+        "Убедитесь, что ссылка на предыдущую страницу возвращает к "
+        "предыдущей странице ленты."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_offset_pages_are_bounded(user_client):
+    response = user_client.get("/?page=100000")
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что слишком глубокие страницы `?page=` не обслуживаются."
+    )
+    response = user_client.get("/?after=garbage")
+    assert response.status_code == HTTPStatus.OK
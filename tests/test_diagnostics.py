@@ -0,0 +1,71 @@
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog.diagnostics import note, with_diagnostics
+
+
+def _counting_view():
+    calls = []
+
+    @with_diagnostics
+    def view(request):
+        calls.append(request)
+        note(request, "users", lambda: get_user_model().objects.count())
+        return HttpResponse('<a href="/posts/1/">post</a>')
+
+    return view, calls
+
+
+@pytest.mark.django_db(transaction=True)
+def test_diagnostics_off_runs_view_once(caplog, django_assert_num_queries):
+    view, calls = _counting_view()
+    caplog.set_level(logging.DEBUG, logger="blog.diagnostics")
+    with django_assert_num_queries(0):
+        response = view(RequestFactory().get("/"))
+    assert response.status_code == 200
+    assert len(calls) == 1, (
+        "Убедитесь, что без диагностики представление вызывается один раз."
+    )
+    assert not caplog.records, (
+        "Убедитесь, что без диагностики ничего не пишется в журнал."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_diagnostics_on_logs_queries_and_timing(settings, caplog, user):
+    settings.BLOG_DIAGNOSTICS = True
+    view, calls = _counting_view()
+    caplog.set_level(logging.DEBUG, logger="blog.diagnostics")
+    view(RequestFactory().get("/posts/"))
+    assert len(calls) == 1
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        message.startswith("view /posts/ -> 200 in ")
+        and "1 queries" in message
+        for message in messages
+    ), "Убедитесь, что диагностика записывает время и число запросов."
+    assert any(
+        message.startswith("view query on default") and "SELECT" in message
+        for message in messages
+    ), "Убедитесь, что диагностика записывает выполненные запросы."
+    assert "view users=1" in messages
+    assert "view rendered_contains_form=False posts_hrefs=['/posts/1/']" in messages
+
+
+@pytest.mark.django_db(transaction=True)
+def test_diagnostics_request_flag_needs_staff(caplog, user):
+    view, _ = _counting_view()
+    caplog.set_level(logging.DEBUG, logger="blog.diagnostics")
+    request = RequestFactory().get("/", {"_diagnostics": "1"})
+    request.user = user
+    view(request)
+    assert not caplog.records, (
+        "Убедитесь, что флаг диагностики не действует для обычных пользователей."
+    )
+    user.is_staff = True
+    view(request)
+    assert caplog.records
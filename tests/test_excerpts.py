@@ -0,0 +1,98 @@
+from importlib import import_module
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+
+@pytest.mark.django_db(transaction=True)
+def test_excerpt_is_stored_on_save(mixer, user, published_category):
+    text = " ".join(f"слово{i}" for i in range(450))
+    post = mixer.blend(
+        "blog.Post", text=text, author=user, category=published_category,
+    )
+    post.refresh_from_db()
+    assert post.excerpt == " ".join(text.split()[:10]) + " …", (
+        "Убедитесь, что анонс публикации сохраняется при сохранении."
+    )
+    assert post.word_count == 450
+    assert post.reading_time == 3
+
+    post.text = "Коротко"
+    post.save()
+    post.refresh_from_db()
+    assert (post.excerpt, post.word_count, post.reading_time) == ("Коротко", 1, 1)
+
+    post.text = "Только текст"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert (post.excerpt, post.word_count, post.reading_time) == ("Только текст", 2, 1), (
+        "Убедитесь, что сохранение одного текста обновляет и анонс."
+    )
+
+
+def test_migration_keeps_its_own_text_stats():
+    from blog import excerpts
+    migration = import_module("blog.migrations.0009_post_excerpt")
+    assert migration.text_stats is not excerpts.text_stats
+    for text in ("", "Коротко", " ".join(["слово"] * 450), "ы" * 400):
+        assert migration.text_stats(text) == excerpts.text_stats(text)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feed_pages_do_not_load_post_text(client, post_with_published_location):
+    post = post_with_published_location
+    for url in ("/", f"/category/{post.category.slug}/", "/feed/rss/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming else response.content
+            ).decode("utf-8")
+        assert post.excerpt and post.excerpt in content
+        assert not any(
+            '"blog_post"."text"' in query["sql"] for query in queries
+        ), f"Убедитесь, что страница {url} не загружает полный текст публикаций."
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_excerpts_fills_bulk_created_posts(mixer, user, published_category):
+    from blog.models import Post
+
+    Post.objects.bulk_create(
+        Post(
+            title=f"Пост {i}", text="раз два три", author=user,
+            category=published_category, pub_date=timezone.now(),
+        )
+        for i in range(3)
+    )
+    assert set(Post.objects.values_list("excerpt", flat=True)) == {""}
+
+    call_command("rebuild_excerpts", batch_size=2, stdout=StringIO())
+    assert set(
+        Post.objects.values_list("excerpt", "word_count", "reading_time")
+    ) == {("раз два три", 3, 1)}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_excerpts_invalidates_cached_pages(
+        client, post_with_published_location
+):
+    from blog.models import Post
+
+    post = post_with_published_location
+    urls = ("/", f"/category/{post.category.slug}/")
+    for url in urls:
+        assert post.excerpt in client.get(url).content.decode("utf-8")
+    # Written around the signals, as by a data migration.
+    Post.objects.filter(pk=post.pk).update(text="Новый текст публикации")
+
+    call_command("rebuild_excerpts", stdout=StringIO())
+    for url in urls:
+        assert "Новый текст публикации" in client.get(url).content.decode("utf-8"), (
+            "Убедитесь, что `rebuild_excerpts` сбрасывает кэш страниц с "
+            "изменёнными анонсами."
+        )
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from xml.etree import ElementTree
+
+import pytest
+from django.utils import timezone
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def _content(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feeds_follow_visibility_rules(
+        mixer, user, client, post_with_published_location, published_category
+):
+    post = post_with_published_location
+    mixer.blend(
+        "blog.Post", title="Черновик", author=user, category=published_category,
+        is_published=False,
+    )
+    mixer.blend(
+        "blog.Post", title="Отложенный", author=user,
+        category=published_category, is_published=True,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+
+    response = client.get("/feed/rss/")
+    assert response.status_code == 200
+    assert response.streaming, "Убедитесь, что лента отдаётся потоком."
+    rss = ElementTree.fromstring(_content(response))
+    titles = [item.findtext("title") for item in rss.iter("item")]
+    assert titles == [post.title], (
+        "Убедитесь, что в ленту попадают только опубликованные записи."
+    )
+
+    response = client.get(f"/category/{post.category.slug}/feed/atom/")
+    atom = ElementTree.fromstring(_content(response))
+    assert [e.findtext(f"{ATOM}title") for e in atom.iter(f"{ATOM}entry")] == [post.title]
+
+    assert client.get("/feed/json/").status_code == 404
+    assert client.get("/category/missing/feed/rss/").status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feeds_are_cached_and_answer_conditional_get(
+        client, django_assert_num_queries, post_with_published_location
+):
+    post = post_with_published_location
+    first = _content(client.get("/feed/rss/"))
+
+    with django_assert_num_queries(0):
+        response = client.get("/feed/rss/")
+    assert response.content.decode("utf-8") == first, (
+        "Убедитесь, что повторный запрос ленты отдаётся из кеша."
+    )
+    with django_assert_num_queries(0):
+        response = client.get("/feed/rss/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+    post.title = "Новый заголовок"
+    post.save()
+    assert "Новый заголовок" in _content(client.get("/feed/rss/")), (
+        "Убедитесь, что изменение записи сбрасывает кеш ленты."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_feeds_are_kept_per_scheme_and_host(
+        settings, client, post_with_published_location
+):
+    settings.ALLOWED_HOSTS = ["a.example", "b.example"]
+    post = post_with_published_location
+    response = client.get("/feed/rss/", HTTP_HOST="a.example")
+    assert f"http://a.example/posts/{post.id}/" in _content(response)
+
+    other = client.get(
+        "/feed/rss/", HTTP_HOST="b.example", secure=True,
+        HTTP_IF_NONE_MATCH=response["ETag"],
+    )
+    assert other.status_code == 200, (
+        "Убедитесь, что ETag ленты зависит от схемы и хоста."
+    )
+    content = _content(other)
+    assert f"https://b.example/posts/{post.id}/" in content
+    assert "a.example" not in content, (
+        "Убедитесь, что лента, закешированная для одного хоста, "
+        "не отдаётся другому."
+    )
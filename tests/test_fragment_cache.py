@@ -0,0 +1,26 @@
+import pytest
+
+from blog.fragment_cache import (
+    fragment_cache_stats, reset_fragment_cache_stats)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_card_cache_hits_and_invalidation(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    reset_fragment_cache_stats()
+    user_client.get("/")
+    user_client.get("/")
+    assert fragment_cache_stats() == {"hits": 1, "misses": 1}, (
+        "Убедитесь, что повторная отрисовка карточки поста берётся из кэша."
+    )
+
+    post.category.title = "Новое название категории"
+    post.category.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Новое название категории" in content, (
+        "Убедитесь, что кэш карточки поста сбрасывается при изменении "
+        "категории."
+    )
+    assert fragment_cache_stats()["misses"] == 2
@@ -0,0 +1,97 @@
+import pytest
+from django.db import OperationalError
+from django.http import HttpResponse
+
+from blog import conditional, page_cache, views
+
+
+@pytest.mark.django_db(transaction=True)
+def test_anonymous_pages_cached_and_invalidated(
+        client, django_assert_num_queries, post_with_published_location
+):
+    post = post_with_published_location
+    urls = (
+        "/",
+        f"/posts/{post.id}/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{post.author.username}/",
+    )
+    for url in urls:
+        client.get(url)
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert post.title in response.content.decode("utf-8")
+
+    post.title = "Изменённый заголовок"
+    post.save()
+    for url in urls:
+        content = client.get(url).content.decode("utf-8")
+        assert "Изменённый заголовок" in content, (
+            f"Убедитесь, что кэш страницы `{url}` сбрасывается при "
+            "изменении публикации."
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_page_changed_while_rendering_is_not_stored(rf):
+    request = rf.get("/posts/1/")
+    page_cache.collect_tags(request)
+    page_cache.tag(request, "post:1")
+    # A comment saved after the view read the post, before it returned.
+    page_cache.invalidate("post:1")
+    page_cache.store_page(request, HttpResponse("старая страница"))
+    assert page_cache.cached_page(request) is None, (
+        "Убедитесь, что страница, данные которой изменились во время "
+        "рендеринга, не сохраняется в кэш."
+    )
+
+    page_cache.collect_tags(request)
+    page_cache.tag(request, "post:1")
+    page_cache.store_page(request, HttpResponse("новая страница"))
+    assert page_cache.cached_page(request).content == "новая страница".encode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fallback_page_is_not_cached(
+        client, monkeypatch, post_with_published_location
+):
+    def locked(request, posts_qs):
+        raise OperationalError("database is locked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(views, "paginate_posts", locked)
+        assert client.get("/").status_code == 200
+    content = client.get("/").content.decode("utf-8")
+    assert post_with_published_location.title in content, (
+        "Убедитесь, что страница, отрисованная после ошибки базы данных, "
+        "не попадает в кэш страниц."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_username_change_invalidates_author_pages(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    author = post.author
+    old_name = author.username
+    urls = ("/", f"/posts/{post.id}/", f"/category/{post.category.slug}/")
+    for url in urls:
+        client.get(url)
+    assert client.get(f"/profile/{old_name}/").status_code == 200
+    assert conditional.author_id(old_name) == author.pk
+
+    author.username = "renamed_author"
+    author.save()
+    for url in urls:
+        assert "@renamed_author" in client.get(url).content.decode("utf-8"), (
+            f"Убедитесь, что кэш страницы `{url}` сбрасывается при "
+            "изменении имени автора."
+        )
+    assert client.get(f"/profile/{old_name}/").status_code == 404, (
+        "Убедитесь, что профиль по прежнему имени пользователя недоступен."
+    )
+    assert client.get("/profile/renamed_author/").status_code == 200
+    assert conditional.author_id(old_name) is None, (
+        "Убедитесь, что прежнее имя пользователя забывается."
+    )
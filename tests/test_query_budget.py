@@ -0,0 +1,48 @@
+import pytest
+
+from blog.middleware import QueryBudgetExceeded, view_query_stats
+from conftest import N_PER_FIXTURE
+
+
+@pytest.mark.django_db(transaction=True)
+def test_public_pages_within_query_budget(
+        mixer, user_client, client, assert_query_budget,
+        many_posts_with_published_locations,
+):
+    post = many_posts_with_published_locations[0]
+    mixer.cycle(N_PER_FIXTURE * 3).blend("blog.Comment", post=post)
+    for test_client in (user_client, client):
+        assert_query_budget(test_client, "blog:index")
+        assert_query_budget(test_client, "blog:post_detail", post.id)
+        assert_query_budget(
+            test_client, "blog:category_posts", post.category.slug
+        )
+        assert_query_budget(
+            test_client, "blog:profile", post.author.username
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_streamed_queries_count_towards_budget(
+        settings, client, post_with_published_location
+):
+    view_name = "blog:category_posts_stream"
+    url = f"/category/{post_with_published_location.category.slug}/all/"
+    view_query_stats.pop(view_name, None)
+    response = client.get(url)
+    assert view_name not in view_query_stats, (
+        "Убедитесь, что потоковый ответ проверяется после отправки тела."
+    )
+    b"".join(response.streaming_content)
+    streamed = view_query_stats[view_name]["queries"]
+    response = client.get(url)
+    b"".join(response.streaming_content)
+    assert view_query_stats[view_name]["queries"] - streamed >= 1, (
+        "Убедитесь, что запросы потокового ответа учитываются в бюджете."
+    )
+
+    settings.QUERY_BUDGET_RAISE = True
+    settings.QUERY_BUDGETS = {view_name: 0}
+    response = client.get(url)
+    with pytest.raises(QueryBudgetExceeded):
+        b"".join(response.streaming_content)
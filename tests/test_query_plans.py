@@ -0,0 +1,56 @@
+import re
+from typing import Callable, Dict
+
+import pytest
+from django.db import connection
+from django.db.models import QuerySet
+
+from blog.models import Comment, Post
+from blog.views import get_published_posts_queryset
+
+# Plan lines SQLite emits when a query is not served by an index seek:
+# ``SCAN <table>`` (full table or full index scan) and
+# ``USE TEMP B-TREE FOR ORDER BY/GROUP BY`` (an explicit sort).
+FULL_SCAN_RE = re.compile(r"\bSCAN (?:TABLE )?\w+")
+TEMP_BTREE_RE = re.compile(r"USE TEMP B-TREE")
+
+
+def get_hot_querysets(post: Post) -> Dict[str, Callable[[], QuerySet]]:
+    return {
+        "index": lambda: get_published_posts_queryset(),
+        "category": lambda: get_published_posts_queryset(
+            category=post.category
+        ),
+        "profile (public)": lambda: get_published_posts_queryset().filter(
+            author__username=post.author.username
+        ),
+        "profile (owner)": lambda: (
+            Post.objects.filter(author__username=post.author.username)
+            .select_related("category", "location")
+            .order_by("-pub_date")
+        ),
+        "post comments": lambda: (
+            Comment.objects.filter(post=post).select_related("author")
+        ),
+    }
+
+
+@pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="EXPLAIN QUERY PLAN format is SQLite-specific.",
+)
+@pytest.mark.django_db(transaction=True)
+def test_feed_query_plans(post_with_published_location):
+    for name, get_queryset in get_hot_querysets(
+        post_with_published_location
+    ).items():
+        plan = get_queryset().explain()
+        assert not FULL_SCAN_RE.search(plan), (
+            f"Запрос `{name}` выполняет полный просмотр таблицы. "
+            f"Убедитесь, что для него объявлен подходящий индекс:\n{plan}"
+        )
+        assert not TEMP_BTREE_RE.search(plan), (
+            f"Запрос `{name}` сортирует строки во временном B-дереве. "
+            "Убедитесь, что порядок выдачи обеспечивается индексом:\n"
+            f"{plan}"
+        )
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog import registry
+from blog.forms import PostForm
+from blog.models import Category
+
+
+def _category_queries(captured):
+    return [
+        q["sql"] for q in captured.captured_queries
+        if 'FROM "blog_category"' in q["sql"]
+        or 'FROM "blog_location"' in q["sql"]
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_category_page_and_form_read_the_registry(
+        user_client, post_with_published_location
+):
+    category = post_with_published_location.category
+    url = f"/category/{category.slug}/"
+    assert user_client.get(url).status_code == 200
+    with CaptureQueriesContext(connection) as captured:
+        assert user_client.get(url).status_code == 200
+        form = PostForm()
+        rendered = str(form["category"]) + str(form["location"])
+    assert not _category_queries(captured), (
+        "Убедитесь, что опубликованные категории и местоположения берутся "
+        "из реестра, а не из базы данных."
+    )
+    assert category.title in rendered
+
+    category.is_published = False
+    category.save()
+    assert user_client.get(url).status_code == 404, (
+        "Убедитесь, что реестр категорий обновляется при сохранении категории."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_registry_reloads_when_generation_moves(published_category):
+    assert registry.published_category(published_category.slug)
+    # A change made without signals, e.g. by another process' raw SQL,
+    # stays invisible until someone bumps the shared generation.
+    Category.objects.filter(pk=published_category.pk).update(is_published=False)
+    assert registry.published_category(published_category.slug)
+    registry.invalidate()
+    assert registry.published_category(published_category.slug) is None
+
+
+def test_registry_invalidation_reaches_other_processes():
+    # Another worker process, built from the same settings.
+    script = (
+        "import json, sys, django\n"
+        "django.setup()\n"
+        "from django.test import override_settings\n"
+        "with override_settings(CACHES=json.loads(sys.argv[1])):\n"
+        "    from blog import registry\n"
+        "    registry.invalidate()\n"
+    )
+    before = registry.generation()
+    subprocess.run(
+        [sys.executable, "-c", script, json.dumps(settings.CACHES)],
+        cwd=settings.BASE_DIR, check=True,
+        env=dict(os.environ, DJANGO_SETTINGS_MODULE="blogicum.settings"),
+    )
+    assert registry.generation() > before, (
+        "Убедитесь, что сброс реестра в одном процессе виден остальным."
+    )
@@ -0,0 +1,82 @@
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from blog.middleware import view_query_stats
+from blog.models import Post
+from blog.routers import PIN_COOKIE, PrimaryReplicaRouter
+
+# Every public read view, with replicas on.
+PUBLIC_PAGES = (
+    ("blog:index", "/"),
+    ("blog:post_detail", "/posts/{post.id}/"),
+    ("blog:comments_fragment", "/posts/{post.id}/comments/"),
+    ("blog:category_posts", "/category/{post.category.slug}/"),
+    ("blog:category_posts_stream", "/category/{post.category.slug}/all/"),
+    ("blog:category_feed", "/category/{post.category.slug}/feed/rss/"),
+    ("blog:profile", "/profile/{post.author.username}/"),
+    ("blog:search", "/search/?q={post.title}"),
+    ("blog:feed", "/feed/atom/"),
+    ("blog:sitemap", "/sitemap.xml"),
+    ("blog:api_posts", "/api/v1/posts/"),
+    ("blog:api_post", "/api/v1/posts/{post.id}/"),
+    ("blog:api_category_posts", "/api/v1/categories/{post.category.slug}/posts/"),
+    ("blog:api_author_posts", "/api/v1/authors/{post.author.username}/posts/"),
+)
+
+
+def _get(client, path):
+    with CaptureQueriesContext(connections["default"]) as primary, \
+            CaptureQueriesContext(connections["replica"]) as replica:
+        response = client.get(path)
+        if response.streaming:
+            b"".join(response.streaming_content)
+    assert response.status_code == 200
+    return len(primary), len(replica)
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_reads_go_to_replicas_until_the_client_writes(
+        settings, user_client, post_with_published_location
+):
+    settings.READ_REPLICAS = ["replica"]
+    post = post_with_published_location
+    primary, replica = _get(user_client, f"/posts/{post.id}/")
+    assert primary == 0 and replica > 0, (
+        "Убедитесь, что запросы на чтение страниц уходят в реплику."
+    )
+
+    response = user_client.post(
+        f"/posts/{post.id}/comment/", data={"text": "Новый комментарий"}
+    )
+    assert response.cookies[PIN_COOKIE].value, (
+        "Убедитесь, что после записи клиент закрепляется за основной базой."
+    )
+    primary, replica = _get(user_client, f"/posts/{post.id}/")
+    assert primary > 0 and replica == 0, (
+        "Убедитесь, что следующий запрос после записи читает из основной базы."
+    )
+
+
+def test_reads_outside_requests_use_the_primary(settings):
+    settings.READ_REPLICAS = ["replica"]
+    assert PrimaryReplicaRouter().db_for_read(Post) == "default"
+    assert PrimaryReplicaRouter().allow_migrate("replica", "blog") is False
+
+
+@pytest.mark.parametrize("view_name, url", PUBLIC_PAGES)
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_public_pages_read_from_replicas(
+        settings, tmp_path, client, post_with_published_location, view_name, url
+):
+    settings.READ_REPLICAS = ["replica"]
+    settings.SITEMAP_ROOT = tmp_path
+    view_query_stats.pop(view_name, None)
+    primary, replica = _get(client, url.format(post=post_with_published_location))
+    assert replica > 0, (
+        f"Убедитесь, что страница `{view_name}` читает данные из реплики."
+    )
+    recorded = view_query_stats[view_name]["queries"]
+    assert recorded == primary + replica, (
+        "Убедитесь, что бюджет запросов учитывает запросы к репликам."
+    )
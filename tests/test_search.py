@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Post
+from blog.search import search_posts
+
+
+def _post(mixer, category, user, title, text, **kwargs):
+    kwargs.setdefault("pub_date", timezone.now() - timedelta(days=1))
+    return mixer.blend(
+        "blog.Post", title=title, text=text, author=user,
+        category=category, **kwargs,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_ranks_and_respects_visibility(
+        mixer, user, client, published_category
+):
+    in_text = _post(mixer, published_category, user, "Ужин", "Был обед у друзей")
+    in_title = _post(mixer, published_category, user, "Обед", "Вкусно")
+    _post(mixer, published_category, user, "Обед", "Черновик",
+          is_published=False)
+    _post(mixer, published_category, user, "Обед", "Скоро",
+          pub_date=timezone.now() + timedelta(days=1))
+    hidden = mixer.blend("blog.Category", is_published=False)
+    _post(mixer, hidden, user, "Обед", "Скрытая категория")
+
+    page = search_posts("обед", per_page=10)
+    assert [post.pk for post in page] == [in_title.pk, in_text.pk], (
+        "Убедитесь, что поиск показывает только опубликованные посты и "
+        "ставит совпадения в заголовке выше."
+    )
+    assert "<mark>обед</mark>" in page.object_list[1].search_snippet
+
+    response = client.get("/search/", {"q": "обе"})
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    assert f"/posts/{in_title.pk}/" in content
+    assert "Черновик" not in content
+
+
+@pytest.mark.django_db(transaction=True)
+def test_search_keyset_pagination_and_sync(mixer, user, published_category):
+    posts = [
+        _post(mixer, published_category, user, f"Заметка {i}", "про море")
+        for i in range(5)
+    ]
+    seen = []
+    after = None
+    while True:
+        page = search_posts("море", per_page=2, after=after)
+        seen += [post.pk for post in page]
+        if not page.has_next():
+            break
+        after = page.next_cursor
+    assert sorted(seen) == sorted(post.pk for post in posts)
+    assert len(seen) == len(set(seen))
+
+    posts[0].text = "про горы"
+    posts[0].save()
+    posts[1].delete()
+    found = {post.pk for post in search_posts("море", per_page=10)}
+    assert found == {post.pk for post in posts[2:]}, (
+        "Убедитесь, что поисковый индекс обновляется при изменении и "
+        "удалении постов."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_search_index(mixer, user, published_category):
+    post = _post(mixer, published_category, user, "Поезд", "Вокзал")
+    Post.objects.filter(pk=post.pk).update(title="Самолёт")
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO blog_post_fts (rowid, title, text) "
+                       "VALUES (999999, 'Самолёт', 'Призрак')")
+    call_command("rebuild_search_index", batch_size=1, stdout=StringIO())
+    assert [p.pk for p in search_posts("самолёт", per_page=10)] == [post.pk]
+    assert not list(search_posts("поезд", per_page=10))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_admin_search_uses_index(mixer, user, admin_client, published_category):
+    post = _post(mixer, published_category, user, "Библиотека", "Книги")
+    _post(mixer, published_category, user, "Парк", "Деревья")
+    response = admin_client.get("/admin/blog/post/", {"q": "библиотек"})
+    assert list(response.context["cl"].result_list) == [post]
@@ -0,0 +1,67 @@
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Sum
+
+from blog.models import Category, Comment, Location, Post
+
+
+def _seed(seed):
+    out = StringIO()
+    call_command(
+        "seed_blog", users=5, categories=3, locations=4, posts=50,
+        comments=120, seed=seed, batch_size=16, stdout=out,
+    )
+    return out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_seed_blog_creates_consistent_data():
+    output = _seed(1)
+    assert "rows/s" in output
+    assert Post.objects.count() == 50
+    assert Category.objects.count() == 3
+    assert Location.objects.count() == 4
+    assert Comment.objects.count() == 120
+    assert Post.objects.aggregate(n=Sum("comment_count"))["n"] == 120, (
+        "Убедитесь, что счётчики комментариев сгенерированных постов "
+        "совпадают с числом комментариев."
+    )
+    for post in Post.objects.all():
+        assert post.comment_count == post.comments.count()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_seed_blog_is_deterministic(django_user_model):
+    def snapshot():
+        return list(Post.objects.order_by("pk").values_list(
+            "title", "text", "author__username", "category__slug",
+            "is_published", "comment_count",
+        ))
+
+    _seed(7)
+    first = snapshot()
+    for model in (Comment, Post, Category, Location, django_user_model):
+        model.objects.all().delete()
+    _seed(7)
+    assert snapshot() == first, (
+        "Убедитесь, что при одинаковом seed генерируются одинаковые данные."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_db_json_fixture_loads():
+    fixture = Path(settings.BASE_DIR).parent / "db.json"
+    call_command(
+        "loaddata", str(fixture), exclude=["admin", "auth.permission", "sessions"],
+        stdout=StringIO(),
+    )
+    post = Post.objects.get(pk=1)
+    assert post.updated_at == post.created_at, (
+        "Убедитесь, что `loaddata db.json` заполняет поле `updated_at`."
+    )
+    assert post.excerpt
+    assert not Category.objects.filter(updated_at=None).exists()
@@ -0,0 +1,129 @@
+from xml.etree import ElementTree
+
+import pytest
+from django.utils import timezone
+
+from blog import sitemaps
+
+NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+@pytest.fixture
+def sitemap_settings(settings, tmp_path):
+    settings.SITEMAP_ROOT = tmp_path
+    settings.SITEMAP_SHARD_SIZE = 2
+    settings.SITEMAP_REFRESH_SECONDS = 0
+    settings.SITEMAP_BASE_URL = "http://testserver"
+    return settings
+
+
+@pytest.fixture
+def many_posts(mixer, user, published_category):
+    return mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, location=None,
+        pub_date=timezone.now() - timezone.timedelta(days=1),
+    )
+
+
+def _locations(response, tag):
+    content = (
+        b"".join(response.streaming_content)
+        if response.streaming else response.content
+    )
+    return [e.findtext(f"{NS}loc") for e in ElementTree.fromstring(content).iter(f"{NS}{tag}")]
+
+
+def _post_shard(post):
+    return sitemaps.shard_name("posts", (post.pk - 1) // 2)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sitemap_index_lists_shards_by_id_range(
+        sitemap_settings, client, many_posts, published_category
+):
+    shards = _locations(client.get("/sitemap.xml"), "sitemap")
+    expected = sorted({_post_shard(post) for post in many_posts})
+    assert [url for url in shards if "-posts-" in url] == [
+        f"http://testserver/sitemap-{name}.xml" for name in expected
+    ], "Убедитесь, что индекс sitemap делит записи на шарды по диапазонам id."
+    assert "http://testserver/sitemap-categories-0.xml" in shards
+
+    listed = []
+    for name in expected:
+        response = client.get(f"/sitemap-{name}.xml")
+        assert response["Content-Type"] == "application/xml"
+        urls = _locations(response, "url")
+        assert len(urls) <= 2
+        listed += urls
+    assert listed == [
+        f"http://testserver/posts/{post.pk}/" for post in many_posts
+    ]
+    categories = _locations(client.get("/sitemap-categories-0.xml"), "url")
+    assert categories == [
+        f"http://testserver/category/{published_category.slug}/"
+    ]
+    author = many_posts[0].author
+    profiles = _locations(
+        client.get(f"/sitemap-profiles-{(author.pk - 1) // 2}.xml"), "url"
+    )
+    assert profiles == [f"http://testserver/profile/{author.username}/"]
+    assert client.get("/sitemap-posts-999.xml").status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sitemap_refresh_rebuilds_only_changed_shards(sitemap_settings, many_posts):
+    _, rebuilt = sitemaps.refresh()
+    assert {_post_shard(post) for post in many_posts} <= set(rebuilt)
+    assert sitemaps.refresh()[1] == [], (
+        "Убедитесь, что неизменённые шарды sitemap не перестраиваются."
+    )
+
+    edited = many_posts[2]
+    edited.title = "Новый заголовок"
+    edited.save()
+    rebuilt = sitemaps.refresh()[1]
+    assert [name for name in rebuilt if name.startswith("posts-")] == [
+        _post_shard(edited)
+    ], "Убедитесь, что перестраивается только шард изменённой записи."
+
+    # A shard left without visible posts is dropped rather than rebuilt.
+    hidden = next(
+        post for post in many_posts
+        if [_post_shard(other) for other in many_posts].count(_post_shard(post)) == 2
+    )
+    hidden.is_published = False
+    hidden.save()
+    rebuilt = sitemaps.refresh()[1]
+    assert _post_shard(hidden) in rebuilt
+    content = sitemaps.shard_path(_post_shard(hidden)).read_text()
+    assert f"/posts/{hidden.pk}/" not in content
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sitemap_shard_answers_conditional_get(sitemap_settings, client, many_posts):
+    url = f"/sitemap-{_post_shard(many_posts[0])}.xml"
+    response = client.get(url)
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sitemap_is_shared_between_hosts(
+        sitemap_settings, client, many_posts, monkeypatch
+):
+    sitemap_settings.SITEMAP_BASE_URL = ""
+    sitemap_settings.SITEMAP_REFRESH_SECONDS = 3600
+    sitemap_settings.ALLOWED_HOSTS = ["*"]
+    url = f"/sitemap-{_post_shard(many_posts[0])}.xml"
+    client.get("/sitemap.xml")
+    refreshes = []
+    monkeypatch.setattr(sitemaps, "refresh", lambda **kwargs: refreshes.append(kwargs))
+    for host, secure in (("localhost", False), ("127.0.0.1", True)):
+        scheme = "https" if secure else "http"
+        shards = _locations(client.get("/sitemap.xml", HTTP_HOST=host, secure=secure), "sitemap")
+        assert f"{scheme}://{host}{url}" in shards
+        urls = _locations(client.get(url, HTTP_HOST=host, secure=secure), "url")
+        assert urls and all(u.startswith(f"{scheme}://{host}/posts/") for u in urls)
+    assert refreshes == [], (
+        "Убедитесь, что запросы с другим хостом не перестраивают sitemap."
+    )
@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from blog.sqlite import pragma_statements
+
+
+def _pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_new_connections_get_the_pragmas(settings, tmp_path):
+    settings_dict = dict(connection.settings_dict, NAME=str(tmp_path / "db.sqlite3"))
+    wrapper = DatabaseWrapper(settings_dict, alias="pragmas")
+    try:
+        wrapper.ensure_connection()
+        assert _pragma(wrapper, "journal_mode") == "wal", (
+            "Убедитесь, что новые соединения с SQLite переводятся в режим WAL."
+        )
+        assert _pragma(wrapper, "synchronous") == 1
+        assert _pragma(wrapper, "busy_timeout") == settings.SQLITE_PRAGMAS["busy_timeout"]
+        assert _pragma(wrapper, "temp_store") == 2
+        assert _pragma(wrapper, "cache_size") == settings.SQLITE_PRAGMAS["cache_size"]
+    finally:
+        wrapper.close()
+
+
+def test_pragma_values_are_validated():
+    assert pragma_statements({"busy_timeout": 100}) == ["PRAGMA busy_timeout = 100"]
+    with pytest.raises(ValueError):
+        pragma_statements({"journal_mode": "wal; DROP TABLE blog_post"})
+
+
+@pytest.mark.django_db
+def test_read_only_connections_skip_write_pragmas(tmp_path):
+    path = tmp_path / "db.sqlite3"
+    sqlite3.connect(path).close()  # a new file, in the default journal mode
+    settings_dict = dict(connection.settings_dict, NAME=f"file:{path}?mode=ro")
+    wrapper = DatabaseWrapper(settings_dict, alias="read_only")
+    try:
+        wrapper.ensure_connection()
+        assert _pragma(wrapper, "journal_mode") == "delete", (
+            "Убедитесь, что соединения только для чтения не меняют режим журнала."
+        )
+        assert _pragma(wrapper, "temp_store") == 2
+    finally:
+        wrapper.close()
@@ -0,0 +1,73 @@
+import gzip
+from io import StringIO
+
+import pytest
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import Client
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STATICFILES_STORAGE = "blog.assets.CompressedManifestStaticFilesStorage"
+    settings.STATICFILES_FINDERS = [
+        "django.contrib.staticfiles.finders.FileSystemFinder",
+    ]
+    settings.STATIC_SERVE = True
+    call_command("collectstatic", interactive=False, stdout=StringIO())
+    return tmp_path
+
+
+def test_collectstatic_writes_hashed_and_gzipped_files(collected):
+    hashed = staticfiles_storage.hashed_files["css/bootstrap.min.css"]
+    assert hashed != "css/bootstrap.min.css"
+    original = (collected / hashed).read_bytes()
+    assert gzip.decompress((collected / f"{hashed}.gz").read_bytes()) == original, (
+        "Убедитесь, что collectstatic сохраняет сжатые gzip-варианты файлов."
+    )
+    assert not (collected / "img" / "logo-v2.png.gz").exists()
+
+
+def test_static_tag_uses_memoized_manifest_lookups(collected, monkeypatch):
+    template = Template("{% load static %}{% static 'img/logo-v2.png' %}")
+    url = template.render(Context())
+    assert url == "/static/" + staticfiles_storage.hashed_files["img/logo-v2.png"]
+
+    calls = []
+    stored_name = ManifestStaticFilesStorage.stored_name
+    monkeypatch.setattr(
+        ManifestStaticFilesStorage, "stored_name",
+        lambda self, name: calls.append(name) or stored_name(self, name),
+    )
+    for _ in range(3):
+        assert template.render(Context()) == url
+    assert calls == [], "Убедитесь, что адреса статических файлов запоминаются."
+
+
+@pytest.mark.django_db
+def test_static_files_are_served_compressed_with_long_caching(collected):
+    client = Client()
+    hashed = staticfiles_storage.hashed_files["css/bootstrap.min.css"]
+
+    response = client.get(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="br, gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert response["Content-Type"] == "text/css"
+    assert response["Vary"] == "Accept-Encoding"
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что хешированные файлы отдаются с immutable Cache-Control."
+    )
+    body = gzip.decompress(b"".join(response.streaming_content))
+    assert body == (collected / hashed).read_bytes()
+
+    response = client.get(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip;q=0")
+    assert not response.has_header("Content-Encoding")
+
+    response = client.get("/static/css/bootstrap.min.css")
+    assert "immutable" not in response["Cache-Control"]
+    last_modified = client.get(f"/static/{hashed}")["Last-Modified"]
+    assert client.get(
+        f"/static/{hashed}", HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == 304
+    assert client.get(f"/static/{hashed}.gz").status_code == 404
@@ -0,0 +1,59 @@
+from django.template import Context, Engine
+from django.template.loader_tags import IncludeNode
+
+from blog.template_loaders import InlinedIncludeNode
+
+TEMPLATES = {
+    "page.html": (
+        "{% for name in names %}"
+        "{% include 'item.html' with label=name|upper %}"
+        "{% endfor %}"
+        "{% include template_name %}"
+        "{% include 'item.html' only %}"
+        "{% include 'cycling.html' %}"
+    ),
+    "item.html": "<{{ label }}:{{ suffix }}>",
+    "other.html": "[other]",
+    "cycling.html": "{% cycle 'a' 'b' %}",
+    "loop.html": "{% if depth %}{% include 'loop.html' with depth=0 %}{% endif %}.",
+}
+CONTEXT = {"names": ["a", "b"], "template_name": "other.html", "suffix": "!"}
+
+
+def _engine(loader):
+    return Engine(loaders=[(loader, [
+        ("django.template.loaders.locmem.Loader", TEMPLATES),
+    ])])
+
+
+def _includes(template, node_type):
+    return template.nodelist.get_nodes_by_type(node_type)
+
+
+def test_fixed_includes_are_inlined():
+    template = _engine("blog.template_loaders.InliningLoader").get_template("page.html")
+    inlined = _includes(template, InlinedIncludeNode)
+    assert [node.template_name for node in inlined] == ["item.html"], (
+        "Убедитесь, что включения шаблонов с постоянным именем встраиваются."
+    )
+    # A variable name, `only` and per-render state.
+    assert len(_includes(template, IncludeNode)) == 3
+
+
+def test_inlined_templates_render_the_same():
+    plain = _engine("django.template.loaders.cached.Loader")
+    inlining = _engine("blog.template_loaders.InliningLoader")
+    for name in ("page.html", "loop.html"):
+        context = dict(CONTEXT, depth=1)
+        assert (
+            inlining.get_template(name).render(Context(context))
+            == plain.get_template(name).render(Context(context))
+        )
+    output = inlining.get_template("page.html").render(Context(CONTEXT))
+    assert output.startswith("<A:!><B:!>[other]<:>a")
+
+
+def test_recursive_include_is_left_alone():
+    template = _engine("blog.template_loaders.InliningLoader").get_template("loop.html")
+    assert _includes(template, InlinedIncludeNode) == []
+    assert template.render(Context({"depth": 1})) == ".."
@@ -0,0 +1,62 @@
+import io
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from blog.models import Post
+from blog.thumbnails import image_dimensions, rendition_widths
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "PNG")
+    return SimpleUploadedFile("photo.png", buffer.getvalue(), "image/png")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_thumbnails_are_generated_and_used(
+        settings, tmp_path, client, published_category, published_location,
+        user
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.THUMBNAIL_ASYNC = False
+    settings.THUMBNAIL_WIDTHS = (320, 640, 960)
+    post = Post.objects.create(
+        title="С картинкой", text="Текст", author=user,
+        category=published_category, location=published_location,
+        pub_date="2020-01-01T00:00:00Z", image=_png(800, 400),
+    )
+    post.refresh_from_db()
+    assert image_dimensions(post) == (800, 400), (
+        "Убедитесь, что размеры изображения сохраняются при загрузке."
+    )
+    assert rendition_widths(post) == [320, 640], (
+        "Убедитесь, что для изображения создаются миниатюры всех ширин, "
+        "меньших исходной."
+    )
+    thumbs = tmp_path / "posts" / "thumbs"
+    assert sorted(p.name for p in thumbs.iterdir()) == [
+        "photo_320w.png", "photo_640w.png"
+    ]
+
+    content = client.get("/").content.decode("utf-8")
+    assert "photo_640w.png 640w" in content and 'width="800"' in content, (
+        "Убедитесь, что в ленте используется srcset с миниатюрами."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_small_image_keeps_original(
+        settings, tmp_path, published_category, published_location, user
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.THUMBNAIL_ASYNC = False
+    post = Post.objects.create(
+        title="Маленькая", text="Текст", author=user,
+        category=published_category, location=published_location,
+        pub_date="2020-01-01T00:00:00Z", image=_png(100, 50),
+    )
+    post.refresh_from_db()
+    assert image_dimensions(post) == (100, 50)
+    assert rendition_widths(post) == []